@@ -2,13 +2,18 @@ import os
 import sys
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from backend.main import ask_question, QueryRequest
+from backend.main import ask_question, stream_chat, metrics, on_startup, QueryRequest
 
 # Initialize FastAPI app
 app = FastAPI(title="Odisha Disaster Management Assistant")
 
 # Register the chat endpoint from backend
 app.post("/chat")(ask_question)
+app.post("/chat/stream")(stream_chat)
+app.get("/metrics")(metrics)
+
+# Start background IMD station cache refresher
+app.on_event("startup")(on_startup)
 
 # Mount the 'frontend' directory to serve static files
 # html=True allows serving index.html at root '/'
@@ -2,28 +2,40 @@
 import uvicorn
 import sys
 import os
+import json
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from typing import Optional
 
 # Add project root and src to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
 
-from agents.workflow.workflow import app
+from agents.workflow.workflow import app, rewrite_policy, routing_policy, evaluation_policy, speculation_stats
 from agents.memory.short_term import ShortTermMemory
+from agents.memory.session_store import session_store_from_env
+from agents.tools.weather_api import station_weather_cache
 
 # ------------------------------------------------
 # GLOBAL SESSION MEMORY STORE
 # ------------------------------------------------
-SESSION_MEMORY = {}
+# Bounded (LRU + idle TTL); SESSION_BACKEND=sqlite shares it across workers
+SESSION_STORE = session_store_from_env()
+
+# Graph nodes whose LLM tokens are the user-facing answer
+ANSWER_NODES = {"rag", "general", "weather"}
+
+# Graph nodes reported to the client as progress stages
+STAGE_NODES = {"rewrite", "router", "speculate", "calculator", "web_search", "weather", "rag", "general", "evaluator"}
 
 # -----------------------------
 # Input Model
 # -----------------------------
 class QueryRequest(BaseModel):
     query: str
-    session_id: str   # 🔑 REQUIRED FOR MEMORY
+    session_id: Optional[str] = None   # 🔑 per-session memory; omitted → one-off, not stored
 
 
 # -----------------------------
@@ -43,6 +55,21 @@ backend.add_middleware(
 )
 
 
+# ------------------------------------------------
+# STARTUP: PREWARM IMD STATION CACHE
+# ------------------------------------------------
+@backend.on_event("startup")
+async def on_startup():
+    SESSION_STORE.start_sweeper(interval=float(os.getenv("SESSION_SWEEP_INTERVAL", "60")))
+
+    # Opt-in: each refresh runs a headless Chrome scrape per station, and the
+    # Docker image ships no browser
+    if os.getenv("IMD_PREWARM", "false").lower() in ("1", "true", "yes"):
+        station_weather_cache.start_background_refresh(
+            interval=float(os.getenv("IMD_PREWARM_INTERVAL", "1200"))
+        )
+
+
 # ------------------------------------------------
 # ROOT TEST
 # ------------------------------------------------
@@ -55,23 +82,20 @@ def root():
 # MAIN CHAT ENDPOINT (SESSION AWARE)
 # ------------------------------------------------
 @backend.post("/chat")
-def ask_question(request: QueryRequest):
+async def ask_question(request: QueryRequest):
     try:
         session_id = request.session_id
+        session_memory = get_session_memory(session_id)
 
-        # Create memory per session
-        if session_id not in SESSION_MEMORY:
-            SESSION_MEMORY[session_id] = ShortTermMemory()
-
-        session_memory = SESSION_MEMORY[session_id]
-
-        # Run LangGraph workflow
-        result = app.invoke({
+        # Run LangGraph workflow (async: no threadpool worker held per request)
+        result = await app.ainvoke({
             "query": request.query,
             "memory": session_memory,
             "session_id": session_id
         })
 
+        save_session_memory(session_id, session_memory)
+
         final_answer = result.get("response", "No response generated")
 
         return {
@@ -88,6 +112,107 @@ def ask_question(request: QueryRequest):
         }
 
 
+# ------------------------------------------------
+# STREAMING CHAT ENDPOINT (SERVER-SENT EVENTS)
+# ------------------------------------------------
+@backend.post("/chat/stream")
+async def stream_chat(request: QueryRequest):
+    """
+    Same workflow as /chat, streamed as SSE:
+
+        event: stage   data: {"stage": "rewrite" | "router" | "retrieval" | <node>, ...}
+        event: token   data: {"text": "..."}   (answering agent LLM tokens)
+        event: done    data: {"answer": "...", "session_id": "..."}
+        event: error   data: {"error": "..."}
+
+    The "done" answer is authoritative: the evaluator may replace the
+    streamed draft with an improved answer.
+    """
+    return StreamingResponse(
+        _chat_event_stream(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _chat_event_stream(request: QueryRequest):
+    session_id = request.session_id
+    session_memory = get_session_memory(session_id)
+    inputs = {
+        "query": request.query,
+        "memory": session_memory,
+        "session_id": session_id
+    }
+    final_answer = None
+
+    try:
+        async for event in app.astream_events(inputs, version="v2"):
+            kind = event["event"]
+            node = event.get("metadata", {}).get("langgraph_node")
+
+            if kind == "on_chat_model_stream" and node in ANSWER_NODES:
+                text = event["data"]["chunk"].content
+                if text:
+                    yield _sse("token", {"text": text})
+
+            elif kind == "on_custom_event" and event["name"] == "retrieval_done":
+                yield _sse("stage", {"stage": "retrieval", **event["data"]})
+
+            elif kind == "on_chain_end" and event["name"] in STAGE_NODES and node == event["name"]:
+                output = event["data"].get("output") or {}
+                stage = {"stage": node}
+                if node in ("rewrite", "speculate"):
+                    stage["rewritten_query"] = output.get("rewritten_query")
+                if node in ("router", "speculate"):
+                    stage["route"] = output.get("route")
+                yield _sse("stage", stage)
+
+                if output.get("response"):
+                    final_answer = output["response"]
+
+        save_session_memory(session_id, session_memory)
+
+        yield _sse("done", {
+            "answer": final_answer or "No response generated",
+            "session_id": session_id
+        })
+
+    except Exception as e:
+        yield _sse("error", {"error": str(e)})
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def get_session_memory(session_id: Optional[str]) -> ShortTermMemory:
+    # Existing memory for the session, or a new one; without a session id
+    # the request gets its own memory that is never stored or shared
+    if not session_id:
+        return ShortTermMemory()
+    return SESSION_STORE.get(session_id)
+
+
+def save_session_memory(session_id: Optional[str], memory: ShortTermMemory):
+    if session_id:
+        SESSION_STORE.save(session_id, memory)
+
+
+# ------------------------------------------------
+# METRICS
+# ------------------------------------------------
+@backend.get("/metrics")
+def metrics():
+    return {
+        "sessions": SESSION_STORE.get_stats(),
+        "imd_weather_cache": station_weather_cache.get_stats(),
+        "routing": routing_policy.get_stats(),
+        "query_rewrite": rewrite_policy.get_stats(),
+        "evaluation": evaluation_policy.get_stats(),
+        "speculation": dict(speculation_stats)
+    }
+
+
 # ------------------------------------------------
 # SERVER STARTER
 # ------------------------------------------------
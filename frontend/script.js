@@ -69,6 +69,8 @@ function addMessage(content, sender, cards = [], save = true) {
   chatBox.scrollTop = chatBox.scrollHeight;
 
   if (save && currentChatId) saveMessageToDB(content, sender, cards);
+
+  return bubble;
 }
 
 function createPropertyCard(card) {
@@ -182,27 +184,7 @@ async function aiResponse(userMsg) {
   showTypingIndicator();
 
   try {
-    const response = await fetch(`${API_BASE_URL}/chat`, {
-      method: "POST",
-      headers: {
-        "Content-Type": "application/json",
-      },
-      body: JSON.stringify({
-        query: userMsg,
-        session_id: SESSION_ID
-      }),
-    });
-
-    if (!response.ok) {
-      throw new Error(`HTTP error! status: ${response.status}`);
-    }
-
-    const data = await response.json();
-    removeTypingIndicator();
-
-    // Display AI response WITHOUT cards - only show text summary
-    addMessage(data.answer, "ai", []);
-
+    await streamResponse(userMsg);
   } catch (error) {
     removeTypingIndicator();
     console.error("Error calling backend:", error);
@@ -213,6 +195,108 @@ async function aiResponse(userMsg) {
   }
 }
 
+// ---------- Streaming (Server-Sent Events over POST) ----------
+const STAGE_LABELS = {
+  rewrite: "Understanding your question…",
+  router: "Choosing the right source…",
+  speculate: "Understanding your question…",
+  retrieval: "Documents retrieved, writing answer…",
+  weather: "Fetching IMD weather data…",
+  rag: "Searching disaster reports…",
+  evaluator: "Checking answer quality…"
+};
+
+function setTypingStatus(text) {
+  const indicator = document.getElementById("typing-indicator");
+  if (!indicator) return;
+
+  let status = indicator.querySelector(".typing-status");
+  if (!status) {
+    status = document.createElement("div");
+    status.classList.add("typing-status");
+    indicator.appendChild(status);
+  }
+  status.textContent = text;
+}
+
+async function streamResponse(userMsg) {
+  const response = await fetch(`${API_BASE_URL}/chat/stream`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      "Accept": "text/event-stream",
+    },
+    body: JSON.stringify({
+      query: userMsg,
+      session_id: SESSION_ID
+    }),
+  });
+
+  if (!response.ok || !response.body) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let bubble = null;
+  let finished = false;
+
+  const handleEvent = (event, data) => {
+    if (event === "stage") {
+      const label = STAGE_LABELS[data.stage];
+      if (label) setTypingStatus(label);
+    } else if (event === "token") {
+      // First token: swap the typing indicator for a live bubble
+      if (!bubble) {
+        removeTypingIndicator();
+        bubble = addMessage("", "ai", [], false);
+      }
+      bubble.textContent += data.text;
+      chatBox.scrollTop = chatBox.scrollHeight;
+    } else if (event === "done") {
+      finished = true;
+      removeTypingIndicator();
+      // Final answer is authoritative (evaluator may have improved it)
+      if (!bubble) {
+        addMessage(data.answer, "ai", []);
+      } else {
+        bubble.textContent = data.answer;
+        if (currentChatId) saveMessageToDB(data.answer, "ai");
+      }
+    } else if (event === "error") {
+      throw new Error(data.error);
+    }
+  };
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+
+    buffer += decoder.decode(value, { stream: true });
+
+    // SSE frames are separated by a blank line
+    let sep;
+    while ((sep = buffer.indexOf("\n\n")) !== -1) {
+      const frame = buffer.slice(0, sep);
+      buffer = buffer.slice(sep + 2);
+
+      let event = "message";
+      let data = "";
+      frame.split("\n").forEach(line => {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+      });
+
+      if (data) handleEvent(event, JSON.parse(data));
+    }
+  }
+
+  if (!finished) {
+    throw new Error("Stream ended before the answer was complete");
+  }
+}
+
 function sendMessage() {
   const text = userInput.value.trim();
   if (!text) return;
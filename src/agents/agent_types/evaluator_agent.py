@@ -2,21 +2,26 @@
 EvaluatorAgent (LangGraph node)
 - Receives state containing:
     state["query"]           : original user query
-    state["plan"]            : planner output (dict)
+    state["plan"]            : planner output (dict, optional)
     state["selected_agent"]  : agent that executed
     state["agent_response"]  : response produced by that agent
+    state["retrieval"]       : {"query", "context"} the RAGAgent answered from (optional)
 
 - Responsibilities:
   1) Score/approve planner decision if needed (simple check)
   2) Evaluate answer quality (accuracy / hallucination risk / completeness)
   3) If evaluation suggests improvement and web_search or rag tool available,
      optionally call them to augment/improve the answer, and return improved_answer.
+     RAG improvements reuse state["retrieval"] instead of querying again.
 - Output stored in state["evaluation"]
 """
 
 from langchain_groq import ChatGroq
 import json
 import re
+import threading
+
+from agents.tools.rag_tool import RAGTool
 
 class EvaluatorAgent:
     def __init__(self, llm=None, tools: dict = None, auto_improve_confidence: float = 0.75):
@@ -25,20 +30,149 @@ class EvaluatorAgent:
         # if planner confidence < this, evaluator is stricter
         self.auto_improve_confidence = auto_improve_confidence
 
+        self._lock = threading.Lock()
+        self.stats = {
+            "evaluations": 0,
+            "improvements": 0,
+            "retrievals_reused": 0,   # = embedding + Chroma calls saved
+            "retrievals_run": 0,
+        }
+
     def __call__(self, state: dict):
+        query, selected_agent, agent_response, planner = self._read_state(state)
+
+        # 2) LLM-based evaluation of the agent's response quality
+        try:
+            resp = self.llm.invoke(self._evaluation_messages(query, selected_agent, agent_response))
+            eval_json = self._parse_evaluation(resp.content)
+        except Exception as e:
+            eval_json = {"score": 0.5, "issues": [f"Evaluator LLM error: {str(e)}"], "suggestion": "Evaluator LLM error"}
+
+        result = self._build_result(eval_json, planner)
+        self._count("evaluations")
+
+        # 3) AUTO-IMPROVE: If not approved or score low + web_search available, try to improve
+        if self._needs_improvement(result):
+            improved_text = None
+            augmentation_note = None
+            issues = result["issues"]
+
+            # Prefer RAG when query is historical/knowledge and tool exists
+            if planner["planner_agent"] == "rag" and "rag" in self.tools:
+                try:
+                    # Context the RAGAgent answered from; retrieve only if absent
+                    docs = self._reused_context(state)
+                    if docs is None:
+                        self._count("retrievals_run")
+                        docs = self.tools["rag"].invoke({"query": self._retrieval_query(state), "k": 5})
+                    augmentation_note = "RAG augmentation used"
+                    improved_resp = self.llm.invoke(self._rag_improve_messages(docs, agent_response))
+                    improved_text = improved_resp.content
+
+                except Exception as e:
+                    issues.append(f"RAG augmentation failed: {str(e)}")
+
+            # Otherwise use web search if available
+            elif "web_search" in self.tools:
+                try:
+                    search_output = self.tools["web_search"].invoke({"query": query})
+                    augmentation_note = "WebSearch augmentation used"
+                    improved_resp = self.llm.invoke(self._web_improve_messages(search_output, agent_response))
+                    improved_text = improved_resp.content
+
+                except Exception as e:
+                    issues.append(f"WebSearch augmentation failed: {str(e)}")
+
+            self._apply_improvement(result, improved_text, augmentation_note)
+            if improved_text:
+                self._count("improvements")
+
+        # Save evaluation into state
+        return {"evaluation": result}
+
+    async def acall(self, state: dict):
+        """
+        Async version of __call__ (LLM calls and tools via .ainvoke).
+        """
+        query, selected_agent, agent_response, planner = self._read_state(state)
+
+        try:
+            resp = await self.llm.ainvoke(self._evaluation_messages(query, selected_agent, agent_response))
+            eval_json = self._parse_evaluation(resp.content)
+        except Exception as e:
+            eval_json = {"score": 0.5, "issues": [f"Evaluator LLM error: {str(e)}"], "suggestion": "Evaluator LLM error"}
+
+        result = self._build_result(eval_json, planner)
+        self._count("evaluations")
+
+        if self._needs_improvement(result):
+            improved_text = None
+            augmentation_note = None
+            issues = result["issues"]
+
+            if planner["planner_agent"] == "rag" and "rag" in self.tools:
+                try:
+                    docs = self._reused_context(state)
+                    if docs is None:
+                        self._count("retrievals_run")
+                        docs = await self.tools["rag"].ainvoke({"query": self._retrieval_query(state), "k": 5})
+                    augmentation_note = "RAG augmentation used"
+                    improved_resp = await self.llm.ainvoke(self._rag_improve_messages(docs, agent_response))
+                    improved_text = improved_resp.content
+
+                except Exception as e:
+                    issues.append(f"RAG augmentation failed: {str(e)}")
+
+            elif "web_search" in self.tools:
+                try:
+                    search_output = await self.tools["web_search"].ainvoke({"query": query})
+                    augmentation_note = "WebSearch augmentation used"
+                    improved_resp = await self.llm.ainvoke(self._web_improve_messages(search_output, agent_response))
+                    improved_text = improved_resp.content
+
+                except Exception as e:
+                    issues.append(f"WebSearch augmentation failed: {str(e)}")
+
+            self._apply_improvement(result, improved_text, augmentation_note)
+            if improved_text:
+                self._count("improvements")
+
+        return {"evaluation": result}
+
+    # ==========================================
+    # HELPERS (shared by sync + async paths)
+    # ==========================================
+
+    @staticmethod
+    def _read_state(state: dict):
         query = state.get("query", "")
         plan = state.get("plan", {}) or {}
         selected_agent = state.get("selected_agent")
         agent_response = state.get("agent_response", "")
 
-        # 1) Basic planner approval check
-        planner_conf = float(plan.get("confidence", 0.0))
-        planner_agent = plan.get("next_agent", "general")
+        # 1) Basic planner approval check. The workflow routes with
+        #    RoutingPolicy and has no planner: no plan → trust the route.
+        if plan:
+            planner_conf = float(plan.get("confidence", 0.0))
+            planner_agent = plan.get("next_agent", selected_agent or "general")
+            planner_ok = planner_conf >= 0.6  # threshold for trust
+            planner_note = "approved" if planner_ok else "low_confidence"
+        else:
+            planner_conf = None
+            planner_agent = selected_agent or "general"
+            planner_ok = True
+            planner_note = "no_plan"
 
-        planner_ok = planner_conf >= 0.6  # threshold for trust
-        planner_note = "approved" if planner_ok else "low_confidence"
+        planner = {
+            "planner_agent": planner_agent,
+            "planner_confidence": planner_conf,
+            "planner_note": planner_note,
+            "planner_ok": planner_ok
+        }
+        return query, selected_agent, agent_response, planner
 
-        # 2) LLM-based evaluation of the agent's response quality
+    @staticmethod
+    def _evaluation_messages(query, selected_agent, agent_response) -> list:
         system_prompt = (
             "You are an evaluator. Score the assistant's answer on three aspects: "
             "factuality (does it contradict known context), "
@@ -54,85 +188,94 @@ class EvaluatorAgent:
             "Evaluate and return JSON."
         )
 
-        try:
-            resp = self.llm.invoke([
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ])
-            eval_json = {}
-            try:
-                eval_json = json.loads(resp.content)
-            except Exception:
-                # If LLM doesn't return strict JSON, do fuzzy parsing
-                # We'll set a default evaluation
-                eval_json = {"score": 0.7, "issues": [], "suggestion": "No strict JSON from LLM; default 0.7"}
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
 
-        except Exception as e:
-            eval_json = {"score": 0.5, "issues": [f"Evaluator LLM error: {str(e)}"], "suggestion": "Evaluator LLM error"}
+    @staticmethod
+    def _parse_evaluation(content: str) -> dict:
+        try:
+            return json.loads(content)
+        except Exception:
+            # If LLM doesn't return strict JSON, do fuzzy parsing
+            # We'll set a default evaluation
+            return {"score": 0.7, "issues": [], "suggestion": "No strict JSON from LLM; default 0.7"}
 
+    @staticmethod
+    def _build_result(eval_json: dict, planner: dict) -> dict:
         score = float(eval_json.get("score", 0.0))
         issues = eval_json.get("issues", [])
         suggestion = eval_json.get("suggestion", "")
 
-        approved = (score >= 0.7) and planner_ok
+        approved = (score >= 0.7) and planner["planner_ok"]
 
-        result = {
+        return {
             "approved": approved,
             "score": score,
             "issues": issues,
             "suggestion": suggestion,
-            "planner_check": {"planner_agent": planner_agent, "planner_confidence": planner_conf, "planner_note": planner_note}
+            "planner_check": {
+                "planner_agent": planner["planner_agent"],
+                "planner_confidence": planner["planner_confidence"],
+                "planner_note": planner["planner_note"]
+            }
         }
 
-        # 3) AUTO-IMPROVE: If not approved or score low + web_search available, try to improve
-        if (not approved or score < self.auto_improve_confidence) and ("web_search" in self.tools or "rag" in self.tools):
-            # Decide which augmentation to use
-            improved_text = None
-            augmentation_note = None
+    def _reused_context(self, state: dict):
+        """Retrieved context already in state for this turn, or None."""
+        retrieval = state.get("retrieval") or {}
+        context = retrieval.get("context")
+        if not context or retrieval.get("query") != self._retrieval_query(state):
+            return None
 
-            # Prefer RAG when query is historical/knowledge and tool exists
-            if planner_agent == "rag" and "rag" in self.tools:
-                try:
-                    # call rag tool to fetch better context
-                    docs = self.tools["rag"].execute(query=query, k=5)
-                    augmentation_note = "RAG augmentation used"
-                    # simple concat improvement: ask LLM to rewrite using docs
-                    context = "\n\n".join([d.get("content","") for d in docs if isinstance(d, dict)])
-                    improve_prompt = (
-                        "Rewrite and improve the previous answer using the context below. "
-                        "Be concise and cite filenames/pages if available.\n\n"
-                        f"Context:\n{context}\n\n"
-                        f"Original answer:\n{agent_response}"
-                    )
-                    improved_resp = self.llm.invoke([{"role":"user","content":improve_prompt}])
-                    improved_text = improved_resp.content
+        self._count("retrievals_reused")
+        return context
 
-                except Exception as e:
-                    issues.append(f"RAG augmentation failed: {str(e)}")
+    @staticmethod
+    def _retrieval_query(state: dict) -> str:
+        # The RAGAgent retrieves for the rewritten query
+        return state.get("rewritten_query") or state.get("query", "")
 
-            # Otherwise use web search if available
-            elif "web_search" in self.tools:
-                try:
-                    search_output = self.tools["web_search"].execute(query=query)
-                    augmentation_note = "WebSearch augmentation used"
-                    improve_prompt = (
-                        "Using the search snippets below, improve the original answer. "
-                        "If snippets contradict the original answer, prefer factual snippets and correct the response.\n\n"
-                        f"Snippets:\n{search_output}\n\nOriginal answer:\n{agent_response}"
-                    )
-                    improved_resp = self.llm.invoke([{"role":"user","content":improve_prompt}])
-                    improved_text = improved_resp.content
+    def _needs_improvement(self, result: dict) -> bool:
+        low_quality = not result["approved"] or result["score"] < self.auto_improve_confidence
+        return low_quality and ("web_search" in self.tools or "rag" in self.tools)
 
-                except Exception as e:
-                    issues.append(f"WebSearch augmentation failed: {str(e)}")
+    @staticmethod
+    def _rag_improve_messages(docs, agent_response) -> list:
+        # simple concat improvement: ask LLM to rewrite using docs (RetrievedChunk list)
+        context = RAGTool.pack_documents(docs).text
+        improve_prompt = (
+            "Rewrite and improve the previous answer using the context below. "
+            "Be concise and cite filenames/pages if available.\n\n"
+            f"Context:\n{context}\n\n"
+            f"Original answer:\n{agent_response}"
+        )
+        return [{"role":"user","content":improve_prompt}]
 
-            # If improved_text found, update result
-            if improved_text:
-                result["improved_answer"] = improved_text
-                result["augmentation"] = augmentation_note
-                result["approved_after_improve"] = True
-            else:
-                result["approved_after_improve"] = False
+    @staticmethod
+    def _web_improve_messages(search_output, agent_response) -> list:
+        improve_prompt = (
+            "Using the search snippets below, improve the original answer. "
+            "If snippets contradict the original answer, prefer factual snippets and correct the response.\n\n"
+            f"Snippets:\n{search_output}\n\nOriginal answer:\n{agent_response}"
+        )
+        return [{"role":"user","content":improve_prompt}]
 
-        # Save evaluation into state
-        return {"evaluation": result}
+    @staticmethod
+    def _apply_improvement(result: dict, improved_text, augmentation_note) -> None:
+        # If improved_text found, update result
+        if improved_text:
+            result["improved_answer"] = improved_text
+            result["augmentation"] = augmentation_note
+            result["approved_after_improve"] = True
+        else:
+            result["approved_after_improve"] = False
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(self.stats)
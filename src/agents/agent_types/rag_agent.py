@@ -1,4 +1,7 @@
+from langchain_core.callbacks import adispatch_custom_event
+
 from agents.base_agent import BaseAgent
+from agents.tools.rag_tool import RAGTool
 
 
 class RAGAgent(BaseAgent):
@@ -7,35 +10,87 @@ class RAGAgent(BaseAgent):
     Uses vector DB → retrieved chunks → answers via GROQ LLM.
     """
 
-    def __init__(self, llm_client=None, tools=None):
+    def __init__(self, llm_client=None, tools=None, context_token_budget: int = None):
         super().__init__(name="RAGAgent", llm_client=llm_client, tools=tools)
+        # None → RAG_CONTEXT_TOKENS
+        self.context_token_budget = context_token_budget
+
+    def run(self, query: str, metadata: dict = None, retrieved: list = None, query_embedding=None):
+        # 1) Tool → Retriever (list of RetrievedChunk), unless the caller
+        #    already retrieved for this query (speculative mode).
+        #    query_embedding (from the semantic router) skips re-embedding.
+        if retrieved is None:
+            try:
+                retrieved = self.use_tool("rag", query=query, k=5, query_embedding=query_embedding)
+            except Exception as e:
+                return self._retrieval_error(e)
 
-    def run(self, query: str, metadata: dict = None):
-        # 1) Tool → Retriever (returns formatted string)
+        failed = self._check_retrieval(retrieved)
+        if failed:
+            return failed
+
+        # 2) Ask LLM with the token-budgeted context
+        packed = RAGTool.pack_documents(retrieved, self.context_token_budget)
         try:
-            retrieved_text = self.use_tool("rag", query=query, k=5)
-            
-            # Check if it's an error
-            if "error" in retrieved_text.lower():
-                return {
-                    "agent": "rag",
-                    "answer": "RAG Tool failed to retrieve relevant information.",
-                    "reason": retrieved_text,
-                    "context_used": 0
-                }
-            
-            # Use the formatted text directly as context
-            context = retrieved_text
+            llm_response = self.ask_llm(self._build_messages(packed.text, query), model="llama-3.1-8b-instant")
+        except Exception as e:
+            llm_response = f"LLM error: {str(e)}"
+
+        return self._build_result(llm_response, retrieved, packed, metadata)
+
+    async def arun(self, query: str, metadata: dict = None, config: dict = None,
+                   retrieved: list = None, query_embedding=None):
+        """
+        Async version of run() (non-blocking retrieval + LLM call).
 
+        With a LangChain config, emits a "retrieval_done" custom event and
+        lets the answer tokens stream to astream_events() consumers.
+        """
+        if retrieved is None:
+            try:
+                retrieved = await self.ause_tool("rag", query=query, k=5, query_embedding=query_embedding)
+            except Exception as e:
+                return self._retrieval_error(e)
+
+        failed = self._check_retrieval(retrieved)
+        if failed:
+            return failed
+
+        if config is not None:
+            await adispatch_custom_event(
+                "retrieval_done",
+                {"documents": len(retrieved)},
+                config=config
+            )
+
+        packed = RAGTool.pack_documents(retrieved, self.context_token_budget)
+        try:
+            llm_response = await self.aask_llm(
+                self._build_messages(packed.text, query),
+                model="llama-3.1-8b-instant",
+                config=config
+            )
         except Exception as e:
-            return {
-                "agent": "rag",
-                "answer": f"RAG retrieval error: {str(e)}",
-                "context_used": 0
-            }
+            llm_response = f"LLM error: {str(e)}"
 
-        # 2) Ask LLM
-        messages = [
+        return self._build_result(llm_response, retrieved, packed, metadata)
+
+    # =========================================
+    # HELPERS
+    # =========================================
+
+    def _check_retrieval(self, retrieved):
+        """Failure result, or None if there are chunks to answer from."""
+        # use_tool() reports tool exceptions as text
+        if isinstance(retrieved, str):
+            return self._retrieval_failed(retrieved)
+        if not retrieved:
+            return self._retrieval_failed("No relevant documents found")
+        return None
+
+    @staticmethod
+    def _build_messages(context: str, query: str) -> list:
+        return [
             {
                 "role": "system",
                 "content": (
@@ -50,15 +105,31 @@ class RAGAgent(BaseAgent):
             }
         ]
 
-        try:
-            llm_response = self.ask_llm(messages, model="llama-3.1-8b-instant")
-        except Exception as e:
-            llm_response = f"LLM error: {str(e)}"
-
+    @staticmethod
+    def _build_result(llm_response: str, chunks: list, packed, metadata: dict = None) -> dict:
         return {
             "agent": "rag",
             "answer": llm_response,
-            "context_used": context.count("Document"),  # Count how many docs
-            "raw_context": context[:500] + "...",  # Preview
+            "context_used": len(packed.chunks),
+            "context_tokens": packed.tokens,
+            "tokens_saved": packed.tokens_saved,
+            "sources": [{"file": c.file, "page": c.page} for c in packed.chunks],
+            "context": chunks,  # Reused by the evaluator
             "metadata": metadata or {}
-        }
\ No newline at end of file
+        }
+    @staticmethod
+    def _retrieval_failed(reason: str) -> dict:
+        return {
+            "agent": "rag",
+            "answer": "RAG Tool failed to retrieve relevant information.",
+            "reason": reason,
+            "context_used": 0
+        }
+
+    @staticmethod
+    def _retrieval_error(e: Exception) -> dict:
+        return {
+            "agent": "rag",
+            "answer": f"RAG retrieval error: {str(e)}",
+            "context_used": 0
+        }
@@ -50,6 +50,29 @@ class UserQueryAgent:
             "selected_agent": "user_query"
         }
     
+    async def acall(self, state, config=None):
+        """
+        Async LangGraph node handler (same contract as __call__).
+        
+        Args:
+            state: Dict with "query" key
+            config: Optional LangChain config (enables token streaming)
+        """
+        query = state.get("query", "")
+        
+        if not query:
+            return {
+                "agent_response": "I didn't receive a query. Please ask me something!",
+                "selected_agent": "user_query"
+            }
+        
+        response = await self._aget_llm_response(query, config)
+        
+        return {
+            "agent_response": response,
+            "selected_agent": "user_query"
+        }
+    
     def run(self, query: str, metadata: dict = None):
         """
         Direct execution method (for non-LangGraph usage).
@@ -79,6 +102,24 @@ class UserQueryAgent:
         Returns:
             LLM-generated response
         """
+        try:
+            llm_output = self.llm.invoke(self._build_messages(query))
+            return llm_output.content
+        
+        except Exception as e:
+            return f"I encountered an error processing your request: {str(e)}"
+
+    async def _aget_llm_response(self, query: str, config=None) -> str:
+        """Async version of _get_llm_response()."""
+        try:
+            llm_output = await self.llm.ainvoke(self._build_messages(query), config=config)
+            return llm_output.content
+        
+        except Exception as e:
+            return f"I encountered an error processing your request: {str(e)}"
+
+    @staticmethod
+    def _build_messages(query: str) -> list:
         system_prompt = (
             "You are a helpful assistant for Odisha disaster management. "
             "Provide clear, concise, and accurate information. "
@@ -87,17 +128,10 @@ class UserQueryAgent:
             "ask more specifically so the system can use real-time tools."
         )
         
-        messages = [
+        return [
             SystemMessage(content=system_prompt),
             HumanMessage(content=query)
         ]
-        
-        try:
-            llm_output = self.llm.invoke(messages)
-            return llm_output.content
-        
-        except Exception as e:
-            return f"I encountered an error processing your request: {str(e)}"
 
     def __str__(self):
         return "UserQueryAgent (General Fallback)"
\ No newline at end of file
@@ -1,5 +1,6 @@
 from langgraph.prebuilt import ToolNode
 from langchain_groq import ChatGroq
+import asyncio
 import json
 
 
@@ -17,6 +18,39 @@ class WeatherAgent:
         self.llm = ChatGroq(model="llama-3.1-8b-instant")
 
     def __call__(self, state):
+        gathered = self._gather(state)
+        if "response" in gathered:
+            return gathered
+
+        try:
+            summary = self.llm.invoke(self._summary_prompt(state, **gathered)).content
+            return {"response": summary}
+        except:
+            return {"response": json.dumps(gathered["weather_data"], indent=2)}
+
+    async def acall(self, state, config=None):
+        """
+        Async version of __call__.
+
+        IMD scraping / PDF download stay blocking, so they run in a worker
+        thread; the LLM summary is awaited (and streams when the caller
+        passes a streaming-enabled LangChain config).
+        """
+        gathered = await asyncio.to_thread(self._gather, state)
+        if "response" in gathered:
+            return gathered
+
+        try:
+            summary = (await self.llm.ainvoke(self._summary_prompt(state, **gathered), config=config)).content
+            return {"response": summary}
+        except:
+            return {"response": json.dumps(gathered["weather_data"], indent=2)}
+
+    def _gather(self, state):
+        """
+        Steps 0-3: returns {"response": ...} when the answer is final
+        (PDF bulletin or error), else the data needed for the LLM summary.
+        """
         query = state["query"].lower()
 
         # ---------------------------
@@ -73,10 +107,14 @@ class WeatherAgent:
         if "error" in weather_data:
             return {"response": f"❌ IMD Scraper Error: {weather_data['error']}"}
 
-        # ---------------------------
-        # STEP 4 — LLM SUMMARY
-        # ---------------------------
-        prompt = f"""
+        return {"location": location, "station_id": station_id, "weather_data": weather_data}
+
+    # ---------------------------
+    # STEP 4 — LLM SUMMARY
+    # ---------------------------
+    @staticmethod
+    def _summary_prompt(state, location, station_id, weather_data):
+        return f"""
 You are an expert IMD forecaster. Summarize the weather conditions based on this data.
 
 Location: {location}
@@ -89,9 +127,3 @@ User Query: "{state['query']}"
 
 Write a simple, accurate 4–6 sentence weather summary.
 """
-
-        try:
-            summary = self.llm.invoke(prompt).content
-            return {"response": summary}
-        except:
-            return {"response": json.dumps(weather_data, indent=2)}
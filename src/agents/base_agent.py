@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Any, Dict, Optional
 
@@ -99,6 +100,29 @@ class BaseAgent(ABC):
         except Exception as e:
             return f"[Tool Error in {self.name}] {tool_name}: {str(e)}"
 
+    async def ause_tool(self, tool_name: str, **kwargs) -> Any:
+        """
+        Async version of use_tool().
+        
+        Awaits .ainvoke() when the tool provides it; otherwise runs the
+        sync call in a worker thread.
+        """
+        tool = self.tools.get(tool_name)
+
+        if not tool:
+            raise ValueError(
+                f"[{self.name}] Tool '{tool_name}' not found. "
+                f"Available tools: {list(self.tools.keys())}"
+            )
+
+        if not hasattr(tool, "ainvoke"):
+            return await asyncio.to_thread(self.use_tool, tool_name, **kwargs)
+
+        try:
+            return await tool.ainvoke(kwargs)
+        except Exception as e:
+            return f"[Tool Error in {self.name}] {tool_name}: {str(e)}"
+
     # =========================================
     # UNIVERSAL LLM CALL FOR ALL AGENTS
     # =========================================
@@ -137,30 +161,69 @@ class BaseAgent(ABC):
             )
 
         try:
-            # LangChain LLM.invoke() expects list of message objects
-            # Convert dict format to LangChain format if needed
-            from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
-            
-            formatted_messages = []
-            for msg in messages:
-                role = msg.get("role", "user")
-                content = msg.get("content", "")
-                
-                if role == "system":
-                    formatted_messages.append(SystemMessage(content=content))
-                elif role == "assistant" or role == "ai":
-                    formatted_messages.append(AIMessage(content=content))
-                else:  # user or default
-                    formatted_messages.append(HumanMessage(content=content))
-            
             # Call LLM using LangChain interface
-            response = self.client.invoke(formatted_messages)
+            response = self.client.invoke(self._to_langchain_messages(messages))
             
             # Extract content from response
             return response.content
 
         except Exception as e:
             return f"[LLM Error in {self.name}] {str(e)}"
+
+    async def aask_llm(
+        self,
+        messages: list,
+        model: str = "mixtral-8x7b-32768",
+        temperature: float = 0.2,
+        config: Optional[Dict] = None
+    ) -> str:
+        """
+        Async version of ask_llm().
+        
+        Uses LangChain .ainvoke() so the event loop is never blocked
+        while waiting on the LLM provider.
+        
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            model: Model name (default: mixtral-8x7b-32768)
+            temperature: Sampling temperature (default: 0.2)
+            config: Optional LangChain RunnableConfig (callbacks), passed
+                through so token streaming works inside LangGraph nodes
+            
+        Returns:
+            LLM response content as string
+        """
+        if not self.client:
+            raise RuntimeError(
+                f"[{self.name}] No LLM client assigned. "
+                f"Pass ChatGroq instance when initializing agent."
+            )
+
+        try:
+            response = await self.client.ainvoke(self._to_langchain_messages(messages), config=config)
+            return response.content
+
+        except Exception as e:
+            return f"[LLM Error in {self.name}] {str(e)}"
+
+    @staticmethod
+    def _to_langchain_messages(messages: list) -> list:
+        """Convert role/content dicts to LangChain message objects."""
+        from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
+        
+        formatted_messages = []
+        for msg in messages:
+            role = msg.get("role", "user")
+            content = msg.get("content", "")
+            
+            if role == "system":
+                formatted_messages.append(SystemMessage(content=content))
+            elif role == "assistant" or role == "ai":
+                formatted_messages.append(AIMessage(content=content))
+            else:  # user or default
+                formatted_messages.append(HumanMessage(content=content))
+        
+        return formatted_messages
     
     # =========================================
     # UTILITY METHODS
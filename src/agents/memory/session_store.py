@@ -0,0 +1,263 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from agents.memory.short_term import ShortTermMemory
+
+
+class InMemorySessionBackend:
+    """
+    Process-local sessions:
+        - LRU eviction once max_sessions is reached
+        - idle TTL expiry (checked on access and by sweep())
+    """
+
+    def __init__(self, max_sessions: int = 10000, idle_ttl: float = 3600):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._sessions = OrderedDict()  # session_id -> (memory, last_access)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, session_id):
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None and now - entry[1] > self.idle_ttl:
+                del self._sessions[session_id]
+                self.stats["expirations"] += 1
+                entry = None
+
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+
+            self._sessions[session_id] = (entry[0], now)
+            self._sessions.move_to_end(session_id)
+            self.stats["hits"] += 1
+            return entry[0]
+
+    def put(self, session_id, memory):
+        with self._lock:
+            self._sessions[session_id] = (memory, time.time())
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def sweep(self):
+        """Drop idle sessions; entries are in last-access order, oldest first."""
+        cutoff = time.time() - self.idle_ttl
+        removed = 0
+        with self._lock:
+            while self._sessions:
+                session_id, (_, last_access) = next(iter(self._sessions.items()))
+                if last_access > cutoff:
+                    break
+                del self._sessions[session_id]
+                removed += 1
+            self.stats["expirations"] += removed
+        return removed
+
+    def size(self):
+        with self._lock:
+            return len(self._sessions)
+
+
+class SQLiteSessionBackend:
+    """
+    Sessions in a SQLite file, so several uvicorn workers (or restarts)
+    share the same conversation history. Same eviction rules as the
+    in-memory backend, but the LRU cap is enforced every
+    `evict_interval` seconds (and by sweep()) instead of on every save,
+    so saves never count the table.
+    """
+
+    def __init__(self, path: str, max_sessions: int = 100000, idle_ttl: float = 3600,
+                 evict_interval: float = 30):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.evict_interval = evict_interval
+        self._lock = threading.Lock()
+        self._last_evict = 0.0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                buffer TEXT NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_sessions_last_access ON sessions(last_access)"
+        )
+        self._conn.commit()
+
+    def get(self, session_id):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT buffer, last_access FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+
+            if row is not None and now - row[1] > self.idle_ttl:
+                self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+                self._conn.commit()
+                self.stats["expirations"] += 1
+                row = None
+
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE sessions SET last_access = ? WHERE session_id = ?", (now, session_id)
+            )
+            self._conn.commit()
+            self.stats["hits"] += 1
+            return ShortTermMemory(json.loads(row[0]))
+
+    def put(self, session_id, memory):
+        with self._lock:
+            now = time.time()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, buffer, last_access) VALUES (?, ?, ?)",
+                (session_id, json.dumps(memory.get()), now),
+            )
+            if now - self._last_evict >= self.evict_interval:
+                self._evict(now)
+            self._conn.commit()
+
+    def delete(self, session_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+
+    def sweep(self):
+        now = time.time()
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM sessions WHERE last_access <= ?", (now - self.idle_ttl,)
+            ).rowcount
+            self._evict(now)
+            self._conn.commit()
+            self.stats["expirations"] += removed
+        return removed
+
+    def size(self):
+        with self._lock:
+            return self._size()
+
+    def _size(self):
+        return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def _evict(self, now):
+        """Trim to max_sessions, least recently used first (caller holds the lock)."""
+        self._last_evict = now
+        overflow = self._size() - self.max_sessions
+        if overflow > 0:
+            removed = self._conn.execute(
+                "DELETE FROM sessions WHERE session_id IN ("
+                "SELECT session_id FROM sessions ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            ).rowcount
+            self.stats["evictions"] += removed
+
+
+class SessionStore:
+    """
+    Bounded per-session ShortTermMemory store used by the backend.
+
+    Usage per request:
+        memory = store.get(session_id)   # existing or new
+        ... run workflow ...
+        store.save(session_id, memory)   # persist + refresh idle timer
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or InMemorySessionBackend()
+        self._stop = threading.Event()
+        self._sweeper = None
+        self.sweeps = 0
+
+    def get(self, session_id) -> ShortTermMemory:
+        memory = self.backend.get(session_id)
+        if memory is None:
+            memory = ShortTermMemory()
+            self.backend.put(session_id, memory)
+        return memory
+
+    def save(self, session_id, memory: ShortTermMemory):
+        self.backend.put(session_id, memory)
+
+    def delete(self, session_id):
+        self.backend.delete(session_id)
+
+    def sweep(self):
+        self.sweeps += 1
+        return self.backend.sweep()
+
+    def start_sweeper(self, interval: float = 60):
+        """Background thread expiring idle sessions every `interval` seconds."""
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+
+        self._stop.clear()
+
+        def _loop():
+            while not self._stop.wait(interval):
+                self.sweep()
+
+        self._sweeper = threading.Thread(target=_loop, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        self._stop.set()
+
+    def get_stats(self):
+        stats = dict(self.backend.stats)
+        stats["active_sessions"] = self.backend.size()
+        stats["sweeps"] = self.sweeps
+        stats["backend"] = self.backend.__class__.__name__
+        return stats
+
+
+def session_store_from_env() -> SessionStore:
+    """
+    SESSION_BACKEND   : memory (default) | sqlite
+    SESSION_MAX       : max sessions before LRU eviction
+    SESSION_IDLE_TTL  : seconds of inactivity before a session expires
+    SESSION_DB_PATH   : SQLite file for the sqlite backend
+    SESSION_EVICT_INTERVAL : seconds between LRU cap checks (sqlite backend)
+    """
+    kind = os.getenv("SESSION_BACKEND", "memory").lower().strip()
+    max_sessions = int(os.getenv("SESSION_MAX", "10000"))
+    idle_ttl = float(os.getenv("SESSION_IDLE_TTL", "3600"))
+
+    if kind == "sqlite":
+        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+        path = os.getenv("SESSION_DB_PATH", os.path.join(project_root, ".cache", "sessions.sqlite3"))
+        return SessionStore(SQLiteSessionBackend(
+            path,
+            max_sessions=max_sessions,
+            idle_ttl=idle_ttl,
+            evict_interval=float(os.getenv("SESSION_EVICT_INTERVAL", "30"))
+        ))
+
+    if kind != "memory":
+        raise ValueError(f"Unknown SESSION_BACKEND '{kind}'. Available: memory, sqlite")
+
+    return SessionStore(InMemorySessionBackend(max_sessions=max_sessions, idle_ttl=idle_ttl))
@@ -6,8 +6,8 @@ class ShortTermMemory:
         - context for LangGraph state
     """
 
-    def __init__(self):
-        self.buffer = []
+    def __init__(self, buffer=None):
+        self.buffer = list(buffer or [])
 
     def add(self, interaction):
         """
@@ -0,0 +1,281 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+
+class EvaluationPolicy:
+    """
+    Decides when and how the EvaluatorAgent runs.
+
+    Modes:
+        off        → never evaluate, the agent answer is returned as-is
+        sampled    → evaluate `sample_rate` of requests, in the background
+        inline     → evaluate before answering (an improved answer replaces
+                     the draft); with a latency budget, evaluations that
+                     overrun it finish in the background instead
+        background → answer immediately, evaluate afterwards
+
+    Background / overrun evaluations can no longer change the answer; their
+    results (and every inline one) are appended to a JSONL log for quality
+    tracking.
+
+    Budgeted inline evaluations run on their own executor, so they never
+    queue behind background work. One that overruns its budget before it
+    started is cancelled; one already running finishes in a background
+    slot. The background queue is bounded: jobs beyond `max_queue`
+    waiting evaluations are dropped (counted + logged).
+    """
+
+    MODES = ("off", "sampled", "inline", "background")
+
+    # Only what the evaluator reads; never hand the live state (memory) to a thread
+    STATE_KEYS = ("query", "rewritten_query", "selected_agent", "agent_response", "plan", "retrieval", "session_id")
+
+    def __init__(self, evaluator, mode: str = "inline", sample_rate: float = 0.1,
+                 latency_budget: float = 0.0, log_path: str = None, max_workers: int = 2,
+                 max_queue: int = 32, inline_workers: int = 8):
+        """
+        Args:
+            evaluator: EvaluatorAgent (sync __call__ + async acall)
+            mode: One of MODES
+            sample_rate: Fraction of requests evaluated in "sampled" mode
+            latency_budget: Max seconds an inline evaluation may add (0 = no limit)
+            log_path: JSONL file for evaluation results (None = don't log)
+            max_workers: Concurrent background evaluations
+            max_queue: Background evaluations allowed to wait for a worker
+            inline_workers: Concurrent budgeted inline evaluations
+                (an overrun keeps its worker until it finishes)
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown evaluation mode '{mode}'. Available: {', '.join(self.MODES)}")
+
+        self.evaluator = evaluator
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.latency_budget = latency_budget
+        self.log_path = log_path
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="evaluator")
+        self._inline_executor = ThreadPoolExecutor(max_workers=inline_workers, thread_name_prefix="evaluator-inline")
+        # Running + waiting background jobs; a full queue drops new ones
+        self._background_slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+
+        if log_path:
+            os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+
+        self.stats = {
+            "requests": 0,
+            "skipped": 0,
+            "inline": 0,
+            "background": 0,
+            "dropped": 0,
+            "budget_exceeded": 0,
+            "completed": 0,
+            "improved_applied": 0,
+            "improved_discarded": 0,
+            "errors": 0,
+            "eval_seconds_total": 0.0,
+        }
+
+    # ==========================================
+    # ENTRY POINTS (SYNC + ASYNC)
+    # ==========================================
+
+    def evaluate(self, state: dict) -> dict:
+        """Returns {"evaluation": {...}}; "improved_answer" only if it may replace the draft."""
+        plan = self._plan()
+        snapshot = self._snapshot(state)
+
+        if plan != "inline":
+            return self._not_inline(plan, snapshot)
+
+        if not self.latency_budget:
+            return self._finish(snapshot, self._timed(self.evaluator, snapshot), applied=True)
+
+        future = self._inline_executor.submit(self._timed, self.evaluator, snapshot)
+        try:
+            return self._finish(snapshot, future.result(timeout=self.latency_budget), applied=True)
+        except FutureTimeout:
+            return self._overrun(snapshot, future)
+
+    async def aevaluate(self, state: dict) -> dict:
+        plan = self._plan()
+        snapshot = self._snapshot(state)
+
+        if plan != "inline":
+            return self._not_inline(plan, snapshot)
+
+        if not self.latency_budget:
+            start = time.perf_counter()
+            try:
+                result = await self.evaluator.acall(snapshot)
+            except Exception as e:
+                result = {"error": str(e)}
+            result["seconds"] = time.perf_counter() - start
+            return self._finish(snapshot, result, applied=True)
+
+        # Budgeted: run in a worker thread so an overrun keeps going after
+        # the graph has returned, without touching the request's event stream
+        future = self._inline_executor.submit(self._timed, self.evaluator, snapshot)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.latency_budget)
+            return self._finish(snapshot, result, applied=True)
+        except asyncio.TimeoutError:
+            return self._overrun(snapshot, future)
+
+    # ==========================================
+    # HELPERS
+    # ==========================================
+
+    def _plan(self) -> str:
+        """What to do for this request: skip, inline or background."""
+        self._count("requests")
+
+        if self.mode == "off":
+            return "skip"
+        if self.mode == "sampled":
+            return "background" if random.random() < self.sample_rate else "skip"
+        return self.mode
+
+    def _snapshot(self, state: dict) -> dict:
+        return {k: state.get(k) for k in self.STATE_KEYS if state.get(k) is not None}
+
+    def _not_inline(self, plan: str, snapshot: dict) -> dict:
+        if plan == "skip":
+            self._count("skipped")
+            return {"evaluation": {"status": "skipped"}}
+
+        if not self._background_slots.acquire(blocking=False):
+            self._count("dropped")
+            print("[EvaluationPolicy] background queue full, evaluation dropped")
+            self._log(snapshot, {}, {"error": "background queue full"}, applied=False, dropped=True)
+            return {"evaluation": {"status": "dropped"}}
+
+        self._count("background")
+        future = self._executor.submit(self._timed, self.evaluator, snapshot)
+        future.add_done_callback(lambda f: self._finish_background(snapshot, f))
+        return {"evaluation": {"status": "background"}}
+
+    def _finish_background(self, snapshot: dict, future):
+        try:
+            self._finish(snapshot, future.result(), applied=False)
+        finally:
+            self._background_slots.release()
+
+    def _overrun(self, snapshot: dict, future) -> dict:
+        """Budget ran out: drop the job if it never started, else let it finish in the background."""
+        self._count("budget_exceeded")
+
+        if future.cancel():
+            return {"evaluation": {"status": "budget_exceeded"}}
+
+        if self._background_slots.acquire(blocking=False):
+            future.add_done_callback(lambda f: self._finish_background(snapshot, f))
+        else:
+            # Can't stop a running evaluation; its result is discarded
+            self._count("dropped")
+            print("[EvaluationPolicy] background queue full, overrun evaluation dropped")
+            self._log(snapshot, {}, {"error": "background queue full"}, applied=False, dropped=True)
+
+        return {"evaluation": {"status": "budget_exceeded"}}
+
+    @staticmethod
+    def _timed(evaluator, snapshot: dict) -> dict:
+        start = time.perf_counter()
+        try:
+            result = evaluator(snapshot)
+        except Exception as e:
+            result = {"error": str(e)}
+        result["seconds"] = time.perf_counter() - start
+        return result
+
+    def _finish(self, snapshot: dict, result: dict, applied: bool) -> dict:
+        """Count + log a finished evaluation; strip the improvement if it came too late."""
+        evaluation = dict(result.get("evaluation") or {})
+        improved = "improved_answer" in evaluation
+
+        with self._lock:
+            if applied:
+                self.stats["inline"] += 1
+            self.stats["completed"] += 1
+            self.stats["eval_seconds_total"] += result.get("seconds", 0.0)
+            if "error" in result:
+                self.stats["errors"] += 1
+            if improved:
+                self.stats["improved_applied" if applied else "improved_discarded"] += 1
+
+        self._log(snapshot, evaluation, result, applied)
+
+        if not applied:
+            evaluation.pop("improved_answer", None)
+        evaluation["status"] = "inline" if applied else "background"
+        return {"evaluation": evaluation}
+
+    def _log(self, snapshot: dict, evaluation: dict, result: dict, applied: bool, dropped: bool = False):
+        if not self.log_path:
+            return
+
+        record = {
+            "ts": time.time(),
+            "mode": self.mode,
+            "applied": applied,
+            "dropped": dropped,
+            "session_id": snapshot.get("session_id"),
+            "query": snapshot.get("query"),
+            "route": snapshot.get("selected_agent"),
+            "score": evaluation.get("score"),
+            "approved": evaluation.get("approved"),
+            "issues": evaluation.get("issues"),
+            "improved": "improved_answer" in evaluation,
+            "seconds": round(result.get("seconds", 0.0), 3),
+            "error": result.get("error"),
+        }
+
+        try:
+            with self._lock, open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        except OSError as e:
+            print(f"[EvaluationPolicy] log write failed: {e}")
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+        total = stats.pop("eval_seconds_total")
+        completed = stats["completed"]
+        stats["avg_eval_seconds"] = round(total / completed, 3) if completed else 0.0
+        stats["mode"] = self.mode
+        if hasattr(self.evaluator, "get_stats"):
+            stats["evaluator"] = self.evaluator.get_stats()
+        return stats
+
+
+def evaluation_policy_from_env(evaluator) -> EvaluationPolicy:
+    """
+    EVALUATION_MODE            : off | sampled | inline (default) | background
+    EVALUATION_SAMPLE_RATE     : fraction evaluated in sampled mode (default 0.1)
+    EVALUATION_LATENCY_BUDGET  : seconds an inline evaluation may take (0 = no limit)
+    EVALUATION_LOG_PATH        : JSONL results log ("" disables)
+    EVALUATION_WORKERS         : concurrent background evaluations (default 2)
+    EVALUATION_MAX_QUEUE       : background evaluations that may wait (default 32)
+    """
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+    log_path = os.getenv("EVALUATION_LOG_PATH", os.path.join(project_root, ".cache", "evaluations.jsonl"))
+
+    return EvaluationPolicy(
+        evaluator,
+        mode=os.getenv("EVALUATION_MODE", "inline").lower().strip(),
+        sample_rate=float(os.getenv("EVALUATION_SAMPLE_RATE", "0.1")),
+        latency_budget=float(os.getenv("EVALUATION_LATENCY_BUDGET", "0")),
+        log_path=log_path or None,
+        max_workers=int(os.getenv("EVALUATION_WORKERS", "2")),
+        max_queue=int(os.getenv("EVALUATION_MAX_QUEUE", "32"))
+    )
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+
+
+class RewritePolicy:
+    """
+    Decides whether a follow-up query needs an LLM rewrite, and performs it.
+
+    Most turns are already self-contained ("weather in Cuttack"), so a cheap
+    pre-classifier runs first:
+        - referential pronouns / demonstratives ("it", "that", "there" ...)
+        - elliptical openers ("and ...", "what about ...", "also ...")
+        - very short fragments ("tomorrow?")
+        - optional `classifier` hook for everything the heuristics pass
+          (none by default: the heuristics alone decide)
+
+    Rewrites that are still needed are cached by (history digest, query).
+    """
+
+    ANAPHORA = {
+        "it", "its", "itself", "they", "them", "their", "theirs",
+        "he", "him", "his", "she", "her", "hers",
+        "this", "that", "these", "those", "there", "then",
+        "same", "such", "former", "latter", "above", "previous", "earlier"
+    }
+
+    ELLIPSIS_OPENERS = (
+        "and", "also", "but", "so", "or", "what about", "how about",
+        "what if", "why", "how come", "more", "else", "again", "instead"
+    )
+
+    MIN_SELF_CONTAINED_TOKENS = 3
+
+    _TOKEN_RE = re.compile(r"[a-z']+")
+
+    def __init__(self, llm, classifier=None, classifier_threshold: float = 0.5,
+                 cache_size: int = 1024, debug: bool = False):
+        """
+        Args:
+            llm: LangChain chat model used for the actual rewrite
+            classifier: Optional callable(query, history) -> probability
+                that the query depends on the conversation
+            classifier_threshold: Probability above which we rewrite
+            cache_size: Max cached rewrites (LRU)
+            debug: Print decisions
+        """
+        self.llm = llm
+        self.classifier = classifier
+        self.classifier_threshold = classifier_threshold
+        self.cache_size = cache_size
+        self.debug = debug
+
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "no_history": 0,
+            "skipped_self_contained": 0,
+            "cache_hits": 0,
+            "llm_calls": 0,
+        }
+
+    # ==========================================
+    # PRE-CLASSIFIER
+    # ==========================================
+
+    def needs_rewrite(self, query: str, history: list) -> bool:
+        """True if the query likely depends on the conversation history."""
+        if not history:
+            return False
+
+        q = " ".join(query.lower().split())
+        tokens = self._TOKEN_RE.findall(q)
+
+        if len(tokens) < self.MIN_SELF_CONTAINED_TOKENS:
+            return True
+
+        if any(t in self.ANAPHORA for t in tokens):
+            return True
+
+        if any(q == opener or q.startswith(opener + " ") for opener in self.ELLIPSIS_OPENERS):
+            return True
+
+        if self.classifier is not None:
+            try:
+                return self.classifier(query, history) >= self.classifier_threshold
+            except Exception as e:
+                if self.debug:
+                    print(f"[RewritePolicy] classifier error: {e}")
+                # Unsure → fall back to rewriting (previous behaviour)
+                return True
+
+        return False
+
+    # ==========================================
+    # REWRITE (SYNC + ASYNC)
+    # ==========================================
+
+    def rewrite(self, query: str, history: list) -> str:
+        final, key = self._precheck(query, history)
+        if key is None:
+            return final
+
+        rewritten = self.llm.invoke(self.build_prompt(history, query)).content.strip()
+        return self._remember(key, rewritten)
+
+    async def arewrite(self, query: str, history: list, config=None) -> str:
+        final, key = self._precheck(query, history)
+        if key is None:
+            return final
+
+        rewritten = (await self.llm.ainvoke(self.build_prompt(history, query), config=config)).content.strip()
+        return self._remember(key, rewritten)
+
+    def _precheck(self, query: str, history: list) -> tuple:
+        """
+        Returns:
+            (final query, None) when no LLM call is needed,
+            (None, cache key) when the caller must rewrite and _remember
+        """
+        if not history:
+            self._count("no_history")
+            return query, None
+
+        if not self.needs_rewrite(query, history):
+            self._count("skipped_self_contained")
+            if self.debug:
+                print(f"[RewritePolicy] self-contained, no rewrite: {query}")
+            return query, None
+
+        key = (self._history_digest(history), " ".join(query.lower().split()))
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                return cached, None
+
+        return None, key
+
+    def _remember(self, key: tuple, rewritten: str) -> str:
+        with self._lock:
+            self.stats["llm_calls"] += 1
+            self._cache[key] = rewritten
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return rewritten
+
+    # ==========================================
+    # HELPERS
+    # ==========================================
+
+    @staticmethod
+    def build_prompt(history: list, query: str) -> str:
+        context = ""
+        for h in history[-3:]:
+            context += f"User: {h['user']}\nAssistant: {h['assistant']}\n"
+
+        return f"""
+You are a query rewriter.
+
+Conversation history:
+{context}
+
+User follow-up question:
+{query}
+
+Rewrite it into a fully self-contained question.
+DO NOT answer. Only rewrite.
+"""
+
+    @staticmethod
+    def _history_digest(history: list) -> str:
+        # Only the turns that go into the prompt matter
+        payload = json.dumps(history[-3:], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+        stats["llm_calls_avoided"] = stats["skipped_self_contained"] + stats["cache_hits"]
+        return stats
@@ -1,4 +1,7 @@
 import re
+import threading
+import time
+from collections import OrderedDict
 
 class RoutingPolicy:
     """
@@ -9,14 +12,36 @@ class RoutingPolicy:
     - calculator → direct calculator execution
     - web_search → direct web search execution  
     - weather → WeatherAgent
-    - disaster → DisasterAgent
     - rag → RAGAgent
     - general → General LLM fallback
+    
+    With a SemanticRouter, the query embedding decides first; the keyword
+    tables and the LLM only handle queries below its confidence margin.
+    
+    Decisions are cached (LRU, keyed by the normalized query) and counted
+    per route, see get_stats().
     """
 
-    def __init__(self, client=None, debug=False):
+    # Every route the workflow graph has an edge for
+    ROUTES = ("calculator", "web_search", "weather", "rag", "general")
+
+    def __init__(self, client=None, debug=False, semantic_router=None, cache_size=1024):
         self.debug = debug
         self.client = client  # Optional LLM fallback
+        self.semantic_router = semantic_router  # Optional embedding router
+
+        # Route-decision cache (0 disables)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # normalized query -> decision (without embedding)
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "decisions": 0,
+            "cache_hits": 0,
+            "llm_fallbacks": 0,
+            "sources": {},
+            "routes": {},
+        }
 
         # ==========================================
         # TOOL DETECTION PATTERNS (highest priority)
@@ -64,21 +89,88 @@ class RoutingPolicy:
             "previous", "last year", "ago"
         ]
 
+        self._compile_keywords()
+
     # ==========================================
     # HELPER METHODS
     # ==========================================
     
-    def _contains(self, query, keywords):
-        """Check if any keyword exists in query"""
-        return any(kw in query for kw in keywords)
+    def _compile_keywords(self):
+        """
+        Compile every keyword table into ONE regex, so a single scan
+        reports all matched categories.
+        
+        - keywords must start at a word boundary (no "ago" in "Chicago")
+        - historical intents must be whole words (no "was" in "Rowasa")
+        - other keywords still match inflections ("cloudy", "reports")
+        - math symbols match anywhere
+        - at one position the longest keyword wins ("previous cyclone"
+          reports rag only, not also the "previous" intent)
+        
+        tests/test_routing_policy.py pins these against the legacy
+        per-keyword substring loops.
+        """
+        tables = {
+            "calculator": self.calculator_keywords,
+            "web_search": self.web_search_keywords,
+            "weather": self.weather_keywords,
+            "rag": self.rag_keywords,
+            "historical": self.historical_intents,
+        }
+        
+        self._keyword_categories = {}
+        for category, keywords in tables.items():
+            for kw in keywords:
+                self._keyword_categories.setdefault(kw, set()).add(category)
+        for sym in self.calculator_symbols:
+            self._keyword_categories.setdefault(sym, set()).add("calculator")
+        
+        words = [t for t in self._keyword_categories if t not in self.calculator_symbols]
+        whole_words = {t for t in words if "historical" in self._keyword_categories[t]}
+        symbols = "".join(re.escape(sym) for sym in self.calculator_symbols)
+        
+        # Keywords are factored into a prefix trie so the regex engine
+        # dispatches on characters instead of trying every keyword
+        self._keyword_re = re.compile(
+            rf"[{symbols}]|\b(?:{self._trie_pattern(words, whole_words)})"
+        )
+    
+    @staticmethod
+    def _trie_pattern(words, whole_words) -> str:
+        """Regex for `words` built from a character trie (longest match first)."""
+        trie = {}
+        for word in words:
+            node = trie
+            for ch in word:
+                node = node.setdefault(ch, {})
+            node[""] = word in whole_words  # terminal marker → needs \b?
+        
+        def build(node) -> str:
+            branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+            if "" in node:
+                end = r"\b" if node[""] else ""
+                if not branches:
+                    return end
+                # Greedy: try longer keywords before ending here
+                if end:
+                    return "(?:" + "|".join(branches + [end]) + ")"
+                return "(?:" + "|".join(branches) + ")?"
+            if len(branches) == 1:
+                return branches[0]
+            return "(?:" + "|".join(branches) + ")"
+        
+        return build(trie)
+    
+    def match_categories(self, query: str) -> set:
+        """All keyword categories present in the (lowercased) query, in one pass."""
+        categories = set()
+        for m in self._keyword_re.finditer(query):
+            categories |= self._keyword_categories[m.group(0)]
+        return categories
     
     def _match_regex(self, query, patterns):
         """Check if any regex pattern matches"""
         return any(re.search(p, query, re.IGNORECASE) for p in patterns)
-    
-    def _has_math_symbols(self, query):
-        """Detect mathematical expressions"""
-        return any(sym in query for sym in self.calculator_symbols)
 
     # ==========================================
     # MAIN ROUTING LOGIC
@@ -95,61 +187,181 @@ class RoutingPolicy:
         - "rag" → RAGAgent
         - "general" → General LLM fallback
         """
+        return self.decide(query)["route"]
+    
+    def decide(self, query: str) -> dict:
+        """
+        Same as route(), with details.
+        
+        Returns:
+            {
+                "route": one of ROUTES,
+                "source": "semantic" | "keyword" | "llm" | "default",
+                "confidence": centroid similarity (semantic only) or None,
+                "embedding": query embedding if one was computed, so
+                             retrieval can reuse it, else None
+                "cached": True if served from the route cache
+            }
+        
+        Cached decisions carry no embedding (too large to keep per entry);
+        retrieval then gets it from the embedding cache instead.
+        """
+        start = time.perf_counter()
+        key = " ".join(query.lower().split())
+        
+        decision = self._cache_get(key)
+        if decision is None:
+            decision = self._decide(query)
+            self._cache_put(key, decision)
+        
+        self._record(decision, (time.perf_counter() - start) * 1000)
+        return decision
+    
+    def _decide(self, query: str) -> dict:
         q = query.lower().strip()
         
         if self.debug:
             print(f"[RoutingPolicy] Analyzing: {q}")
         
+        # ==========================================
+        # PRIORITY 0: SEMANTIC ROUTER (if configured)
+        # ==========================================
+        
+        embedding = None
+        if self.semantic_router is not None:
+            try:
+                semantic = self.semantic_router.classify(query)
+                embedding = semantic["embedding"]
+                
+                if semantic["confident"]:
+                    return self._decision(semantic["route"], "semantic", embedding, semantic["score"])
+                
+                if self.debug:
+                    print(
+                        f"[RoutingPolicy] semantic unsure ({semantic['route']}, "
+                        f"score={semantic['score']:.3f}, margin={semantic['margin']:.3f})"
+                    )
+            except Exception as e:
+                if self.debug:
+                    print(f"[RoutingPolicy] semantic router error: {e}")
+        
+        categories = self.match_categories(q)
+        
         # ==========================================
         # PRIORITY 1: TOOL DETECTION (fastest)
         # ==========================================
         
         # Calculator check
-        if self._has_math_symbols(query) or self._contains(q, self.calculator_keywords):
-            if self.debug:
-                print("[RoutingPolicy] → calculator")
-            return "calculator"
+        if "calculator" in categories:
+            return self._decision("calculator", "keyword", embedding)
         
         # Web search check (live/latest/news)
-        if self._contains(q, self.web_search_keywords):
-            if self.debug:
-                print("[RoutingPolicy] → web_search")
-            return "web_search"
+        if "web_search" in categories:
+            return self._decision("web_search", "keyword", embedding)
         
         # ==========================================
         # PRIORITY 2: AGENT ROUTING (knowledge-based)
         # ==========================================
         
         # RAG check (historical queries)
-        if self._contains(q, self.rag_keywords) or any(word in q for word in self.historical_intents):
-            if self.debug:
-                print("[RoutingPolicy] → rag")
-            return "rag"
+        if "rag" in categories or "historical" in categories:
+            return self._decision("rag", "keyword", embedding)
         
         
         # Weather check (live weather data)
-        if self._contains(q, self.weather_keywords):
-            if self.debug:
-                print("[RoutingPolicy] → weather")
-            return "weather"
+        if "weather" in categories:
+            return self._decision("weather", "keyword", embedding)
         
         # ==========================================
         # PRIORITY 3: LLM FALLBACK (if available)
         # ==========================================
         
         if self.client:
-            llm_route = self.llm_fallback(query)
-            if self.debug:
-                print(f"[RoutingPolicy] → {llm_route} (via LLM)")
-            return llm_route
+            return self._decision(self.llm_fallback(query), "llm", embedding)
         
         # ==========================================
         # DEFAULT: GENERAL FALLBACK
         # ==========================================
         
+        return self._decision("general", "default", embedding)
+    
+    def _decision(self, route, source, embedding=None, confidence=None) -> dict:
         if self.debug:
-            print("[RoutingPolicy] → general (default)")
-        return "general"
+            print(f"[RoutingPolicy] → {route} ({source})")
+        return {"route": route, "source": source, "confidence": confidence, "embedding": embedding, "cached": False}
+
+    # ==========================================
+    # ROUTE CACHE + TELEMETRY
+    # ==========================================
+
+    def _cache_get(self, key: str):
+        if self.cache_size <= 0:
+            return None
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is None:
+                return None
+            self._cache.move_to_end(key)
+        
+        if self.debug:
+            print(f"[RoutingPolicy] → {cached['route']} (cached)")
+        return dict(cached, embedding=None, cached=True)
+
+    def _cache_put(self, key: str, decision: dict):
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._cache[key] = dict(decision, embedding=None)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _record(self, decision: dict, elapsed_ms: float):
+        route, source = decision["route"], decision["source"]
+        with self._lock:
+            self.stats["decisions"] += 1
+            self.stats["sources"][source] = self.stats["sources"].get(source, 0) + 1
+
+            per_route = self.stats["routes"].setdefault(route, {
+                "count": 0,
+                "cache_hits": 0,
+                "llm_fallbacks": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+            })
+            per_route["count"] += 1
+            per_route["total_ms"] += elapsed_ms
+            per_route["max_ms"] = max(per_route["max_ms"], elapsed_ms)
+
+            if decision["cached"]:
+                self.stats["cache_hits"] += 1
+                per_route["cache_hits"] += 1
+            elif source == "llm":
+                self.stats["llm_fallbacks"] += 1
+                per_route["llm_fallbacks"] += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = {
+                "decisions": self.stats["decisions"],
+                "cache_hits": self.stats["cache_hits"],
+                "llm_fallbacks": self.stats["llm_fallbacks"],
+                "cache_size": len(self._cache),
+                "sources": dict(self.stats["sources"]),
+                "routes": {},
+            }
+            for route, r in self.stats["routes"].items():
+                stats["routes"][route] = {
+                    "count": r["count"],
+                    "cache_hits": r["cache_hits"],
+                    "llm_fallbacks": r["llm_fallbacks"],
+                    "avg_ms": round(r["total_ms"] / r["count"], 3),
+                    "max_ms": round(r["max_ms"], 3),
+                }
+        
+        decisions = stats["decisions"]
+        stats["cache_hit_rate"] = round(stats["cache_hits"] / decisions, 3) if decisions else 0.0
+        return stats
 
     # ==========================================
     # OPTIONAL: LLM-BASED ROUTING FOR AMBIGUOUS QUERIES
@@ -161,29 +373,26 @@ class RoutingPolicy:
         Only called if no keyword match found.
         """
         try:
-            response = self.client.chat.completions.create(
-                model="mixtral-8x7b-32768",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are a query classifier. "
-                            "Classify the user query into exactly ONE category: "
-                            "weather, disaster, rag, general. "
-                            "Respond with ONLY the category name, nothing else."
-                        )
-                    },
-                    {"role": "user", "content": query}
-                ],
-                temperature=0.0,
-                max_tokens=10
-            )
-
-            label = response.choices[0].message.content.strip().lower()
+            # LangChain chat model (same client as the rest of the workflow)
+            response = self.client.invoke([
+                (
+                    "system",
+                    "You are a query classifier for an Odisha disaster-management assistant. "
+                    "Classify the user query into exactly ONE category: "
+                    "weather (live weather / forecast), "
+                    "rag (past disasters, reports, policies), "
+                    "web_search (latest news / current events), "
+                    "calculator (arithmetic), "
+                    "general (anything else). "
+                    "Respond with ONLY the category name, nothing else."
+                ),
+                ("human", query)
+            ])
+
+            label = response.content.strip().strip(".'\"").lower()
             
-            # Validate LLM output
-            valid_routes = ["weather", "disaster", "rag", "general"]
-            if label in valid_routes:
+            # Validate LLM output against the graph's routes
+            if label in self.ROUTES:
                 return label
             
             return "general"
@@ -212,4 +421,60 @@ def routing_node(state):
     
     route = policy.route(query)
     
-    return {"route": route}
\ No newline at end of file
+    return {"route": route}
+
+
+# ==========================================
+# MICRO-BENCHMARK: python routing_policy.py
+# ==========================================
+
+if __name__ == "__main__":
+    import timeit
+
+    # _decide(): the matcher itself, without cache / telemetry
+    policy = RoutingPolicy(cache_size=0)
+    cached_policy = RoutingPolicy()
+
+    def legacy_route(query):
+        """Pre-compilation implementation (repeated any(kw in q) scans)."""
+        q = query.lower().strip()
+        if any(sym in query for sym in policy.calculator_symbols) or any(kw in q for kw in policy.calculator_keywords):
+            return "calculator"
+        if any(kw in q for kw in policy.web_search_keywords):
+            return "web_search"
+        if any(kw in q for kw in policy.rag_keywords) or any(word in q for word in policy.historical_intents):
+            return "rag"
+        if any(kw in q for kw in policy.weather_keywords):
+            return "weather"
+        return "general"
+
+    corpus = [
+        "What is the weather in Puri today?",
+        "Will it rain in Cuttack tomorrow",
+        "How much damage did cyclone Fani cause in 2019?",
+        "What happened during Phailin",
+        "Calculate 15% of 2400",
+        "latest news on cyclone warning",
+        "Tell me about OSDMA",
+        "Is Rowasa a village in Khordha district",
+        "coastal warning for fishermen near Paradip",
+        "How many cyclone shelters does Odisha have",
+        "Explain the disaster management policy of Odisha government in detail",
+        "humidity and wind speed in Balasore",
+    ] * 50
+
+    n = 20
+    old = timeit.timeit(lambda: [legacy_route(q) for q in corpus], number=n)
+    new = timeit.timeit(lambda: [policy._decide(q)["route"] for q in corpus], number=n)
+    cached = timeit.timeit(lambda: [cached_policy.route(q) for q in corpus], number=n)
+    total = len(corpus) * n
+
+    print(f"\nRouting {total} queries")
+    print(f"legacy loops : {total / old:>12,.0f} queries/s")
+    print(f"compiled regex: {total / new:>12,.0f} queries/s  ({old / new:.2f}x)")
+    print(f"route() cached: {total / cached:>12,.0f} queries/s  ({old / cached:.2f}x, "
+          f"hit rate {cached_policy.get_stats()['cache_hit_rate']:.1%})")
+
+    changed = [q for q in set(corpus) if legacy_route(q) != policy.route(q)]
+    for q in changed:
+        print(f"  route changed: {q!r}: {legacy_route(q)} → {policy.route(q)}")
@@ -0,0 +1,128 @@
+import threading
+
+import numpy as np
+
+
+class SemanticRouter:
+    """
+    Embedding-based router.
+
+    Each route is represented by the centroid of a handful of example
+    queries. A query is embedded ONCE, compared against all centroids with
+    a single matrix-vector product, and accepted when the best route is
+    both similar enough and clearly ahead of the runner-up.
+
+    The query embedding is returned with the decision so retrieval can
+    reuse it instead of embedding the same text again.
+    """
+
+    ROUTE_EXAMPLES = {
+        "weather": [
+            "What is the weather in Bhubaneswar today?",
+            "Will it rain in Puri tomorrow?",
+            "Current temperature and humidity in Cuttack",
+            "IMD forecast for Balasore this week",
+            "Is there a heatwave in Sambalpur?",
+            "Wind speed and sea conditions near Paradip",
+            "Fishermen warning for the Odisha coast",
+        ],
+        "rag": [
+            "How much damage did cyclone Fani cause in Odisha?",
+            "What lessons were learned from cyclone Phailin?",
+            "Principles of the Odisha disaster management policy",
+            "How many people were evacuated during the 1999 super cyclone?",
+            "Role of OSDMA in cyclone shelter management",
+            "Compensation norms for crop loss after floods in Odisha",
+            "What does the damage and loss assessment report say about housing?",
+        ],
+        "web_search": [
+            "Latest news about the cyclone approaching Odisha",
+            "What is happening in Odisha right now?",
+            "Recent updates on flood relief operations",
+            "Search the web for the newest OSDMA announcement",
+        ],
+        "calculator": [
+            "Calculate 15 percent of 2400",
+            "What is 245 multiplied by 12?",
+            "Divide 9000 by 36",
+        ],
+        "general": [
+            "Hello, who are you?",
+            "What can you help me with?",
+            "Thank you for the information",
+            "Explain what a disaster management plan is",
+            "How should I prepare an emergency kit?",
+        ],
+    }
+
+    def __init__(self, embed_batch, examples: dict = None,
+                 min_score: float = 0.30, min_margin: float = 0.05):
+        """
+        Args:
+            embed_batch: callable(list[str]) -> list[vector]
+                (e.g. DocumentRetriever.embed_batch, which is cached)
+            examples: route -> example queries (default: ROUTE_EXAMPLES)
+            min_score: Minimum cosine similarity to the best centroid
+            min_margin: Minimum lead of the best route over the runner-up
+        """
+        self.embed_batch = embed_batch
+        self.examples = examples or self.ROUTE_EXAMPLES
+        self.min_score = min_score
+        self.min_margin = min_margin
+
+        self.routes = list(self.examples.keys())
+        self.centroids = None  # (n_routes, dim), rows L2-normalized
+        self._lock = threading.Lock()
+
+    def _ensure_centroids(self):
+        """Embed all examples in one batch and build the centroid matrix (lazy, once)."""
+        if self.centroids is not None:
+            return
+
+        with self._lock:
+            if self.centroids is not None:
+                return
+
+            texts, owners = [], []
+            for i, route in enumerate(self.routes):
+                for example in self.examples[route]:
+                    texts.append(example)
+                    owners.append(i)
+
+            vectors = _normalize_rows(np.asarray(self.embed_batch(texts), dtype=np.float32))
+            owners = np.asarray(owners)
+
+            centroids = np.stack([vectors[owners == i].mean(axis=0) for i in range(len(self.routes))])
+            self.centroids = _normalize_rows(centroids)
+
+    def classify(self, query: str, embedding=None) -> dict:
+        """
+        Returns:
+            {"route", "score", "margin", "confident", "embedding"}
+        """
+        self._ensure_centroids()
+
+        if embedding is None:
+            embedding = self.embed_batch([query])[0]
+
+        q = np.asarray(embedding, dtype=np.float32)
+        q = q / (np.linalg.norm(q) or 1.0)
+
+        scores = self.centroids @ q
+        order = np.argsort(scores)[::-1]
+        best = float(scores[order[0]])
+        runner_up = float(scores[order[1]]) if len(order) > 1 else -1.0
+
+        return {
+            "route": self.routes[order[0]],
+            "score": best,
+            "margin": best - runner_up,
+            "confident": best >= self.min_score and (best - runner_up) >= self.min_margin,
+            "embedding": embedding,
+        }
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
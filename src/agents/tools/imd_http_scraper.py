@@ -0,0 +1,213 @@
+"""
+IMD HTTP Scraper - browser-free fetch + parse of IMD city pages
+
+Fetches city.imd.gov.in/citywx/responsive/ with a pooled requests session
+and parses it with lxml, using the same XPaths as the Selenium scraper so
+the JSON schema is identical (only "source" differs: "IMD_HTTP").
+
+If the page carries no parseable weather sections (e.g. the data was
+rendered client-side), ImdParseError is raised so the caller can fall
+back to Selenium. The live page is currently rendered client-side, so
+weather_api only tries this path when IMD_HTTP_FIRST is set.
+
+Parser fixtures live in tests/fixtures/imd/; refresh them with --save.
+"""
+
+import json
+import sys
+from datetime import datetime
+
+import requests
+from lxml import html as lxml_html
+
+
+IMD_CITY_URL = "https://city.imd.gov.in/citywx/responsive/?id={station_id}"
+
+_session = requests.Session()
+_session.headers.update({
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36"
+})
+
+
+class ImdParseError(ValueError):
+    """Raised when the HTML lacks the expected weather sections."""
+
+
+def _text(el) -> str:
+    """Whitespace-normalized text, close to Selenium's element.text."""
+    return " ".join(el.text_content().split())
+
+
+def _first_text(parent, xpath):
+    found = parent.xpath(xpath)
+    return _text(found[0]) if found else None
+
+
+def imd_http_scraper(tool_input: dict) -> str:
+    """
+    Fetch and parse an IMD city page without a browser.
+
+    Input:
+        tool_input = {"station_id": 42971}
+
+    Returns:
+        JSON string in the imd_scraper schema
+
+    Raises:
+        ImdParseError: If the page has no parseable weather data
+        requests.RequestException: On network / HTTP failure
+    """
+    station_id = tool_input.get("station_id")
+    if not station_id:
+        return json.dumps({"error": "station_id missing"})
+
+    url = IMD_CITY_URL.format(station_id=station_id)
+
+    response = _session.get(url, timeout=10)
+    response.raise_for_status()
+
+    return json.dumps(parse_imd_html(response.text, station_id, url))
+
+
+def parse_imd_html(page_html: str, station_id, url: str) -> dict:
+    """
+    Parse IMD responsive city page HTML into the imd_scraper schema.
+
+    Raises:
+        ImdParseError: If neither past-24h nor forecast data is present
+    """
+    tree = lxml_html.fromstring(page_html)
+
+    result = {
+        "station_id": station_id,
+        "url": url,
+        "source": "IMD_HTTP",
+        "scraped_at_utc": datetime.utcnow().isoformat() + "Z",
+        "date_info": {},
+        "past_24_hours": {},
+        "sun_moon": {},
+        "forecast_7_days": []
+    }
+
+    # ------------------------------------------------------------------
+    # 1) DATE INFO  (day name + full date)
+    # ------------------------------------------------------------------
+    date_spans = tree.xpath("//span[contains(text(), ',') and contains(text(),'20')]")
+    if date_spans:
+        result["date_info"] = {
+            "day": _first_text(date_spans[0], "./preceding-sibling::span[1]"),
+            "full_date": _text(date_spans[0])
+        }
+
+    # ------------------------------------------------------------------
+    # 2) PAST 24 HOURS OVERVIEW
+    # ------------------------------------------------------------------
+    li_blocks = tree.xpath("//p[contains(.,'Past 24 Hours Overview')]/following-sibling::ul[1]/li")
+    if li_blocks:
+        past_24 = {
+            "maximum": None,
+            "minimum": None,
+            "rainfall": None,
+            "humidity": None,
+        }
+
+        for li in li_blocks:
+            li_text = _text(li)
+            time_ist = _first_text(li, ".//span")
+            p_text = _first_text(li, ".//p") or ""
+
+            if "Maximum" in li_text or "Minimum" in li_text:
+                parts = p_text.replace("|", " ").split()
+                key = "maximum" if "Maximum" in li_text else "minimum"
+                past_24[key] = {
+                    "value": parts[0] if len(parts) > 0 else None,
+                    "departure": parts[1] if len(parts) > 1 else None,
+                    "time_ist": time_ist
+                }
+
+            elif "Rainfall" in li_text:
+                mm = next((tok for tok in p_text.split() if "mm" in tok), None)
+                past_24["rainfall"] = {
+                    "value": mm,
+                    "time_ist": time_ist
+                }
+
+            elif "Humidity" in li_text:
+                percents = [t for t in p_text.split() if "%" in t]
+                past_24["humidity"] = {
+                    "morning": percents[0] if len(percents) > 0 else None,
+                    "evening": percents[1] if len(percents) > 1 else None
+                }
+
+        result["past_24_hours"] = past_24
+
+    # ------------------------------------------------------------------
+    # 3) SUN & MOON INFO
+    # ------------------------------------------------------------------
+    def get_time_for(label: str):
+        found = tree.xpath(f"//p[contains(text(),'{label}')]")
+        return _first_text(found[0], "./preceding-sibling::h3[1]") if found else None
+
+    result["sun_moon"] = {
+        "sunset_today": get_time_for("Sunset (Today)"),
+        "sunrise_tomorrow": get_time_for("Sunrise (Tomorrow)"),
+        "moonrise": get_time_for("Moonrise"),
+        "moonset": get_time_for("Moonset"),
+    }
+
+    # ------------------------------------------------------------------
+    # 4) 7 DAYS FORECAST
+    # ------------------------------------------------------------------
+    cards = tree.xpath(
+        "//p[contains(.,'7 days forecast')]/following-sibling::div[1]"
+        "//div[contains(@class,'min-h-32')]"
+    )
+    for card in cards:
+        temp_max = temp_min = None
+        h3s = card.xpath(".//h3")
+        if len(h3s) >= 2:
+            num_tokens = _text(h3s[1]).split()
+            if len(num_tokens) >= 2:
+                temp_max, temp_min = num_tokens[0], num_tokens[1]
+
+        hum_max = hum_min = None
+        spans_float = card.xpath(".//span[contains(@class,'float-end')]")
+        if spans_float:
+            hum_tokens = _text(spans_float[-1]).split()
+            if len(hum_tokens) >= 2:
+                hum_max, hum_min = hum_tokens[0], hum_tokens[1]
+
+        result["forecast_7_days"].append({
+            "date": _first_text(card, ".//span[contains(@class,'text-blue-700')]"),
+            "temp_max": temp_max,
+            "temp_min": temp_min,
+            "humidity_max": hum_max,
+            "humidity_min": hum_min,
+            "condition": _first_text(card, ".//p[contains(@class,'text-gray-600')]")
+        })
+
+    if not result["past_24_hours"] and not result["forecast_7_days"]:
+        raise ImdParseError("IMD page has no server-rendered weather data")
+
+    return result
+
+
+# CHECK A SAVED PAGE:  python imd_http_scraper.py saved_page.html [station_id]
+# SAVE THE RAW PAGE:   python imd_http_scraper.py --save saved_page.html [station_id]
+if __name__ == "__main__":
+    save = sys.argv[1] == "--save"
+    args = sys.argv[2:] if save else sys.argv[1:]
+    path = args[0]
+    station = int(args[1]) if len(args) > 1 else 42971
+
+    if save:
+        response = _session.get(IMD_CITY_URL.format(station_id=station), timeout=10)
+        response.raise_for_status()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(response.text)
+        print(f"Saved {len(response.text)} chars to {path}")
+
+    with open(path, encoding="utf-8") as f:
+        parsed = parse_imd_html(f.read(), station, IMD_CITY_URL.format(station_id=station))
+
+    print(json.dumps(parsed, indent=2, ensure_ascii=False))
@@ -1,15 +1,26 @@
+import atexit
 import json
-import time
+import os
+import queue
+import threading
 from datetime import datetime
+from contextlib import contextmanager
 
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
-from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
 
 
+# Elements that mean the JS-rendered sections are on the page
+PAST_24_XPATH = "//p[contains(.,'Past 24 Hours Overview')]/following-sibling::ul/li"
+FORECAST_XPATH = "//p[contains(.,'7 days forecast')]/following-sibling::div//div[contains(@class,'min-h-32')]"
+
+
 def _get_text_or_none(driver, by, value):
     """Safe element text getter."""
     try:
@@ -27,6 +38,118 @@ def _get_child_text_or_none(parent, by, value):
         return None
 
 
+# ======================================================================
+# BROWSER POOL
+# ======================================================================
+
+class BrowserPool:
+    """
+    Long-lived pool of headless Chrome drivers.
+
+    - chromedriver is resolved once (not per call)
+    - each request gets its own fresh tab, closed afterwards
+    - drivers are health-checked on checkout and recycled after
+      `max_uses` requests or on any WebDriver failure
+    """
+
+    def __init__(self, max_size: int = 2, max_uses: int = 50):
+        self.max_size = max_size
+        self.max_uses = max_uses
+
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._driver_path = None
+        self._uses = {}
+
+    def _new_driver(self):
+        with self._lock:
+            if self._driver_path is None:
+                self._driver_path = ChromeDriverManager().install()
+
+        options = Options()
+        options.add_argument("--headless=new")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        # Data is text only: skip images, don't wait for every sub-resource
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.page_load_strategy = "eager"
+
+        driver = webdriver.Chrome(service=Service(self._driver_path), options=options)
+        self._uses[id(driver)] = 0
+        return driver
+
+    @staticmethod
+    def _is_healthy(driver) -> bool:
+        try:
+            driver.execute_script("return 1")
+            return True
+        except WebDriverException:
+            return False
+
+    def _discard(self, driver):
+        self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _checkout(self):
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                return self._new_driver()
+
+            if self._is_healthy(driver):
+                return driver
+            self._discard(driver)
+
+    @contextmanager
+    def page(self):
+        """Yield a driver focused on a fresh tab for one request."""
+        self._slots.acquire()
+        driver = None
+        healthy = False
+        try:
+            driver = self._checkout()
+            base_handle = driver.current_window_handle
+            driver.switch_to.new_window("tab")
+
+            yield driver
+
+            driver.close()
+            driver.switch_to.window(base_handle)
+            healthy = True
+
+        finally:
+            if driver is not None:
+                self._uses[id(driver)] = self._uses.get(id(driver), 0) + 1
+                if healthy and self._uses[id(driver)] < self.max_uses:
+                    self._idle.put(driver)
+                else:
+                    self._discard(driver)
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+browser_pool = BrowserPool(
+    max_size=int(os.getenv("IMD_BROWSER_POOL_SIZE", "2")),
+    max_uses=int(os.getenv("IMD_BROWSER_MAX_USES", "50"))
+)
+atexit.register(browser_pool.close)
+
+# Upper bound for JS rendering; normally returns as soon as the data is present
+PAGE_WAIT_SECONDS = float(os.getenv("IMD_PAGE_WAIT_SECONDS", "8"))
+
+
 def imd_scraper(tool_input: dict) -> str:
     """
     Scrape structured weather data from IMD 'responsive' city page.
@@ -55,245 +178,247 @@ def imd_scraper(tool_input: dict) -> str:
 
     url = f"https://city.imd.gov.in/citywx/responsive/?id={station_id}"
 
-    # ---- set up selenium driver (headless chrome) ----
-    options = Options()
-    options.add_argument("--headless=new")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
+    try:
+        with browser_pool.page() as driver:
+            driver.get(url)
+
+            # wait for the JS-rendered sections instead of a fixed sleep
+            try:
+                WebDriverWait(driver, PAGE_WAIT_SECONDS).until(EC.all_of(
+                    EC.presence_of_element_located((By.XPATH, PAST_24_XPATH)),
+                    EC.presence_of_element_located((By.XPATH, FORECAST_XPATH))
+                ))
+            except TimeoutException:
+                # parse whatever did render; missing sections stay empty
+                pass
 
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
+            return json.dumps(_parse_page(driver, station_id, url))
+
+    except Exception as e:
+        return json.dumps({"error": str(e)})
 
-    try:
-        driver.get(url)
-        # allow JS to load everything
-        time.sleep(4)
-
-        result = {
-            "station_id": station_id,
-            "url": url,
-            "source": "IMD_SELENIUM",
-            "scraped_at_utc": datetime.utcnow().isoformat() + "Z",
-            "date_info": {},
-            "past_24_hours": {},
-            "sun_moon": {},
-            "forecast_7_days": []
-        }
 
-        # ------------------------------------------------------------------
-        # 1) DATE INFO  (day name + full date)
-        # ------------------------------------------------------------------
-        # From your screenshot:
-        # <span>Monday</span>
-        # <span>December 01, 2025</span>
+def _parse_page(driver, station_id, url) -> dict:
+    result = {
+        "station_id": station_id,
+        "url": url,
+        "source": "IMD_SELENIUM",
+        "scraped_at_utc": datetime.utcnow().isoformat() + "Z",
+        "date_info": {},
+        "past_24_hours": {},
+        "sun_moon": {},
+        "forecast_7_days": []
+    }
+
+    # ------------------------------------------------------------------
+    # 1) DATE INFO  (day name + full date)
+    # ------------------------------------------------------------------
+    # From your screenshot:
+    # <span>Monday</span>
+    # <span>December 01, 2025</span>
+    try:
+        date_span = driver.find_element(
+            By.XPATH,
+            "//span[contains(text(), ',') and contains(text(),'20')]"
+        )
+        full_date = date_span.text.strip()
         try:
-            date_span = driver.find_element(
-                By.XPATH,
-                "//span[contains(text(), ',') and contains(text(),'20')]"
+            day_span = date_span.find_element(
+                By.XPATH, "./preceding-sibling::span[1]"
             )
-            full_date = date_span.text.strip()
-            try:
-                day_span = date_span.find_element(
-                    By.XPATH, "./preceding-sibling::span[1]"
-                )
-                day_name = day_span.text.strip()
-            except NoSuchElementException:
-                day_name = None
-
-            result["date_info"] = {
-                "day": day_name,
-                "full_date": full_date
-            }
+            day_name = day_span.text.strip()
         except NoSuchElementException:
-            result["date_info"] = {}
-
-        # ------------------------------------------------------------------
-        # 2) PAST 24 HOURS OVERVIEW
-        # ------------------------------------------------------------------
-        # HTML (simplified):
-        # <p>Weather<br>Past 24 Hours Overview</p>
-        # <ul>
-        #   <li> "Maximum | Dep" ... <span>1730 IST</span> <p>28.2°C | -2.0</p>
-        #   <li> "Minimum | Dep" ... <span>0830 IST</span> <p>16.0°C | 1.2</p>
-        #   <li> "Rainfall" ... <span>0830 IST</span> <p>000.0mm</p>
-        #   <li> "Humidity" ... <span>1730 IST | 0830 IST</span> <p>68% | 66%</p>
-        past_24 = {
-            "maximum": None,
-            "minimum": None,
-            "rainfall": None,
-            "humidity": None,
+            day_name = None
+
+        result["date_info"] = {
+            "day": day_name,
+            "full_date": full_date
         }
+    except NoSuchElementException:
+        result["date_info"] = {}
+
+    # ------------------------------------------------------------------
+    # 2) PAST 24 HOURS OVERVIEW
+    # ------------------------------------------------------------------
+    # HTML (simplified):
+    # <p>Weather<br>Past 24 Hours Overview</p>
+    # <ul>
+    #   <li> "Maximum | Dep" ... <span>1730 IST</span> <p>28.2°C | -2.0</p>
+    #   <li> "Minimum | Dep" ... <span>0830 IST</span> <p>16.0°C | 1.2</p>
+    #   <li> "Rainfall" ... <span>0830 IST</span> <p>000.0mm</p>
+    #   <li> "Humidity" ... <span>1730 IST | 0830 IST</span> <p>68% | 66%</p>
+    past_24 = {
+        "maximum": None,
+        "minimum": None,
+        "rainfall": None,
+        "humidity": None,
+    }
 
-        try:
-            ul = driver.find_element(
-                By.XPATH,
-                "//p[contains(.,'Past 24 Hours Overview')]/following-sibling::ul"
-            )
-            li_blocks = ul.find_elements(By.XPATH, "./li")
-            for li in li_blocks:
-                li_text = li.text
-
-                # MAXIMUM
-                if "Maximum" in li_text:
-                    time_ist = _get_child_text_or_none(li, By.TAG_NAME, "span")
-                    p_text = _get_child_text_or_none(li, By.TAG_NAME, "p") or ""
-                    parts = p_text.replace("|", " ").split()
-                    # e.g. ["28.2°C", "-2.0"]
-                    max_val = parts[0] if len(parts) > 0 else None
-                    max_dep = parts[1] if len(parts) > 1 else None
-                    past_24["maximum"] = {
-                        "value": max_val,
-                        "departure": max_dep,
-                        "time_ist": time_ist
-                    }
-
-                # MINIMUM
-                elif "Minimum" in li_text:
-                    time_ist = _get_child_text_or_none(li, By.TAG_NAME, "span")
-                    p_text = _get_child_text_or_none(li, By.TAG_NAME, "p") or ""
-                    parts = p_text.replace("|", " ").split()
-                    min_val = parts[0] if len(parts) > 0 else None
-                    min_dep = parts[1] if len(parts) > 1 else None
-                    past_24["minimum"] = {
-                        "value": min_val,
-                        "departure": min_dep,
-                        "time_ist": time_ist
-                    }
-
-                # RAINFALL
-                elif "Rainfall" in li_text:
-                    time_ist = _get_child_text_or_none(li, By.TAG_NAME, "span")
-                    p_text = _get_child_text_or_none(li, By.TAG_NAME, "p") or ""
-                    mm = None
-                    for tok in p_text.split():
-                        if "mm" in tok:
-                            mm = tok
-                            break
-                    past_24["rainfall"] = {
-                        "value": mm,
-                        "time_ist": time_ist
-                    }
-
-                # HUMIDITY
-                elif "Humidity" in li_text:
-                    # pattern should contain two % values
-                    p_text = _get_child_text_or_none(li, By.TAG_NAME, "p") or ""
-                    percents = [t for t in p_text.split() if "%" in t]
-                    hum_m = percents[0] if len(percents) > 0 else None
-                    hum_e = percents[1] if len(percents) > 1 else None
-                    past_24["humidity"] = {
-                        "morning": hum_m,
-                        "evening": hum_e
-                    }
-
-            result["past_24_hours"] = past_24
+    try:
+        ul = driver.find_element(
+            By.XPATH,
+            "//p[contains(.,'Past 24 Hours Overview')]/following-sibling::ul"
+        )
+        li_blocks = ul.find_elements(By.XPATH, "./li")
+        for li in li_blocks:
+            li_text = li.text
+
+            # MAXIMUM
+            if "Maximum" in li_text:
+                time_ist = _get_child_text_or_none(li, By.TAG_NAME, "span")
+                p_text = _get_child_text_or_none(li, By.TAG_NAME, "p") or ""
+                parts = p_text.replace("|", " ").split()
+                # e.g. ["28.2°C", "-2.0"]
+                max_val = parts[0] if len(parts) > 0 else None
+                max_dep = parts[1] if len(parts) > 1 else None
+                past_24["maximum"] = {
+                    "value": max_val,
+                    "departure": max_dep,
+                    "time_ist": time_ist
+                }
+
+            # MINIMUM
+            elif "Minimum" in li_text:
+                time_ist = _get_child_text_or_none(li, By.TAG_NAME, "span")
+                p_text = _get_child_text_or_none(li, By.TAG_NAME, "p") or ""
+                parts = p_text.replace("|", " ").split()
+                min_val = parts[0] if len(parts) > 0 else None
+                min_dep = parts[1] if len(parts) > 1 else None
+                past_24["minimum"] = {
+                    "value": min_val,
+                    "departure": min_dep,
+                    "time_ist": time_ist
+                }
+
+            # RAINFALL
+            elif "Rainfall" in li_text:
+                time_ist = _get_child_text_or_none(li, By.TAG_NAME, "span")
+                p_text = _get_child_text_or_none(li, By.TAG_NAME, "p") or ""
+                mm = None
+                for tok in p_text.split():
+                    if "mm" in tok:
+                        mm = tok
+                        break
+                past_24["rainfall"] = {
+                    "value": mm,
+                    "time_ist": time_ist
+                }
+
+            # HUMIDITY
+            elif "Humidity" in li_text:
+                # pattern should contain two % values
+                p_text = _get_child_text_or_none(li, By.TAG_NAME, "p") or ""
+                percents = [t for t in p_text.split() if "%" in t]
+                hum_m = percents[0] if len(percents) > 0 else None
+                hum_e = percents[1] if len(percents) > 1 else None
+                past_24["humidity"] = {
+                    "morning": hum_m,
+                    "evening": hum_e
+                }
+
+        result["past_24_hours"] = past_24
 
+    except NoSuchElementException:
+        # leave defaults (None)
+        pass
+
+    # ------------------------------------------------------------------
+    # 3) SUN & MOON INFO
+    # ------------------------------------------------------------------
+    # From your screenshot:
+    # <h3>17:05</h3><p>Sunset (Today)</p>
+    # <h3>06:05</h3><p>Sunrise (Tomorrow)</p>
+    # <h3>13:16</h3><p>Moonrise</p>
+    # <h3>--:--</h3><p>Moonset</p>  (for example)
+    def get_time_for(label: str):
+        try:
+            p = driver.find_element(By.XPATH, f"//p[contains(text(),'{label}')]")
+            h3 = p.find_element(By.XPATH, "./preceding-sibling::h3[1]")
+            return h3.text.strip()
         except NoSuchElementException:
-            # leave defaults (None)
-            pass
-
-        # ------------------------------------------------------------------
-        # 3) SUN & MOON INFO
-        # ------------------------------------------------------------------
-        # From your screenshot:
-        # <h3>17:05</h3><p>Sunset (Today)</p>
-        # <h3>06:05</h3><p>Sunrise (Tomorrow)</p>
-        # <h3>13:16</h3><p>Moonrise</p>
-        # <h3>--:--</h3><p>Moonset</p>  (for example)
-        def get_time_for(label: str):
+            return None
+
+    sun_moon = {
+        "sunset_today": get_time_for("Sunset (Today)"),
+        "sunrise_tomorrow": get_time_for("Sunrise (Tomorrow)"),
+        "moonrise": get_time_for("Moonrise"),
+        "moonset": get_time_for("Moonset"),
+    }
+    result["sun_moon"] = sun_moon
+
+    # ------------------------------------------------------------------
+    # 4) 7 DAYS FORECAST
+    # ------------------------------------------------------------------
+    # HTML (per card, simplified):
+    # <div class="min-h-32 ...">
+    #   <span>1-DEC</span>
+    #   <h3>Temperature <span class="float-end">Humidity</span></h3>
+    #   <h3>29 16</h3>
+    #   <span class="float-end">0 0</span>
+    #   <h3>Forecast</h3>
+    #   <p>Partly cloudy sky</p>
+    # </div>
+    forecast_list = []
+    try:
+        forecast_container = driver.find_element(
+            By.XPATH,
+            "//p[contains(.,'7 days forecast')]/following-sibling::div"
+        )
+        cards = forecast_container.find_elements(
+            By.XPATH,
+            ".//div[contains(@class,'min-h-32')]"
+        )
+
+        for card in cards:
             try:
-                p = driver.find_element(By.XPATH, f"//p[contains(text(),'{label}')]")
-                h3 = p.find_element(By.XPATH, "./preceding-sibling::h3[1]")
-                return h3.text.strip()
+                date_text = card.find_element(
+                    By.XPATH,
+                    ".//span[contains(@class,'text-blue-700')]"
+                ).text.strip()
             except NoSuchElementException:
-                return None
-
-        sun_moon = {
-            "sunset_today": get_time_for("Sunset (Today)"),
-            "sunrise_tomorrow": get_time_for("Sunrise (Tomorrow)"),
-            "moonrise": get_time_for("Moonrise"),
-            "moonset": get_time_for("Moonset"),
-        }
-        result["sun_moon"] = sun_moon
-
-        # ------------------------------------------------------------------
-        # 4) 7 DAYS FORECAST
-        # ------------------------------------------------------------------
-        # HTML (per card, simplified):
-        # <div class="min-h-32 ...">
-        #   <span>1-DEC</span>
-        #   <h3>Temperature <span class="float-end">Humidity</span></h3>
-        #   <h3>29 16</h3>
-        #   <span class="float-end">0 0</span>
-        #   <h3>Forecast</h3>
-        #   <p>Partly cloudy sky</p>
-        # </div>
-        forecast_list = []
-        try:
-            forecast_container = driver.find_element(
+                date_text = None
+
+            # second h3 inside card holds numbers (29 16)
+            h3s = card.find_elements(By.TAG_NAME, "h3")
+            temp_max = temp_min = None
+            if len(h3s) >= 2:
+                num_tokens = h3s[1].text.split()
+                if len(num_tokens) >= 2:
+                    temp_max, temp_min = num_tokens[0], num_tokens[1]
+
+            # last span.float-end in card holds humidity numbers (0 0)
+            hum_max = hum_min = None
+            spans_float = card.find_elements(
                 By.XPATH,
-                "//p[contains(.,'7 days forecast')]/following-sibling::div"
+                ".//span[contains(@class,'float-end')]"
             )
-            cards = forecast_container.find_elements(
+            if spans_float:
+                hum_tokens = spans_float[-1].text.split()
+                if len(hum_tokens) >= 2:
+                    hum_max, hum_min = hum_tokens[0], hum_tokens[1]
+
+            # forecast description paragraph
+            condition = _get_child_text_or_none(
+                card,
                 By.XPATH,
-                ".//div[contains(@class,'min-h-32')]"
+                ".//p[contains(@class,'text-gray-600')]"
             )
 
-            for card in cards:
-                try:
-                    date_text = card.find_element(
-                        By.XPATH,
-                        ".//span[contains(@class,'text-blue-700')]"
-                    ).text.strip()
-                except NoSuchElementException:
-                    date_text = None
-
-                # second h3 inside card holds numbers (29 16)
-                h3s = card.find_elements(By.TAG_NAME, "h3")
-                temp_max = temp_min = None
-                if len(h3s) >= 2:
-                    num_tokens = h3s[1].text.split()
-                    if len(num_tokens) >= 2:
-                        temp_max, temp_min = num_tokens[0], num_tokens[1]
-
-                # last span.float-end in card holds humidity numbers (0 0)
-                hum_max = hum_min = None
-                spans_float = card.find_elements(
-                    By.XPATH,
-                    ".//span[contains(@class,'float-end')]"
-                )
-                if spans_float:
-                    hum_tokens = spans_float[-1].text.split()
-                    if len(hum_tokens) >= 2:
-                        hum_max, hum_min = hum_tokens[0], hum_tokens[1]
-
-                # forecast description paragraph
-                condition = _get_child_text_or_none(
-                    card,
-                    By.XPATH,
-                    ".//p[contains(@class,'text-gray-600')]"
-                )
-
-                forecast_list.append({
-                    "date": date_text,
-                    "temp_max": temp_max,
-                    "temp_min": temp_min,
-                    "humidity_max": hum_max,
-                    "humidity_min": hum_min,
-                    "condition": condition
-                })
+            forecast_list.append({
+                "date": date_text,
+                "temp_max": temp_max,
+                "temp_min": temp_min,
+                "humidity_max": hum_max,
+                "humidity_min": hum_min,
+                "condition": condition
+            })
 
-            result["forecast_7_days"] = forecast_list
-
-        except NoSuchElementException:
-            result["forecast_7_days"] = []
+        result["forecast_7_days"] = forecast_list
 
-        # ------------------------------------------------------------------
-        # DONE
-        # ------------------------------------------------------------------
-        return json.dumps(result)
+    except NoSuchElementException:
+        result["forecast_7_days"] = []
 
-    except Exception as e:
-        return json.dumps({"error": str(e)})
-    finally:
-        driver.quit()
+    # ------------------------------------------------------------------
+    # DONE
+    # ------------------------------------------------------------------
+    return result
@@ -4,7 +4,13 @@ Uses LangChain @tool decorator for LangGraph compatibility
 """
 
 from langchain.tools import tool
+import hashlib
+import json
+import os
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor, wait
+from requests.adapters import HTTPAdapter
 from PyPDF2 import PdfReader
 from io import BytesIO
 
@@ -19,6 +25,25 @@ IMD_PDFS = {
     "composite_bulletin": "https://mausam.imd.gov.in/bhubaneswar/mcdata/composite.pdf"
 }
 
+# Per-bulletin download timeout and overall deadline for the "all" path (seconds)
+PDF_TIMEOUT = float(os.getenv("IMD_PDF_TIMEOUT", "15"))
+ALL_PDFS_DEADLINE = float(os.getenv("IMD_PDF_ALL_DEADLINE", "20"))
+
+# Bulletin cache (raw PDF + validators + extracted text)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+PDF_CACHE_DIR = os.getenv("IMD_PDF_CACHE_DIR", os.path.join(PROJECT_ROOT, ".cache", "imd_pdfs"))
+
+# Shared keep-alive session: all bulletins live on the same host
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=len(IMD_PDFS)))
+
+# Shared pool so a slow bulletin never blocks the caller past the deadline.
+# Downloads in flight are shared per URL (see _fetch), so there are never
+# more jobs than bulletins and a job never waits for a worker.
+_executor = ThreadPoolExecutor(max_workers=len(IMD_PDFS), thread_name_prefix="imd-pdf")
+_in_flight = {}  # url -> Future of the running download
+_in_flight_lock = threading.Lock()
+
 
 @tool
 def imd_pdf_reader(pdf_type: str = "all") -> str:
@@ -61,63 +86,128 @@ def imd_pdf_reader(pdf_type: str = "all") -> str:
         return f"Error: Unknown PDF type '{pdf_type}'. Available: {available}, all"
 
 
-def _get_all_pdf_summaries() -> str:
+def _get_all_pdf_summaries(deadline: float = None) -> str:
     """
-    Download all IMD PDFs and extract first-page summaries.
+    Download all IMD PDFs concurrently and extract first-page summaries.
+    
+    Total latency is bounded by the slowest single bulletin (and by
+    `deadline`); bulletins still pending at the deadline are reported
+    as timed out while the others are returned. Concurrent callers share
+    the downloads already in flight instead of queueing duplicates.
+    
+    Args:
+        deadline: Overall seconds to wait (default: ALL_PDFS_DEADLINE)
     
     Returns:
         Combined text from all PDF first pages
     """
+    deadline = ALL_PDFS_DEADLINE if deadline is None else deadline
+    
+    futures = {name: _fetch(url) for name, url in IMD_PDFS.items()}
+    wait(futures.values(), timeout=deadline)
+    
     output = []
     output.append("=" * 60)
     output.append("IMD ODISHA WEATHER BULLETINS SUMMARY")
     output.append("=" * 60)
     
-    for name, url in IMD_PDFS.items():
+    # Keep the original bulletin order
+    for name, future in futures.items():
         output.append(f"\n{'='*60}")
         output.append(f"[{name.upper().replace('_', ' ')}]")
         output.append(f"{'='*60}")
         
-        text = _download_and_extract(url)
+        if future.done():
+            text = future.result()
+        else:
+            # Not cancelled: another caller may be waiting on the same download
+            text = f"❌ Timed out after {deadline:.0f}s - Server not responding"
         output.append(text)
     
     return "\n".join(output)
 
 
-def _download_and_extract(url: str, max_pages: int = 1) -> str:
+def _fetch(url: str):
+    """Future for the first-page text of `url`, joining a download already in flight."""
+    with _in_flight_lock:
+        future = _in_flight.get(url)
+        if future is not None:
+            return future
+        future = _executor.submit(_download_and_extract, url)
+        _in_flight[url] = future
+
+    # Outside the lock: runs immediately if the download already finished
+    future.add_done_callback(lambda f: _forget(url, f))
+    return future
+
+
+def _forget(url: str, future) -> None:
+    with _in_flight_lock:
+        if _in_flight.get(url) is future:
+            del _in_flight[url]
+
+
+def _download_and_extract(url: str, max_pages: int = 1, timeout: float = None) -> str:
     """
     Download PDF and extract text from first page(s).
     
+    Uses the on-disk bulletin cache: the request is a conditional GET
+    (If-None-Match / If-Modified-Since), and on 304 the cached page text
+    is returned without downloading or parsing the PDF.
+    
     Args:
         url: PDF URL
         max_pages: Number of pages to extract (default: 1)
+        timeout: Request timeout in seconds (default: PDF_TIMEOUT)
         
     Returns:
         Extracted text or error message
     """
     try:
-        # Download PDF
-        response = requests.get(url, timeout=15)
+        meta = _load_cache_meta(url)
+        pdf_path = _cache_path(url, ".pdf")
         
-        if response.status_code != 200:
-            return f"❌ HTTP {response.status_code} - Could not download"
+        headers = {}
+        if meta and os.path.exists(pdf_path):
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        
+        # Download PDF (or revalidate the cached copy)
+        response = _session.get(url, headers=headers, timeout=timeout or PDF_TIMEOUT)
+        
+        if response.status_code == 304 and headers:
+            pages = meta["pages"]
+            
+            # Cached text covers fewer pages than requested → parse the cached PDF
+            if len(pages) < min(max_pages, meta["num_pages"]):
+                with open(pdf_path, "rb") as f:
+                    pages, _ = _extract_pages(f.read(), max_pages)
+                meta["pages"] = pages
+                _write_cache_meta(url, meta)
+        
+        elif response.status_code == 200:
+            pages, num_pages = _extract_pages(response.content, max_pages)
+            
+            _atomic_write(pdf_path, response.content)
+            _write_cache_meta(url, {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "num_pages": num_pages,
+                "pages": pages
+            })
         
-        # Read PDF from bytes
-        pdf_file = BytesIO(response.content)
-        reader = PdfReader(pdf_file)
+        else:
+            return f"❌ HTTP {response.status_code} - Could not download"
         
         # Check if PDF has pages
-        if len(reader.pages) == 0:
+        if not pages:
             return "❌ PDF is empty"
         
-        # Extract text from first page(s)
-        extracted_text = []
-        
-        for i in range(min(max_pages, len(reader.pages))):
-            page_text = reader.pages[i].extract_text()
-            
-            if page_text:
-                extracted_text.append(page_text)
+        # Text from first page(s)
+        extracted_text = [t for t in pages[:max_pages] if t]
         
         if not extracted_text:
             return "❌ Could not extract text from PDF"
@@ -131,4 +221,56 @@ def _download_and_extract(url: str, max_pages: int = 1) -> str:
         return f"❌ Network error: {str(e)}"
     
     except Exception as e:
-        return f"❌ PDF processing error: {str(e)}"
\ No newline at end of file
+        return f"❌ PDF processing error: {str(e)}"
+
+
+def _extract_pages(pdf_bytes: bytes, max_pages: int):
+    """
+    Extract text of the first `max_pages` pages.
+    
+    Returns:
+        (list of page texts, total page count)
+    """
+    reader = PdfReader(BytesIO(pdf_bytes))
+    num_pages = len(reader.pages)
+    
+    pages = []
+    for i in range(min(max_pages, num_pages)):
+        pages.append(reader.pages[i].extract_text() or "")
+    
+    return pages, num_pages
+
+
+# ==========================================
+# ON-DISK BULLETIN CACHE
+# ==========================================
+# <cache_dir>/<sha1(url)>.pdf   raw PDF
+# <cache_dir>/<sha1(url)>.json  validators + extracted page text
+
+def _cache_path(url: str, suffix: str) -> str:
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return os.path.join(PDF_CACHE_DIR, digest + suffix)
+
+
+def _load_cache_meta(url: str):
+    try:
+        with open(_cache_path(url, ".json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache_meta(url: str, meta: dict) -> None:
+    _atomic_write(_cache_path(url, ".json"), json.dumps(meta).encode("utf-8"))
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    """Best-effort write: a read-only / full disk must not break the tool."""
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
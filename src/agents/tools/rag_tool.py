@@ -1,67 +1,77 @@
-from typing import List, Dict
+from typing import List
+
+from context_packer import PackedContext, pack_context
 
 
 class RAGTool:
+    """
+    Retrieval tool: returns RetrievedChunk objects (content, file, page,
+    distance, chunk_id). Formatting for prompts happens once, at prompt
+    build time, via pack_documents().
+    """
+
+    HEADER = "\n".join(["=" * 60, "RETRIEVED DOCUMENTS", "=" * 60])
+
     def __init__(self, retriever):
         self.retriever = retriever
         self.name = "rag_retriever"
         self.description = "Retrieve relevant documents from knowledge base"
     
-    def invoke(self, input_dict: dict) -> str:
+    def invoke(self, input_dict: dict) -> List:
+        query = input_dict.get("query", "")
+        k = input_dict.get("k", 5)
+        return self.retrieve(query, k, query_embedding=input_dict.get("query_embedding"))
+    
+    async def ainvoke(self, input_dict: dict) -> List:
         query = input_dict.get("query", "")
         k = input_dict.get("k", 5)
-        return self.retrieve(query, k)
+        return await self.aretrieve(query, k, query_embedding=input_dict.get("query_embedding"))
     
-    def retrieve(self, query: str, k: int = 5) -> str:
+    def retrieve(self, query: str, k: int = 5, query_embedding=None) -> List:
+        """
+        Returns:
+            List of RetrievedChunk (empty if nothing matched)
+        
+        Raises:
+            ValueError: If no query is given
+        """
         if not query:
-            return "Error: No query provided"
+            raise ValueError("No query provided")
         
-        try:
-            results = self.retriever.get_top_k(query, k=k)
-            
-            if not results:
-                return "No relevant documents found"
-            
-            formatted = self._format_documents(results)
-            return formatted
+        return self.retriever.get_top_k(query, k=k, query_embedding=query_embedding)
+    
+    async def aretrieve(self, query: str, k: int = 5, query_embedding=None) -> List:
+        if not query:
+            raise ValueError("No query provided")
         
-        except Exception as e:
-            return f"RAG retrieval error: {str(e)}"
+        return await self.retriever.aget_top_k(query, k=k, query_embedding=query_embedding)
     
-    def _format_documents(self, docs: List) -> str:
+    @classmethod
+    def pack_documents(cls, docs: List, token_budget: int = None) -> PackedContext:
+        """
+        Render chunks as prompt context (the only place chunks become text),
+        most relevant first, deduplicated, within token_budget
+        (default RAG_CONTEXT_TOKENS).
+        """
         if not docs:
-            return "No documents retrieved"
+            return PackedContext(text="No documents retrieved")
         
-        output = []
-        output.append("=" * 60)
-        output.append("RETRIEVED DOCUMENTS")
-        output.append("=" * 60)
-        
-        for i, doc in enumerate(docs, 1):
-            if isinstance(doc, dict):
-                content = doc.get("content", doc.get("text", ""))
-                source = doc.get("file", doc.get("source", "Unknown"))
-                page = doc.get("page", "N/A")
-                score = doc.get("score", 0.0)
-            else:
-                content = str(doc)
-                source = "Unknown"
-                page = "N/A"
-                score = 0.0
-            
-            doc_text = (
-                f"\n--- Document {i} ---\n"
-                f"Source: {source} (Page: {page})\n"
-                f"Relevance: {score:.3f}\n"
-                f"{'-' * 60}\n"
-                f"{content}\n"
-            )
-            output.append(doc_text)
-        
-        return "\n".join(output)
+        packed = pack_context(docs, token_budget, format_chunk=cls.format_document)
+        packed.text = f"{cls.HEADER}\n{packed.text}"
+        return packed
+    
+    @staticmethod
+    def format_document(position: int, doc, content: str) -> str:
+        return (
+            f"\n--- Document {position} ---\n"
+            f"Source: {doc.file or 'Unknown'} (Page: {doc.page if doc.page is not None else 'N/A'})\n"
+            f"Relevance: {doc.relevance:.3f}\n"
+            f"{'-' * 60}\n"
+            f"{content}\n"
+        )
     
-    def __call__(self, query: str = None, k: int = 5, **kwargs) -> str:
+    def __call__(self, query: str = None, k: int = 5, **kwargs) -> List:
         if isinstance(query, dict):
             return self.invoke(query)
         else:
-            return self.retrieve(query or kwargs.get("query", ""), k)
\ No newline at end of file
+            return self.retrieve(query or kwargs.get("query", ""), k)
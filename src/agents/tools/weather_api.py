@@ -5,8 +5,11 @@ Uses LangChain @tool decorator for LangGraph compatibility
 
 from langchain.tools import tool
 from typing import Optional
+import os
 
 from agents.tools.imd_scraper import imd_scraper
+from agents.tools.imd_http_scraper import imd_http_scraper
+from agents.tools.weather_cache import StationWeatherCache
 
 # IMD Station ID mapping
 STATION_MAP = {
@@ -93,7 +96,11 @@ def get_all_weather_locations() -> str:
 @tool
 def imd_weather_fetcher(station_id: int) -> str:
     """
-    Fetch structured weather data from IMD using Selenium scraper.
+    Fetch structured weather data from IMD.
+    
+    Served from the per-station snapshot cache; on a miss scrapes the
+    station page with Selenium (or the HTTP + lxml parser first, when
+    IMD_HTTP_FIRST is enabled).
     
     Args:
         station_id: IMD station ID (integer)
@@ -101,4 +108,28 @@ def imd_weather_fetcher(station_id: int) -> str:
     Returns:
         JSON string result from the scraper
     """
-    return imd_scraper({"station_id": station_id})
\ No newline at end of file
+    return station_weather_cache.get(station_id)
+
+
+# The IMD city page is rendered client-side, so the plain HTTP fetch
+# usually has nothing to parse; only try it first when opted in.
+IMD_HTTP_FIRST = os.getenv("IMD_HTTP_FIRST", "false").lower() in ("1", "true", "yes")
+
+
+def fetch_station_weather(station_id: int) -> str:
+    """Selenium scrape; with IMD_HTTP_FIRST, HTTP parser first (same JSON schema)."""
+    if IMD_HTTP_FIRST:
+        try:
+            return imd_http_scraper({"station_id": station_id})
+        except Exception as e:
+            print(f"[IMD] HTTP parse failed for {station_id} ({e}), falling back to Selenium")
+    return imd_scraper({"station_id": station_id})
+
+
+# Per-station snapshot cache (IMD pages update only a few times a day)
+station_weather_cache = StationWeatherCache(
+    fetch_station_weather,
+    STATION_MAP.values(),
+    ttl=float(os.getenv("IMD_CACHE_TTL", "1800")),
+    stale_ttl=float(os.getenv("IMD_CACHE_STALE_TTL", "21600"))
+)
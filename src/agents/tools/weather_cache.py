@@ -0,0 +1,187 @@
+"""
+Station Weather Cache - per-station IMD snapshot cache
+
+IMD city pages only change a few times a day, so scraper JSON is cached
+per station id with stale-while-revalidate semantics:
+
+    age < ttl                 → fresh hit
+    ttl <= age < stale_ttl    → stale hit, refreshed in the background
+    age >= stale_ttl / absent → fetched synchronously
+
+A background refresher can prewarm every station on a schedule so user
+requests almost never wait on a scrape.
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable
+
+
+class StationWeatherCache:
+    def __init__(
+        self,
+        fetch_fn: Callable[[int], str],
+        station_ids: Iterable[int],
+        ttl: float = 1800,
+        stale_ttl: float = 6 * 3600,
+        max_workers: int = 4
+    ):
+        """
+        Args:
+            fetch_fn: station_id -> scraper JSON string
+            station_ids: Stations to prewarm
+            ttl: Seconds a snapshot is served as fresh
+            stale_ttl: Seconds a snapshot may be served while revalidating
+            max_workers: Concurrent background refreshes
+        """
+        self.fetch_fn = fetch_fn
+        self.station_ids = list(station_ids)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+        self._entries: Dict[int, tuple] = {}  # station_id -> (payload, fetched_at)
+        self._lock = threading.Lock()
+        self._station_locks: Dict[int, threading.Lock] = {}
+        self._refreshing = set()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="imd-refresh")
+
+        self._stop = threading.Event()
+        self._refresher = None
+
+        self.stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+        }
+
+    # ==========================================
+    # READ PATH
+    # ==========================================
+
+    def get(self, station_id: int) -> str:
+        """Return scraper JSON for a station (see module docstring for freshness rules)."""
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(station_id)
+
+        if entry is not None:
+            payload, fetched_at = entry
+            age = now - fetched_at
+
+            if age < self.ttl:
+                self._count("hits")
+                return payload
+
+            if age < self.stale_ttl:
+                self._count("stale_hits")
+                self._schedule_refresh(station_id)
+                return payload
+
+        self._count("misses")
+        return self.refresh(station_id)
+
+    # ==========================================
+    # REFRESH PATH
+    # ==========================================
+
+    def refresh(self, station_id: int) -> str:
+        """
+        Fetch now and store on success.
+
+        Concurrent callers for the same station share one fetch.
+        """
+        with self._lock:
+            station_lock = self._station_locks.setdefault(station_id, threading.Lock())
+            before = self._entries.get(station_id)
+
+        with station_lock:
+            # Another thread may have refreshed while we waited
+            with self._lock:
+                current = self._entries.get(station_id)
+            if current is not None and current is not before and time.time() - current[1] < self.ttl:
+                return current[0]
+
+            payload = self.fetch_fn(station_id)
+
+            if self._is_error(payload):
+                self._count("refresh_errors")
+                # Keep serving the last good snapshot if we have one
+                return current[0] if current is not None else payload
+
+            with self._lock:
+                self._entries[station_id] = (payload, time.time())
+            self._count("refreshes")
+            return payload
+
+    def _schedule_refresh(self, station_id: int) -> None:
+        with self._lock:
+            if station_id in self._refreshing:
+                return
+            self._refreshing.add(station_id)
+
+        def _run():
+            try:
+                self.refresh(station_id)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(station_id)
+
+        self._executor.submit(_run)
+
+    def prewarm(self) -> None:
+        """Refresh every known station (in parallel) and wait for completion."""
+        list(self._executor.map(self._safe_refresh, self.station_ids))
+
+    def _safe_refresh(self, station_id: int) -> None:
+        try:
+            self.refresh(station_id)
+        except Exception:
+            self._count("refresh_errors")
+
+    # ==========================================
+    # BACKGROUND REFRESHER
+    # ==========================================
+
+    def start_background_refresh(self, interval: float = 1200) -> None:
+        """Prewarm all stations now and then every `interval` seconds."""
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+
+        self._stop.clear()
+
+        def _loop():
+            while not self._stop.is_set():
+                self.prewarm()
+                self._stop.wait(interval)
+
+        self._refresher = threading.Thread(target=_loop, name="imd-prewarm", daemon=True)
+        self._refresher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    # ==========================================
+    # UTILITIES
+    # ==========================================
+
+    @staticmethod
+    def _is_error(payload: str) -> bool:
+        try:
+            return "error" in json.loads(payload)
+        except Exception:
+            return True
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["cached_stations"] = len(self._entries)
+        return stats
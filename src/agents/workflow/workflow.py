@@ -1,5 +1,8 @@
 from langgraph.graph import StateGraph, END
-from typing import TypedDict, Optional, Dict
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from typing import TypedDict, Optional, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import json
 import os
 from dotenv import load_dotenv
@@ -16,6 +19,9 @@ from agents.agent_types.evaluator_agent import EvaluatorAgent
 # ROUTING
 # =========================
 from agents.policies.routing_policy import RoutingPolicy
+from agents.policies.semantic_router import SemanticRouter
+from agents.policies.evaluation_policy import evaluation_policy_from_env
+from agents.policies.rewrite_policy import RewritePolicy
 
 # =========================
 # TOOLS
@@ -68,26 +74,70 @@ class AppState(TypedDict):
     agent_response: Optional[str]
     response: Optional[str]
     evaluation: Optional[Dict]
+    memory: Optional[ShortTermMemory]  # per-session conversation history
+    session_id: Optional[str]
+    retrieval: Optional[Dict]  # {"query", "context": [RetrievedChunk]} for rag_node / evaluator
+    query_embedding: Optional[List[float]]  # rewritten_query embedding from the semantic router
 
 
 # =========================
 # INIT CORE
 # =========================
 llm = ChatGroq(model="llama-3.1-8b-instant", temperature=0.2)
-routing_policy = RoutingPolicy(debug=True)
+# Skips the rewrite LLM call for self-contained follow-ups
+rewrite_policy = RewritePolicy(llm)
 
-short_term_memory = ShortTermMemory()
 long_term_memory = LongTermMemory()
 
 
+def _session_memory(state: AppState) -> ShortTermMemory:
+    """
+    The session's own memory; never shared between sessions.
+
+    Callers without a session (no state["memory"]) get an empty, throwaway
+    memory: no history is read, and nothing written leaks into another
+    request.
+    """
+    memory = state.get("memory")
+    return memory if memory is not None else ShortTermMemory()
+
+
 # =========================
 # RAG RETRIEVER
 # =========================
 from retriver import DocumentRetriever
 
-retriever = DocumentRetriever(persist_dir=os.path.join(project_root, "chroma_db"))
+# CHROMA_PERSIST_DIR points the graph at another collection store (e.g. tests)
+retriever = DocumentRetriever(
+    persist_dir=os.getenv("CHROMA_PERSIST_DIR", os.path.join(project_root, "chroma_db"))
+)
 rag_tool = RAGTool(retriever)
 
+# =========================
+# ROUTER
+# =========================
+# ROUTING_MODE=semantic routes by similarity to per-route centroids
+# (one cached query embedding, reused for retrieval); keyword tables and
+# the LLM only see queries below the confidence margin.
+ROUTING_MODE = os.getenv("ROUTING_MODE", "keyword").lower().strip()
+ROUTING_DEBUG = os.getenv("ROUTING_DEBUG", "false").lower() in ("1", "true", "yes")
+ROUTE_CACHE_SIZE = int(os.getenv("ROUTE_CACHE_SIZE", "1024"))
+
+if ROUTING_MODE == "semantic":
+    semantic_router = SemanticRouter(
+        retriever.embed_batch,
+        min_score=float(os.getenv("ROUTING_MIN_SCORE", "0.30")),
+        min_margin=float(os.getenv("ROUTING_MIN_MARGIN", "0.05"))
+    )
+    routing_policy = RoutingPolicy(
+        client=llm,
+        debug=ROUTING_DEBUG,
+        semantic_router=semantic_router,
+        cache_size=ROUTE_CACHE_SIZE
+    )
+else:
+    routing_policy = RoutingPolicy(debug=ROUTING_DEBUG, cache_size=ROUTE_CACHE_SIZE)
+
 # =========================
 # AGENTS
 # =========================
@@ -108,6 +158,9 @@ evaluator_agent = EvaluatorAgent(
     auto_improve_confidence=0.75
 )
 
+# EVALUATION_MODE=off|sampled|inline|background (+ latency budget, JSONL log)
+evaluation_policy = evaluation_policy_from_env(evaluator_agent)
+
 
 # ============================================================
 # 🔥 NODE 1: QUERY REWRITER (MOST IMPORTANT FIX)
@@ -118,31 +171,22 @@ def rewrite_query_node(state: AppState) -> AppState:
     using short-term memory.
     """
 
-    history = short_term_memory.get()
-    if not history:
-        state["rewritten_query"] = state["query"]
-        return state
+    history = _session_memory(state).get()
+    rewritten = rewrite_policy.rewrite(state["query"], history)
 
-    context = ""
-    for h in history[-3:]:
-        context += f"User: {h['user']}\nAssistant: {h['assistant']}\n"
+    if rewritten != state["query"]:
+        print("🔁 QUERY REWRITTEN →", rewritten)
 
-    prompt = f"""
-You are a query rewriter.
-
-Conversation history:
-{context}
-
-User follow-up question:
-{state['query']}
+    state["rewritten_query"] = rewritten
+    return state
 
-Rewrite it into a fully self-contained question.
-DO NOT answer. Only rewrite.
-"""
 
-    rewritten = llm.invoke(prompt).content.strip()
+async def arewrite_query_node(state: AppState, config: RunnableConfig) -> AppState:
+    history = _session_memory(state).get()
+    rewritten = await rewrite_policy.arewrite(state["query"], history, config=config)
 
-    print("🔁 QUERY REWRITTEN →", rewritten)
+    if rewritten != state["query"]:
+        print("🔁 QUERY REWRITTEN →", rewritten)
 
     state["rewritten_query"] = rewritten
     return state
@@ -153,10 +197,110 @@ DO NOT answer. Only rewrite.
 # =========================
 def router_node(state: AppState) -> AppState:
     query = state.get("rewritten_query", state["query"])
-    route = routing_policy.route(query)
+    decision = routing_policy.decide(query)
+    route = decision["route"]
+
+    if ROUTING_DEBUG:
+        print(f"[Router] → {route}")
+    return {"route": route, "selected_agent": route, "query_embedding": decision["embedding"]}
+
+
+# ============================================================
+# SPECULATIVE MODE: REWRITE ∥ (ROUTE + RETRIEVE RAW QUERY)
+# ============================================================
+# SPECULATIVE_REWRITE=true replaces Rewrite → Router with one node that
+# routes the raw query and, for RAG, retrieves for it while the rewrite
+# LLM call is in flight. Retrieval is redone only if the rewritten query
+# diverges from the raw one.
+SPECULATIVE_REWRITE = os.getenv("SPECULATIVE_REWRITE", "false").lower() in ("1", "true", "yes")
+SPECULATIVE_MIN_SIMILARITY = float(os.getenv("SPECULATIVE_MIN_SIMILARITY", "0.8"))
+
+speculation_stats = {"speculated": 0, "reused": 0, "diverged": 0}
+_speculation_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="speculate")
+
+
+def _queries_diverge(raw: str, rewritten: str) -> bool:
+    """Token-set Jaccard similarity below threshold → meaningfully different."""
+    a, b = set(raw.lower().split()), set(rewritten.lower().split())
+    if not a or not b:
+        return a != b
+    return len(a & b) / len(a | b) < SPECULATIVE_MIN_SIMILARITY
+
+
+def _speculative_retrieve(query: str) -> Optional[Dict]:
+    decision = routing_policy.decide(query)
+    route = decision["route"]
+    if route != "rag":
+        return {"route": route, "retrieval": None}
+    try:
+        context = rag_tool.retrieve(query, k=5, query_embedding=decision["embedding"])
+    except Exception as e:
+        print(f"[Speculate] retrieval failed, rag_node will retry: {e}")
+        return {"route": route, "retrieval": None}
+    return {"route": route, "retrieval": {"query": query, "context": context}}
+
+
+async def _aspeculative_retrieve(query: str) -> Optional[Dict]:
+    # decide() may embed the query (semantic mode) → keep it off the event loop
+    decision = await asyncio.to_thread(routing_policy.decide, query)
+    route = decision["route"]
+    if route != "rag":
+        return {"route": route, "retrieval": None}
+    try:
+        context = await rag_tool.aretrieve(query, k=5, query_embedding=decision["embedding"])
+    except Exception as e:
+        print(f"[Speculate] retrieval failed, rag_node will retry: {e}")
+        return {"route": route, "retrieval": None}
+    return {"route": route, "retrieval": {"query": query, "context": context}}
+
+
+def _resolve_speculation(raw: str, rewritten: str, speculative: Dict) -> Dict:
+    speculation_stats["speculated"] += 1
+
+    if rewritten == raw or not _queries_diverge(raw, rewritten):
+        speculation_stats["reused"] += 1
+        route = speculative["route"]
+        retrieval = speculative["retrieval"]
+        embedding = None
+    else:
+        speculation_stats["diverged"] += 1
+        print("🔁 QUERY REWRITTEN →", rewritten)
+        decision = routing_policy.decide(rewritten)
+        route = decision["route"]
+        retrieval = None  # rag_node retrieves for the rewritten query
+        embedding = decision["embedding"]
+
+    if ROUTING_DEBUG:
+        print(f"[Router] → {route}")
+    return {
+        "rewritten_query": rewritten,
+        "route": route,
+        "selected_agent": route,
+        "retrieval": retrieval,
+        "query_embedding": embedding
+    }
+
 
-    print(f"[Router] → {route}")
-    return {"route": route, "selected_agent": route}
+def speculate_node(state: AppState):
+    history = _session_memory(state).get()
+    raw = state["query"]
+
+    rewrite_future = _speculation_pool.submit(rewrite_policy.rewrite, raw, history)
+    speculative = _speculative_retrieve(raw)
+
+    return _resolve_speculation(raw, rewrite_future.result(), speculative)
+
+
+async def aspeculate_node(state: AppState, config: RunnableConfig):
+    history = _session_memory(state).get()
+    raw = state["query"]
+
+    rewritten, speculative = await asyncio.gather(
+        rewrite_policy.arewrite(raw, history, config=config),
+        _aspeculative_retrieve(raw)
+    )
+
+    return _resolve_speculation(raw, rewritten, speculative)
 
 
 # =========================
@@ -172,6 +316,11 @@ def web_search_node(state: AppState):
     result = web_search_tool.invoke({"query": q})
     return {"response": result}
 
+async def aweb_search_node(state: AppState):
+    q = state["rewritten_query"]
+    result = await web_search_tool.ainvoke({"query": q})
+    return {"response": result}
+
 
 # =========================
 # AGENT NODES
@@ -180,25 +329,66 @@ def weather_node(state: AppState):
     result = weather_agent({"query": state["rewritten_query"]})
     return {"agent_response": result["response"]}
 
+async def aweather_node(state: AppState, config: RunnableConfig):
+    # Selenium scraping runs in a worker thread inside acall()
+    result = await weather_agent.acall({"query": state["rewritten_query"]}, config=config)
+    return {"agent_response": result["response"]}
+
+def _prefetched_context(state: AppState) -> Optional[List]:
+    retrieval = state.get("retrieval")
+    return retrieval["context"] if retrieval else None
+
+def _rag_output(state: AppState, result: Dict):
+    # Keep the retrieved context in state so the evaluator can reuse it
+    context = result.get("context")
+    retrieval = {"query": state["rewritten_query"], "context": context} if context else None
+    return {"agent_response": result.get("answer"), "retrieval": retrieval}
+
 def rag_node(state: AppState):
-    result = rag_agent.run(state["rewritten_query"])
-    return {"agent_response": result.get("answer")}
+    result = rag_agent.run(
+        state["rewritten_query"],
+        retrieved=_prefetched_context(state),
+        query_embedding=state.get("query_embedding")
+    )
+    return _rag_output(state, result)
+
+async def arag_node(state: AppState, config: RunnableConfig):
+    result = await rag_agent.arun(
+        state["rewritten_query"],
+        config=config,
+        retrieved=_prefetched_context(state),
+        query_embedding=state.get("query_embedding")
+    )
+    return _rag_output(state, result)
 
 def general_node(state: AppState):
     return {"agent_response": user_agent({"query": state["rewritten_query"]})["agent_response"]}
 
+async def ageneral_node(state: AppState, config: RunnableConfig):
+    result = await user_agent.acall({"query": state["rewritten_query"]}, config=config)
+    return {"agent_response": result["agent_response"]}
+
 
 # =========================
 # EVALUATOR
 # =========================
 def evaluator_node(state: AppState):
-    result = evaluator_agent(state)
+    result = evaluation_policy.evaluate(state)
+    return _finalize_answer(state, result)
+
+async def aevaluator_node(state: AppState):
+    result = await evaluation_policy.aevaluate(state)
+    return _finalize_answer(state, result)
+
+def _finalize_answer(state: AppState, result: Dict):
+    # Improved answer only when evaluated inline; otherwise the draft
+    # is what the user sees and what memory records
     final = result.get("evaluation", {}).get(
         "improved_answer",
         state.get("agent_response")
     )
 
-    short_term_memory.add({
+    _session_memory(state).add({
         "user": state["query"],
         "assistant": final
     })
@@ -209,23 +399,35 @@ def evaluator_node(state: AppState):
 # =========================
 # GRAPH
 # =========================
-graph = StateGraph(AppState)
+# Each node carries a sync + async implementation, so the same
+# compiled graph serves app.invoke() (CLI) and app.ainvoke() (FastAPI).
+def _node(func, afunc=None):
+    return RunnableLambda(func, afunc=afunc, name=func.__name__)
 
-graph.add_node("rewrite", rewrite_query_node)
-graph.add_node("router", router_node)
-graph.add_node("calculator", calculator_node)
-graph.add_node("web_search", web_search_node)
-graph.add_node("weather", weather_node)
-graph.add_node("rag", rag_node)
-graph.add_node("general", general_node)
-graph.add_node("evaluator", evaluator_node)
-
-graph.set_entry_point("rewrite")
+graph = StateGraph(AppState)
 
-graph.add_edge("rewrite", "router")
+if SPECULATIVE_REWRITE:
+    graph.add_node("speculate", _node(speculate_node, aspeculate_node))
+else:
+    graph.add_node("rewrite", _node(rewrite_query_node, arewrite_query_node))
+    graph.add_node("router", _node(router_node))
+graph.add_node("calculator", _node(calculator_node))
+graph.add_node("web_search", _node(web_search_node, aweb_search_node))
+graph.add_node("weather", _node(weather_node, aweather_node))
+graph.add_node("rag", _node(rag_node, arag_node))
+graph.add_node("general", _node(general_node, ageneral_node))
+graph.add_node("evaluator", _node(evaluator_node, aevaluator_node))
+
+if SPECULATIVE_REWRITE:
+    graph.set_entry_point("speculate")
+    route_source = "speculate"
+else:
+    graph.set_entry_point("rewrite")
+    graph.add_edge("rewrite", "router")
+    route_source = "router"
 
 graph.add_conditional_edges(
-    "router",
+    route_source,
     lambda s: s["route"],
     {
         "calculator": "calculator",
@@ -248,4 +450,7 @@ graph.add_edge("evaluator", END)
 app = graph.compile()
 
 print("✅ FINAL WORKFLOW READY")
-print("📊 Flow: Rewrite → Router → Agent/Tool → Evaluator → Response")
+if SPECULATIVE_REWRITE:
+    print("📊 Flow: (Rewrite ∥ Route + Retrieve) → Agent/Tool → Evaluator → Response")
+else:
+    print("📊 Flow: Rewrite → Router → Agent/Tool → Evaluator → Response")
@@ -3,6 +3,8 @@ import sys
 import textwrap
 from dotenv import load_dotenv
 
+from context_packer import pack_context
+
 # import your retriever (note: your file is retriver.py)
 try:
     from retriver import DocumentRetriever
@@ -29,38 +31,37 @@ if not OPENAI_API_KEY:
 # Config
 TOP_K = int(os.getenv("RAG_TOP_K", "5"))
 MODEL = os.getenv("RAG_CHAT_MODEL", "gpt-4.1-mini")  # adjust if you prefer another model
-MAX_CONTEXT_CHARS = int(os.getenv("RAG_MAX_CONTEXT_CHARS", "3000"))  # trim context if too long
+MAX_CONTEXT_TOKENS = int(os.getenv("RAG_CONTEXT_TOKENS", "1500"))  # token budget for the context
 SHOW_FULL_CHUNKS = os.getenv("RAG_SHOW_FULL_CHUNKS", "false").lower() in ("1", "true", "yes")
 
 # Initialize clients
 openai_client = OpenAI(api_key=OPENAI_API_KEY)
 
 # Utility: build RAG context from retrieved docs
-def build_context(retrieved: list, max_chars: int = MAX_CONTEXT_CHARS) -> str:
+def build_context(retrieved: list, max_tokens: int = MAX_CONTEXT_TOKENS) -> str:
     """
-    retrieved: list of dicts with keys 'content', 'file', 'page', 'distance'
-    Return a single string context trimmed to max_chars (approx).
+    retrieved: list of RetrievedChunk (content, file, page, distance)
+    Return a single string context packed into max_tokens: most relevant
+    chunks first, overlapping chunks dropped, cut at sentence boundaries.
     """
-    parts = []
-    for i, r in enumerate(retrieved, start=1):
-        header = f"--- Retrieved {i} | File: {r.get('file')} | Page: {r.get('page')} | Dist: {r.get('distance'):.4f} ---"
-        parts.append(header)
-        parts.append(r.get("content", ""))
-    context = "\n".join(parts)
+    packed = pack_context(retrieved, max_tokens, format_chunk=_format_chunk)
 
-    # If context too long, do a simple trim: keep start and end
-    if len(context) <= max_chars:
-        return context
+    if packed.tokens_saved:
+        print(
+            f"✂️  Context: {packed.tokens} tokens ({packed.tokens_saved} saved, "
+            f"{packed.duplicates_dropped} duplicate / {packed.over_budget_dropped} over-budget chunks dropped)"
+        )
+    return packed.text
 
-    head = context[: max_chars // 2]
-    tail = context[- (max_chars // 2) :]
-    return head + "\n\n... (context trimmed) ...\n\n" + tail
+def _format_chunk(position: int, r, content: str) -> str:
+    header = f"--- Retrieved {position} | File: {r.file} | Page: {r.page} | Dist: {r.distance:.4f} ---"
+    return f"{header}\n{content}"
 
 def format_retrieved_for_print(retrieved: list):
     for i, r in enumerate(retrieved, start=1):
         print("-" * 60)
-        print(f"Result {i}: File: {r.get('file')} | Page: {r.get('page')} | Distance: {r.get('distance'):.4f}")
-        text = r.get("content", "")
+        print(f"Result {i}: File: {r.file} | Page: {r.page} | Distance: {r.distance:.4f}")
+        text = r.content
         if SHOW_FULL_CHUNKS:
             print("\nText:\n")
             print(textwrap.fill(text, width=120))
@@ -0,0 +1,217 @@
+"""
+Context Packer - token-budgeted RAG context
+
+Packs retrieved chunks into a prompt context:
+    - highest relevance (lowest distance) first
+    - chunks that mostly repeat an already packed chunk are dropped
+      (overlapping chunk windows, the same page ingested twice, ...)
+    - stops at a token budget; the chunk that doesn't fit is cut at a
+      sentence boundary instead of mid-sentence
+    - the top chunk is always kept, hard-truncated if it alone is over
+      the budget
+
+Token counting:
+    CONTEXT_TOKENIZER = path to a local tokenizer.json matching the
+                        answering model (llama-3.1-8b-instant → the Llama 3
+                        tokenizer), loaded with the tokenizers package;
+                        never downloaded at runtime
+                        (default: models/llama3-tokenizer/tokenizer.json,
+                        fetched by the Docker build - see README)
+Only if that file is missing do budgets fall back to ESTIMATES (~4
+characters per token), which can be off by a fair margin for non-English
+text, numbers and tables.
+"""
+
+import math
+import os
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, List, Optional
+
+
+DEFAULT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKENS", "1500"))
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_TOKENIZER = os.getenv(
+    "CONTEXT_TOKENIZER",
+    os.path.join(PROJECT_ROOT, "models", "llama3-tokenizer", "tokenizer.json"),
+)
+
+# Don't bother cutting a chunk to fit fewer tokens than this
+MIN_PARTIAL_TOKENS = 48
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+_WORD_RE = re.compile(r"\w+")
+
+
+@dataclass
+class PackedContext:
+    text: str
+    chunks: List = field(default_factory=list)  # packed chunks, in prompt order
+    tokens: int = 0               # tokens in text
+    tokens_before: int = 0        # tokens if every chunk had been sent
+    duplicates_dropped: int = 0
+    over_budget_dropped: int = 0
+    truncated: bool = False
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(self.tokens_before - self.tokens, 0)
+
+
+# ==========================================
+# TOKEN COUNTING
+# ==========================================
+
+@lru_cache(maxsize=8)
+def get_token_counter(path: str = None) -> Callable[[str], int]:
+    """
+    Returns count(text) -> tokens.
+
+    Args:
+        path: Local tokenizer.json (default CONTEXT_TOKENIZER); no network
+
+    Falls back to estimate_tokens when the tokenizer file is missing or
+    cannot be loaded (CONTEXT_TOKENIZER="" forces the estimate).
+    """
+    path = path or DEFAULT_TOKENIZER
+    if not path:
+        return estimate_tokens
+
+    try:
+        from tokenizers import Tokenizer
+        tokenizer = Tokenizer.from_file(path)
+        return lambda text: len(tokenizer.encode(text, add_special_tokens=False).ids)
+    except Exception as e:
+        print(f"[ContextPacker] tokenizer '{path}' unavailable ({e}), estimating tokens from length")
+        return estimate_tokens
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)."""
+    return math.ceil(len(text) / 4)
+
+
+# ==========================================
+# PACKING
+# ==========================================
+
+def pack_context(
+    chunks: list,
+    token_budget: int = None,
+    format_chunk: Callable = None,
+    count_tokens: Callable[[str], int] = None,
+    separator: str = "\n",
+    overlap_threshold: float = 0.8
+) -> PackedContext:
+    """
+    Pack RetrievedChunk-like objects (content, file, page, distance) into
+    at most `token_budget` tokens.
+
+    Args:
+        chunks: Retrieved chunks, any order
+        token_budget: Max context tokens (default RAG_CONTEXT_TOKENS)
+        format_chunk: (position, chunk, content) -> text for one chunk
+        count_tokens: Token counter (default get_token_counter())
+        separator: Joins formatted chunks
+        overlap_threshold: Share of a chunk's word 5-grams already packed
+            above which it is dropped as a duplicate
+
+    Returns:
+        PackedContext
+    """
+    token_budget = token_budget or DEFAULT_TOKEN_BUDGET
+    format_chunk = format_chunk or _default_format
+    count_tokens = count_tokens or get_token_counter()
+    sep_tokens = count_tokens(separator) if separator else 0
+
+    ranked = sorted(chunks, key=lambda c: c.distance)
+
+    packed = PackedContext(text="")
+    parts, seen_shingles = [], set()
+    used = 0
+
+    for chunk in ranked:
+        text = format_chunk(len(parts) + 1, chunk, chunk.content)
+        tokens = count_tokens(text)
+        packed.tokens_before += tokens + (sep_tokens if packed.tokens_before else 0)
+
+        shingles = _shingles(chunk.content)
+        if shingles and len(shingles & seen_shingles) / len(shingles) >= overlap_threshold:
+            packed.duplicates_dropped += 1
+            continue
+
+        cost = tokens + (sep_tokens if parts else 0)
+        if used + cost <= token_budget:
+            parts.append(text)
+            packed.chunks.append(chunk)
+            seen_shingles |= shingles
+            used += cost
+            continue
+
+        remaining = token_budget - used - (sep_tokens if parts else 0)
+        if not packed.truncated and (remaining >= MIN_PARTIAL_TOKENS or not parts):
+            partial = _fit_sentences(len(parts) + 1, chunk, remaining, format_chunk, count_tokens)
+            if not partial and not parts:
+                # Never send an empty context: keep a hard-cut prefix of the top chunk
+                partial = _fit_prefix(len(parts) + 1, chunk, remaining, format_chunk, count_tokens)
+            if partial:
+                parts.append(partial)
+                packed.chunks.append(chunk)
+                seen_shingles |= shingles
+                used += count_tokens(partial) + (sep_tokens if len(parts) > 1 else 0)
+                packed.truncated = True
+                continue
+
+        packed.over_budget_dropped += 1
+
+    packed.text = separator.join(parts)
+    packed.tokens = used
+    return packed
+
+
+def _fit_sentences(position, chunk, budget, format_chunk, count_tokens) -> Optional[str]:
+    """Longest sentence prefix of the chunk whose formatted text fits in budget."""
+    sentences = _SENTENCE_RE.split(chunk.content.strip())
+    best = None
+
+    # Binary search over the number of leading sentences
+    lo, hi = 1, len(sentences) - 1
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        text = format_chunk(position, chunk, " ".join(sentences[:mid]) + " …")
+        if count_tokens(text) <= budget:
+            best, lo = text, mid + 1
+        else:
+            hi = mid - 1
+
+    return best
+
+
+def _fit_prefix(position, chunk, budget, format_chunk, count_tokens) -> str:
+    """Longest character prefix of the chunk that fits (at least one character)."""
+    content = chunk.content.strip()
+    best = format_chunk(position, chunk, content[:1] + " …")
+
+    lo, hi = 2, len(content) - 1
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        text = format_chunk(position, chunk, content[:mid].rstrip() + " …")
+        if count_tokens(text) <= budget:
+            best, lo = text, mid + 1
+        else:
+            hi = mid - 1
+
+    return best
+
+
+def _shingles(text: str, n: int = 5) -> set:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < n:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + n]) for i in range(len(words) - n + 1)}
+
+
+def _default_format(position: int, chunk, content: str) -> str:
+    page = chunk.page if chunk.page is not None else "N/A"
+    return f"[{position}] {chunk.file or 'Unknown'} (Page: {page})\n{content}"
@@ -0,0 +1,221 @@
+"""
+Embedding Backends - pluggable text → vector implementations
+
+Backends:
+    - openai  : OpenAI text-embedding-3-small (remote, default)
+    - local   : all-MiniLM-L6-v2 on ONNX runtime, CPU only (ships with chromadb)
+    - hashing : deterministic feature-hashing stand-in for tests / offline dev
+
+Select with EMBEDDING_BACKEND=openai|local|hashing.
+
+NOTE: vectors from different backends live in different spaces (and sizes).
+A Chroma collection must be queried with the same backend it was built with.
+
+Run this file directly for a p50/p99 latency benchmark of the backends.
+"""
+
+import asyncio
+import hashlib
+import math
+import os
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import List
+
+
+class EmbeddingBackend(ABC):
+    """Common interface used by DocumentRetriever."""
+
+    # Used (together with the text) as the embedding cache key
+    model_name: str = ""
+
+    @abstractmethod
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, returning one vector per input in the same order."""
+        raise NotImplementedError(
+            f"{self.__class__.__name__} must implement embed_batch()."
+        )
+
+    async def aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Async variant; CPU/sync backends run in a worker thread by default."""
+        return await asyncio.to_thread(self.embed_batch, texts)
+
+    def embed(self, text: str) -> List[float]:
+        return self.embed_batch([text])[0]
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}: {self.model_name}>"
+
+
+# ==========================================
+# REMOTE: OPENAI
+# ==========================================
+
+class OpenAIEmbeddingBackend(EmbeddingBackend):
+    def __init__(self, model: str = "text-embedding-3-small", api_key: str = None):
+        from openai import AsyncOpenAI, OpenAI
+
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.model_name = model
+        self.client = OpenAI(api_key=api_key)
+        self.async_client = AsyncOpenAI(api_key=api_key)
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+
+        resp = self.client.embeddings.create(model=self.model_name, input=list(texts))
+        # Response items carry their input index
+        return [d.embedding for d in sorted(resp.data, key=lambda d: d.index)]
+
+    async def aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+
+        resp = await self.async_client.embeddings.create(model=self.model_name, input=list(texts))
+        return [d.embedding for d in sorted(resp.data, key=lambda d: d.index)]
+
+
+# ==========================================
+# LOCAL: ONNX MiniLM (CPU)
+# ==========================================
+
+class LocalONNXEmbeddingBackend(EmbeddingBackend):
+    """
+    all-MiniLM-L6-v2 via chromadb's bundled ONNX runtime embedding function.
+
+    In air-gapped deployments pre-populate the model cache
+    (~/.cache/chroma/onnx_models) on a connected machine first.
+    """
+
+    def __init__(self):
+        from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+
+        self.model_name = "all-MiniLM-L6-v2-onnx"
+        self._ef = ONNXMiniLM_L6_V2(preferred_providers=["CPUExecutionProvider"])
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return [[float(x) for x in vec] for vec in self._ef(list(texts))]
+
+
+# ==========================================
+# TEST STAND-IN: FEATURE HASHING
+# ==========================================
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class HashingEmbeddingBackend(EmbeddingBackend):
+    """
+    Deterministic, dependency-free embeddings (signed feature hashing of
+    unigrams + bigrams, L2-normalized). Not semantic, but stable across
+    runs and machines, so retrieval code paths can be exercised offline.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.model_name = f"hashing-{dim}"
+
+    def _embed_one(self, text: str) -> List[float]:
+        vec = [0.0] * self.dim
+        tokens = _TOKEN_RE.findall(text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+        for feat in features:
+            digest = hashlib.md5(feat.encode("utf-8")).digest()
+            idx = int.from_bytes(digest[:4], "little") % self.dim
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vec[idx] += sign
+
+        norm = math.sqrt(sum(v * v for v in vec))
+        if norm:
+            vec = [v / norm for v in vec]
+        return vec
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed_one(t) for t in texts]
+
+
+# ==========================================
+# FACTORY
+# ==========================================
+
+BACKENDS = {
+    "openai": OpenAIEmbeddingBackend,
+    "local": LocalONNXEmbeddingBackend,
+    "onnx": LocalONNXEmbeddingBackend,
+    "hashing": HashingEmbeddingBackend,
+}
+
+
+def get_embedding_backend(name: str = None) -> EmbeddingBackend:
+    """
+    Build a backend by name (defaults to EMBEDDING_BACKEND env, then "openai").
+
+    Raises:
+        ValueError: If the name is unknown
+    """
+    name = (name or os.getenv("EMBEDDING_BACKEND", "openai")).lower().strip()
+
+    if name not in BACKENDS:
+        available = ", ".join(BACKENDS.keys())
+        raise ValueError(f"Unknown embedding backend '{name}'. Available: {available}")
+
+    return BACKENDS[name]()
+
+
+# ==========================================
+# BENCHMARK
+# ==========================================
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+def benchmark(backend: EmbeddingBackend, queries: List[str], rounds: int = 3) -> dict:
+    """Per-query latency (single-text calls, as on the retrieval path)."""
+    backend.embed(queries[0])  # warm-up (model load / TLS handshake)
+
+    latencies = []
+    for _ in range(rounds):
+        for q in queries:
+            t0 = time.perf_counter()
+            backend.embed(q)
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    return {
+        "backend": backend.model_name,
+        "calls": len(latencies),
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+    }
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    sample_queries = [
+        "What damage did cyclone Fani cause in Puri?",
+        "Principles of the Odisha disaster management policy",
+        "How many people were evacuated during Phailin?",
+        "Flood preparedness measures for coastal districts",
+        "Role of OSDMA in cyclone shelters",
+        "Compensation norms for crop loss after floods",
+        "Early warning dissemination for fishermen",
+        "Heatwave action plan Odisha",
+    ]
+
+    print("\n⏱️  Embedding backend latency (per single-query call)\n")
+    for name in ["hashing", "local", "openai"]:
+        try:
+            result = benchmark(get_embedding_backend(name), sample_queries)
+            print(f"{name:<8} p50={result['p50_ms']:>9.2f} ms   p99={result['p99_ms']:>9.2f} ms   ({result['calls']} calls)")
+        except Exception as e:
+            print(f"{name:<8} skipped: {e}")
@@ -0,0 +1,291 @@
+"""
+Embedding Cache - content-addressed cache for query embeddings
+
+Two tiers:
+    1) In-memory LRU (OrderedDict) for the hot set of recent queries
+    2) On-disk SQLite table shared across restarts / workers
+
+Keys are sha256(model + normalized text), so "Cyclone  Fani?" and
+"cyclone fani?" resolve to the same vector.
+
+The disk row count is tracked in memory and eviction trims a batch below
+the cap, so writes never scan the table. Disk hits refresh accessed_at
+at most once per TOUCH_INTERVAL per row, and those refreshes are
+written in batches.
+"""
+
+import atexit
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+def normalize_text(text: str) -> str:
+    """Casefold and collapse whitespace so trivially different queries share a key."""
+    return " ".join(str(text).split()).casefold()
+
+
+def make_key(model: str, text: str) -> str:
+    """Content-addressed cache key for (model, normalized text)."""
+    payload = f"{model}\x00{normalize_text(text)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    LRU + SQLite embedding cache with size/TTL eviction and hit/miss counters.
+
+    Vectors are stored on disk as packed float32 blobs.
+    """
+
+    TOUCH_INTERVAL = 300.0  # seconds; finer accessed_at doesn't change the eviction order much
+    TOUCH_BATCH = 64        # pending accessed_at updates before they are flushed
+    EVICT_FRACTION = 0.01   # eviction trims this share of max_disk_items below the cap
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_memory_items: int = 2048,
+        max_disk_items: int = 200_000,
+        ttl_seconds: Optional[float] = 30 * 24 * 3600,
+    ):
+        """
+        Args:
+            path: SQLite file for the disk tier (None → memory only)
+            max_memory_items: LRU capacity of the memory tier
+            max_disk_items: Row cap of the disk tier (oldest rows evicted first)
+            ttl_seconds: Entry lifetime (None → never expire)
+        """
+        self.path = path
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self.ttl_seconds = ttl_seconds
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._disk_count = 0
+        self._touched: Dict[str, float] = {}  # key -> accessed_at not yet written
+
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "memory_evictions": 0,  # memory LRU overflow (still on disk)
+            "disk_evictions": 0,    # rows trimmed by the max_disk_items cap
+            "expired": 0,
+        }
+
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_embeddings_accessed ON embeddings(accessed_at)"
+            )
+            self._conn.commit()
+            # Counted once; kept up to date by put / eviction / expiry
+            self._disk_count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            atexit.register(self.flush)
+
+    # ==========================================
+    # PUBLIC API
+    # ==========================================
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """Return the cached vector or None on miss."""
+        key = make_key(model, text)
+        now = time.time()
+
+        with self._lock:
+            # Tier 1: memory
+            entry = self._memory.get(key)
+            if entry is not None:
+                vector, created_at = entry
+                if self._is_expired(created_at, now):
+                    del self._memory[key]
+                    self.stats["expired"] += 1
+                else:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return vector
+
+            # Tier 2: disk
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT vector, created_at, accessed_at FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    blob, created_at, accessed_at = row
+                    if self._is_expired(created_at, now):
+                        self._touched.pop(key, None)
+                        self._disk_count -= self._conn.execute(
+                            "DELETE FROM embeddings WHERE key = ?", (key,)
+                        ).rowcount
+                        self._conn.commit()
+                        self.stats["expired"] += 1
+                    else:
+                        self._touch(key, accessed_at, now)
+                        vector = _unpack(blob)
+                        self._remember(key, vector, created_at)
+                        self.stats["disk_hits"] += 1
+                        return vector
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, model: str, text: str, vector: List[float]) -> None:
+        """Store a vector in both tiers."""
+        key = make_key(model, text)
+        now = time.time()
+        vector = list(vector)
+
+        with self._lock:
+            self._remember(key, vector, now)
+
+            if self._conn is not None:
+                self._touched.pop(key, None)
+                inserted = self._conn.execute(
+                    "INSERT OR IGNORE INTO embeddings (key, model, vector, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, model, _pack(vector), now, now),
+                ).rowcount
+                if inserted:
+                    self._disk_count += 1
+                else:
+                    self._conn.execute(
+                        "UPDATE embeddings SET model = ?, vector = ?, created_at = ?, accessed_at = ? "
+                        "WHERE key = ?",
+                        (model, _pack(vector), now, now, key),
+                    )
+                # Pending touches ride along with this commit and count for eviction
+                self._flush_touches(commit=False)
+                self._evict_disk()
+                self._conn.commit()
+
+            self.stats["writes"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM embeddings")
+                self._conn.commit()
+                self._disk_count = 0
+
+    def flush(self) -> None:
+        """Write pending accessed_at updates (also runs at interpreter exit)."""
+        with self._lock:
+            if self._conn is not None:
+                self._flush_touches()
+
+    def get_stats(self) -> Dict:
+        """Counters plus derived hit rate."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_items"] = len(self._memory)
+            stats["disk_items"] = self._disk_count
+
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        return stats
+
+    # ==========================================
+    # INTERNALS (caller holds the lock)
+    # ==========================================
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and (now - created_at) > self.ttl_seconds
+
+    def _remember(self, key: str, vector: List[float], created_at: float) -> None:
+        self._memory[key] = (vector, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+            self.stats["memory_evictions"] += 1
+
+    def _touch(self, key: str, accessed_at: float, now: float) -> None:
+        """Queue an accessed_at refresh, skipping rows touched recently."""
+        if now - accessed_at < self.TOUCH_INTERVAL:
+            return
+        self._touched[key] = now
+        if len(self._touched) >= self.TOUCH_BATCH:
+            self._flush_touches()
+
+    def _flush_touches(self, commit: bool = True) -> None:
+        if not self._touched:
+            return
+        self._conn.executemany(
+            "UPDATE embeddings SET accessed_at = ? WHERE key = ?",
+            [(accessed_at, key) for key, accessed_at in self._touched.items()],
+        )
+        self._touched.clear()
+        if commit:
+            self._conn.commit()
+
+    def _evict_disk(self) -> None:
+        """Once over the cap, drop the least recently used rows down to a batch below it."""
+        if self._disk_count <= self.max_disk_items:
+            return
+
+        batch = max(1, int(self.max_disk_items * self.EVICT_FRACTION))
+        target = max(self.max_disk_items - batch, 0)
+        removed = self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN ("
+            "SELECT key FROM embeddings ORDER BY accessed_at ASC LIMIT ?)",
+            (self._disk_count - target,),
+        ).rowcount
+        self._disk_count -= removed
+        self.stats["disk_evictions"] += removed
+
+
+def _pack(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> List[float]:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+
+def cache_from_env(persist_dir: str) -> EmbeddingCache:
+    """
+    Build the cache from environment config.
+
+    EMBEDDING_CACHE_PATH      : SQLite file ("" disables the disk tier)
+    EMBEDDING_CACHE_MAX_ITEMS : memory tier capacity
+    EMBEDDING_CACHE_MAX_DISK  : disk tier capacity
+    EMBEDDING_CACHE_TTL       : seconds, 0 → never expire
+    """
+    default_path = os.path.join(
+        os.path.dirname(os.path.abspath(persist_dir)), ".cache", "embeddings.sqlite3"
+    )
+    path = os.getenv("EMBEDDING_CACHE_PATH", default_path) or None
+    ttl = float(os.getenv("EMBEDDING_CACHE_TTL", str(30 * 24 * 3600)))
+
+    return EmbeddingCache(
+        path=path,
+        max_memory_items=int(os.getenv("EMBEDDING_CACHE_MAX_ITEMS", "2048")),
+        max_disk_items=int(os.getenv("EMBEDDING_CACHE_MAX_DISK", "200000")),
+        ttl_seconds=ttl or None,
+    )
@@ -0,0 +1,604 @@
+"""
+Ingest - build / update the pdf_documents Chroma collection
+
+Streams PDFs page by page, splits pages into overlapping chunks, embeds
+them in large batches (several batches in flight at once) and upserts them
+with the metadata DocumentRetriever reads:
+
+    filename     : PDF path relative to the folder it was found in
+                   (just the file name for PDFs given directly)
+    page_number  : 1-based page number
+
+Uses the same embedding backend as the retriever (EMBEDDING_BACKEND), so
+the collection is queried in the space it was built in.
+
+INCREMENTAL: a manifest next to the collection (chroma_db/ingest_manifest.json)
+records each file's sha256 and its chunk ids, keyed like `filename`
+(two inputs with the same key are refused). Chunk ids are content
+addressed (hash of filename, page and text), so on re-runs:
+
+    unchanged file        → skipped without parsing
+    changed file          → only chunks with new ids are embedded,
+                            chunks that disappeared are deleted
+    file not in manifest  → its old chunks (if any) are replaced
+    --prune               → files missing from the input are removed
+
+PARALLEL EXTRACTION: PyPDF2 text extraction is pure Python, so pages are
+extracted in a process pool (--workers, default: CPU count) in page
+ranges, reassembled in page order, with a bounded number of ranges in
+flight: when embedding falls behind, extraction waits.
+
+Usage:
+    python ingest.py data/pdfs/                       # all PDFs in a folder
+    python ingest.py data/pdfs/ --prune               # nightly refresh
+    python ingest.py report1.pdf report2.pdf --reset  # rebuild from scratch
+    python ingest.py data/pdfs/ --batch-size 256 --concurrency 4
+    python ingest.py data/pdfs/ --bench-extract --workers 8  # extraction scaling
+"""
+
+import argparse
+import asyncio
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from chromadb import PersistentClient
+from PyPDF2 import PdfReader
+
+from embedding_backends import EmbeddingBackend, get_embedding_backend
+
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_PERSIST_DIR = os.path.join(PROJECT_ROOT, "chroma_db")
+MANIFEST_NAME = "ingest_manifest.json"
+MANIFEST_VERSION = 2  # v2: files keyed by relative path instead of basename
+
+_WHITESPACE_RE = re.compile(r"[ \t]+")
+
+
+# ==========================================
+# READ + CHUNK
+# ==========================================
+
+def find_pdfs(paths) -> list:
+    """
+    Expand folders into their PDFs (recursively), keep files as given.
+
+    Returns:
+        [(path, source)] where source is the PDF's path relative to the
+        folder it was found in ("/"-separated), or its file name for a
+        PDF given directly. Sources key the manifest and chunk metadata.
+
+    Raises:
+        ValueError: If two PDFs resolve to the same source
+    """
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for pdf in sorted(glob.glob(os.path.join(path, "**", "*.pdf"), recursive=True)):
+                found.append((pdf, os.path.relpath(pdf, path).replace(os.sep, "/")))
+        else:
+            found.append((path, os.path.basename(path)))
+
+    owners = {}
+    for pdf, source in found:
+        owners.setdefault(source, []).append(pdf)
+    clashes = {source: pdfs for source, pdfs in owners.items() if len(pdfs) > 1}
+    if clashes:
+        details = "; ".join(f"{source}: {', '.join(pdfs)}" for source, pdfs in clashes.items())
+        raise ValueError(f"PDFs with the same relative path would overwrite each other ({details})")
+
+    return found
+
+
+def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> list:
+    """
+    Split page text into ~chunk_size character chunks with `overlap`
+    characters shared between neighbours, breaking on whitespace.
+    """
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+    if not text:
+        return []
+    if len(text) <= chunk_size:
+        return [text]
+
+    chunks, start = [], 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            # Back up to the last whitespace so words stay whole
+            space = text.rfind(" ", start + chunk_size // 2, end)
+            end = space if space != -1 else end
+
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+
+        next_start = max(end - overlap, start + 1)
+        space = text.find(" ", next_start, end)
+        start = space + 1 if space != -1 else next_start
+
+    return [c for c in chunks if c]
+
+
+def chunk_id(filename: str, page_number: int, text: str) -> str:
+    """Content-addressed id: same file, page and text → same id."""
+    payload = f"{filename}\x00{page_number}\x00{text}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:32]
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ==========================================
+# PAGE EXTRACTION (PROCESS POOL)
+# ==========================================
+
+def _count_pages(pdf_path: str) -> int:
+    return len(PdfReader(pdf_path).pages)
+
+
+def _extract_page_range(pdf_path: str, start: int, stop: int) -> list:
+    """Worker: text of pages [start, stop). Opens the PDF itself (readers don't pickle)."""
+    reader = PdfReader(pdf_path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+class PageExtractor:
+    """
+    Extracts PDF pages on several cores, yielding them in page order.
+
+    Pages go out in ranges of `pages_per_task` (amortizes re-opening the
+    PDF in the worker); at most `max_pending` ranges are queued, so a slow
+    consumer stalls extraction instead of buffering the whole file.
+    By default a single worker extracts in a thread instead of a process.
+    """
+
+    def __init__(self, workers: int = None, pages_per_task: int = 8,
+                 max_pending: int = None, processes: bool = None):
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.pages_per_task = pages_per_task
+        self.max_pending = max_pending or max(2 * self.workers, 2)
+
+        if processes is None:
+            processes = self.workers > 1
+        # spawn, not fork: the parent holds Chroma / embedding client threads and locks
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+        ) if processes else None
+
+    async def _run(self, fn, *args):
+        if self._pool is None:
+            return await asyncio.to_thread(fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+
+    async def iter_pages(self, pdf_path: str):
+        """Yield (page_number, text), 1-based, in order."""
+        num_pages = await self._run(_count_pages, pdf_path)
+        ranges = deque(
+            (start, min(start + self.pages_per_task, num_pages))
+            for start in range(0, num_pages, self.pages_per_task)
+        )
+        pending = deque()
+
+        try:
+            while ranges or pending:
+                # Back-pressure: only top up while the consumer keeps pulling
+                while ranges and len(pending) < self.max_pending:
+                    start, stop = ranges.popleft()
+                    pending.append((start, asyncio.ensure_future(self._run(_extract_page_range, pdf_path, start, stop))))
+
+                # Ordered reassembly: always wait on the oldest range
+                start, future = pending.popleft()
+                for offset, text in enumerate(await future):
+                    yield start + offset + 1, text
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def iter_page_chunks(pdf_path: str, chunk_size: int, overlap: int, extractor: PageExtractor,
+                           source: str = None):
+    """
+    Yield (id, text, metadata) for every chunk of a PDF, one page at a time.
+
+    `source` (see find_pdfs, default: file name) is stored as the chunk's
+    filename. Extraction runs off the event loop (PageExtractor), which
+    keeps serving in-flight embedding requests.
+    """
+    filename = source or os.path.basename(pdf_path)
+
+    async for page_number, text in extractor.iter_pages(pdf_path):
+        seen = set()
+
+        for chunk in chunk_text(text, chunk_size, overlap):
+            cid = chunk_id(filename, page_number, chunk)
+            if cid in seen:  # identical text twice on one page
+                continue
+            seen.add(cid)
+            yield (
+                cid,
+                chunk,
+                {"filename": filename, "page_number": page_number},
+            )
+
+        yield None  # page boundary marker (for page counting)
+
+
+# ==========================================
+# MANIFEST
+# ==========================================
+
+def load_manifest(path: str, settings: dict) -> dict:
+    """
+    Manifest for `settings` (embedding model, collection, chunking).
+
+    Missing, unreadable or built with other settings → empty manifest, so
+    every file is re-indexed. The chunk ids of a replaced manifest are
+    kept under "stale_chunks" for the caller to delete (its keys may not
+    match today's filenames).
+    """
+    fresh = {"version": MANIFEST_VERSION, "settings": settings, "files": {}}
+
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return fresh
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Unreadable manifest {path} ({e}); re-indexing everything")
+        return fresh
+
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("settings") != settings:
+        print("ℹ️  Manifest format / embedding model / chunking changed since the last run; re-indexing everything")
+        fresh["stale_chunks"] = [cid for entry in manifest.get("files", {}).values() for cid in entry.get("chunks", [])]
+        return fresh
+
+    return manifest
+
+
+def save_manifest(path: str, manifest: dict) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+# ==========================================
+# EMBED + UPSERT
+# ==========================================
+
+class Ingestor:
+    def __init__(
+        self,
+        persist_dir: str = DEFAULT_PERSIST_DIR,
+        collection_name: str = None,
+        backend: EmbeddingBackend = None,
+        batch_size: int = 128,
+        concurrency: int = 4,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        reset: bool = False,
+        manifest_path: str = None,
+        prune: bool = False,
+        workers: int = None
+    ):
+        """
+        Args:
+            persist_dir: Chroma directory
+            collection_name: Target collection (default RAG_COLLECTION / pdf_documents)
+            backend: Embedding backend (default EMBEDDING_BACKEND)
+            batch_size: Chunks per embedding request
+            concurrency: Embedding batches in flight at once
+            chunk_size: Target chunk length in characters
+            chunk_overlap: Characters shared by neighbouring chunks
+            reset: Drop the collection (and manifest) first
+            manifest_path: Content-hash manifest (default <persist_dir>/ingest_manifest.json)
+            prune: Remove indexed files that are not part of this run
+            workers: Page-extraction processes (default: CPU count)
+        """
+        self.backend = backend or get_embedding_backend()
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.prune = prune
+        self.extractor = PageExtractor(workers)
+
+        name = collection_name or os.getenv("RAG_COLLECTION", "pdf_documents")
+        client = PersistentClient(path=persist_dir)
+
+        if reset:
+            try:
+                client.delete_collection(name)
+            except Exception:
+                pass
+
+        self.collection = client.get_or_create_collection(
+            name=name,
+            embedding_function=None,
+            metadata={"embedding_model": self.backend.model_name}
+        )
+
+        existing = (self.collection.metadata or {}).get("embedding_model")
+        if existing and existing != self.backend.model_name:
+            raise ValueError(
+                f"Collection '{name}' was built with '{existing}', "
+                f"not '{self.backend.model_name}'. Use the same EMBEDDING_BACKEND or --reset."
+            )
+
+        self.manifest_path = manifest_path or os.path.join(persist_dir, MANIFEST_NAME)
+        settings = {
+            "collection": name,
+            "embedding_model": self.backend.model_name,
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+        }
+        if reset and os.path.exists(self.manifest_path):
+            os.remove(self.manifest_path)
+        self.manifest = load_manifest(self.manifest_path, settings)
+
+        self.stats = {
+            "files": 0,
+            "files_unchanged": 0,
+            "files_failed": 0,
+            "files_pruned": 0,
+            "pages": 0,
+            "chunks": 0,          # embedded + upserted
+            "chunks_reused": 0,   # already indexed, not re-embedded
+            "chunks_deleted": 0,
+            "batches": 0,
+            "batches_failed": 0,
+        }
+
+    async def ingest(self, pdfs: list) -> dict:
+        """
+        Ingest PDFs; returns stats incl. pages/sec and embeddings/sec.
+
+        Args:
+            pdfs: [(path, source)] as returned by find_pdfs
+        """
+        try:
+            return await self._ingest(pdfs)
+        finally:
+            self.extractor.close()
+
+    async def _ingest(self, pdfs: list) -> dict:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = []  # (task, filenames in the batch); every batch, so no failure goes unnoticed
+        batch = []
+        files = self.manifest["files"]
+        seen_files = set()
+        failed_files = set()  # read or embedding failed: no manifest entry
+        indexed = {}  # filename -> manifest entry, recorded once all its batches landed
+        start = time.perf_counter()
+
+        async def submit(items):
+            # Back-pressure: wait for a free slot before reading further
+            await semaphore.acquire()
+            task = asyncio.create_task(self._embed_and_upsert(items, semaphore))
+            tasks.append((task, {meta["filename"] for _, _, meta in items}))
+
+        # Chunks of a replaced manifest: its keys can't be matched to today's files
+        replaced = self.manifest.pop("stale_chunks", [])
+        for i in range(0, len(replaced), 5000):
+            await asyncio.to_thread(self.collection.delete, ids=replaced[i:i + 5000])
+        self.stats["chunks_deleted"] += len(replaced)
+
+        for path, filename in pdfs:
+            seen_files.add(filename)
+
+            try:
+                sha = await asyncio.to_thread(file_sha256, path)
+                entry = files.get(filename)
+
+                if entry is not None and entry["sha256"] == sha:
+                    self.stats["files_unchanged"] += 1
+                    continue
+
+                if entry is None:
+                    # Unknown to the manifest: drop whatever an older build indexed
+                    old_ids = set()
+                    await asyncio.to_thread(self.collection.delete, where={"filename": filename})
+                else:
+                    old_ids = set(entry["chunks"])
+
+                current_ids = []
+                async for item in iter_page_chunks(path, self.chunk_size, self.chunk_overlap, self.extractor, filename):
+                    if item is None:
+                        self.stats["pages"] += 1
+                        continue
+
+                    current_ids.append(item[0])
+                    if item[0] in old_ids:
+                        self.stats["chunks_reused"] += 1
+                        continue
+
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        await submit(batch)
+                        batch = []
+            except Exception as e:
+                # Some of its chunks may already be upserted: treat it like a
+                # failed batch, so the next run replaces them from scratch
+                print(f"⚠️  Skipping {path}: {e}")
+                failed_files.add(filename)
+                batch = [item for item in batch if item[2]["filename"] != filename]
+                continue
+
+            removed = old_ids.difference(current_ids)
+            if removed:
+                await asyncio.to_thread(self.collection.delete, ids=list(removed))
+                self.stats["chunks_deleted"] += len(removed)
+
+            indexed[filename] = {"sha256": sha, "chunks": current_ids}
+            print(f"📄 {filename} read ({self.stats['pages']} pages so far)")
+
+        if self.prune:
+            for filename in [f for f in files if f not in seen_files]:
+                stale = files.pop(filename)["chunks"]
+                if stale:
+                    await asyncio.to_thread(self.collection.delete, ids=stale)
+                self.stats["chunks_deleted"] += len(stale)
+                self.stats["files_pruned"] += 1
+
+        if batch:
+            await submit(batch)
+
+        results = await asyncio.gather(*(task for task, _ in tasks), return_exceptions=True)
+        for (_, batch_files), result in zip(tasks, results):
+            if isinstance(result, BaseException):
+                self.stats["batches_failed"] += 1
+                failed_files |= batch_files
+                print(f"❌ Embedding batch failed ({', '.join(sorted(batch_files))}): {result!r}")
+
+        # A file is recorded only if it was read completely and all of its
+        # batches landed. A failed one loses its entry, so the next run
+        # replaces its chunks from scratch.
+        for filename in failed_files:
+            files.pop(filename, None)
+        self.stats["files_failed"] += len(failed_files)
+
+        for filename, entry in indexed.items():
+            if filename not in failed_files:
+                files[filename] = entry
+                self.stats["files"] += 1
+
+        save_manifest(self.manifest_path, self.manifest)
+
+        elapsed = time.perf_counter() - start
+        self.stats["seconds"] = round(elapsed, 2)
+        self.stats["pages_per_sec"] = round(self.stats["pages"] / elapsed, 2) if elapsed else 0.0
+        self.stats["embeddings_per_sec"] = round(self.stats["chunks"] / elapsed, 2) if elapsed else 0.0
+        return self.stats
+
+    async def _embed_and_upsert(self, items: list, semaphore: asyncio.Semaphore):
+        try:
+            ids = [i for i, _, _ in items]
+            texts = [t for _, t, _ in items]
+            metadatas = [m for _, _, m in items]
+
+            embeddings = await self.backend.aembed_batch(texts)
+            await asyncio.to_thread(
+                self.collection.upsert,
+                ids=ids,
+                documents=texts,
+                metadatas=metadatas,
+                embeddings=embeddings
+            )
+
+            self.stats["chunks"] += len(items)
+            self.stats["batches"] += 1
+        finally:
+            semaphore.release()
+
+
+def benchmark_extraction(pdf_paths: list, max_workers: int = None):
+    """Extraction-only pages/sec for 1, 2, 4, ... max_workers processes."""
+    max_workers = max_workers or os.cpu_count() or 1
+    counts = sorted({1, max_workers} | {2 ** i for i in range(1, max_workers.bit_length()) if 2 ** i < max_workers})
+
+    async def extract_all(extractor):
+        pages = 0
+        for path in pdf_paths:
+            async for _ in extractor.iter_pages(path):
+                pages += 1
+        return pages
+
+    print(f"\n⏱️  Extraction scaling over {len(pdf_paths)} PDFs")
+    baseline = None
+    for workers in counts:
+        # workers=1 still runs in a (one-process) pool, so the numbers compare
+        extractor = PageExtractor(workers, processes=True)
+        try:
+            start = time.perf_counter()
+            pages = asyncio.run(extract_all(extractor))
+            elapsed = time.perf_counter() - start
+        finally:
+            extractor.close()
+
+        rate = pages / elapsed if elapsed else 0.0
+        baseline = baseline or rate
+        print(f"  workers={workers:>3}: {pages} pages in {elapsed:6.2f} s | {rate:8.1f} pages/sec | {rate / baseline:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the pdf_documents Chroma collection from PDFs")
+    parser.add_argument("paths", nargs="+", help="PDF files and/or folders of PDFs")
+    parser.add_argument("--persist-dir", default=DEFAULT_PERSIST_DIR)
+    parser.add_argument("--collection", default=None, help="default: RAG_COLLECTION or pdf_documents")
+    parser.add_argument("--batch-size", type=int, default=128)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--reset", action="store_true", help="drop the collection before ingesting")
+    parser.add_argument("--prune", action="store_true", help="remove indexed PDFs that are not in the given paths")
+    parser.add_argument("--manifest", default=None, help="default: <persist-dir>/ingest_manifest.json")
+    parser.add_argument("--workers", type=int, default=None, help="page-extraction processes (default: CPU count)")
+    parser.add_argument("--bench-extract", action="store_true", help="benchmark extraction for 1..--workers processes and exit")
+    args = parser.parse_args()
+
+    try:
+        pdfs = find_pdfs(args.paths)
+    except ValueError as e:
+        parser.error(str(e))
+    if not pdfs:
+        parser.error("no PDFs found")
+
+    if args.bench_extract:
+        benchmark_extraction([path for path, _ in pdfs], args.workers)
+        return
+
+    ingestor = Ingestor(
+        persist_dir=args.persist_dir,
+        collection_name=args.collection,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        reset=args.reset,
+        manifest_path=args.manifest,
+        prune=args.prune,
+        workers=args.workers
+    )
+
+    print(f"\n🔧 Ingesting {len(pdfs)} PDFs with {ingestor.backend}\n")
+    stats = asyncio.run(ingestor.ingest(pdfs))
+
+    print("\n✅ Ingestion done")
+    print(
+        f"Files: {stats['files']} indexed, {stats['files_unchanged']} unchanged, "
+        f"{stats['files_failed']} failed, {stats['files_pruned']} pruned | "
+        f"Pages: {stats['pages']}"
+    )
+    print(
+        f"Chunks: {stats['chunks']} embedded, {stats['chunks_reused']} reused, "
+        f"{stats['chunks_deleted']} deleted | Batches: {stats['batches']}"
+    )
+    print(f"Time: {stats['seconds']} s | {stats['pages_per_sec']} pages/sec | {stats['embeddings_per_sec']} embeddings/sec")
+
+    if stats["batches_failed"]:
+        sys.exit(
+            f"❌ {stats['batches_failed']} of {stats['batches_failed'] + stats['batches']} batches failed; "
+            f"{stats['files_failed']} files will be re-indexed on the next run"
+        )
+
+
+if __name__ == "__main__":
+    main()
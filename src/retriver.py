@@ -1,69 +1,307 @@
-import os
-from dotenv import load_dotenv
-from openai import OpenAI
-import chromadb
-from chromadb import PersistentClient
-
-load_dotenv()
-
-class DocumentRetriever:
-    def __init__(self, persist_dir="../chroma_db"):
-        # OpenAI
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-        # NEW Chroma Client
-        self.chroma_client = PersistentClient(path=persist_dir)
-
-        # Load collection
-        self.collection = self.chroma_client.get_collection(
-            name="pdf_documents",
-            embedding_function=None
-        )
-
-    def embed(self, text):
-        resp = self.client.embeddings.create(
-            model="text-embedding-3-small",
-            input=text
-        )
-        return resp.data[0].embedding
-
-    def get_top_k(self, query, k=5):
-        query_embedding = self.embed(query)
-
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=k
-        )
-
-        final = []
-        for doc, meta, dist in zip(
-            results["documents"][0],
-            results["metadatas"][0],
-            results["distances"][0]
-        ):
-            final.append({
-                "content": doc,
-                "file": meta.get("filename"),
-                "page": meta.get("page_number"),
-                "distance": dist
-            })
-
-        return final
-
-
-# TEST BLOCK
-if __name__ == "__main__":
-    retriever = DocumentRetriever()
-
-    query = "What are the “Principles of the Disaster Management Policy” according to the Orissa Government?"
-    print(f"\n🔍 Query: {query}\n")
-
-    results = retriever.get_top_k(query, k=5)
-
-    print("📌 Top 5 Retrievals:\n")
-
-    for i, r in enumerate(results, 1):
-        print(f"Result {i}:")
-        print(f"File: {r['file']}, Page: {r['page']}")
-        print(f"Text: {r['content'][:300]}...")
-        print("-" * 50)
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from dotenv import load_dotenv
+import chromadb
+from chromadb import PersistentClient
+
+from embedding_backends import EmbeddingBackend, get_embedding_backend
+from embedding_cache import EmbeddingCache, cache_from_env, normalize_text
+
+load_dotenv()
+
+
+@dataclass(slots=True)
+class RetrievedChunk:
+    """One retrieved chunk (compact; formatted for prompts only once)."""
+    content: str
+    file: Optional[str]
+    page: Optional[int]
+    distance: float
+    chunk_id: Optional[str] = None
+
+    @property
+    def relevance(self) -> float:
+        """0..1, higher = closer. Monotone in distance, whatever the Chroma metric."""
+        return 1.0 / (1.0 + max(self.distance, 0.0))
+
+
+def mmr_select(query_embedding, candidate_embeddings, k, lambda_mult=0.5):
+    """
+    Maximal marginal relevance over candidates (vectorized, cosine).
+
+    Picks k indices, each maximizing
+        lambda_mult * sim(query, c) - (1 - lambda_mult) * max sim(c, already picked)
+
+    Returns:
+        Candidate indices in selection order
+    """
+    candidates = np.asarray(candidate_embeddings, dtype=np.float32)
+    n = len(candidates)
+    if n == 0 or k <= 0:
+        return []
+
+    candidates = candidates / np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query = query / max(np.linalg.norm(query), 1e-12)
+
+    query_sim = candidates @ query
+    max_redundancy = np.full(n, -np.inf, dtype=np.float32)
+    picked = np.zeros(n, dtype=bool)
+    selected = []
+
+    for _ in range(min(k, n)):
+        if selected:
+            scores = lambda_mult * query_sim - (1.0 - lambda_mult) * max_redundancy
+        else:
+            scores = query_sim.copy()
+        scores[picked] = -np.inf
+
+        best = int(np.argmax(scores))
+        selected.append(best)
+        picked[best] = True
+        # One row of the similarity matrix per pick, not the full n×n
+        max_redundancy = np.maximum(max_redundancy, candidates @ candidates[best])
+
+    return selected
+
+
+class DocumentRetriever:
+    def __init__(
+        self,
+        persist_dir="../chroma_db",
+        cache: EmbeddingCache = None,
+        backend: EmbeddingBackend = None,
+        collection_name: str = None,
+        mmr_fetch_k: int = None,
+        mmr_lambda: float = None
+    ):
+        # Embedding backend (EMBEDDING_BACKEND=openai|local|hashing)
+        self.backend = backend or get_embedding_backend()
+        self.embedding_model = self.backend.model_name
+
+        # Embedding cache (memory LRU + SQLite)
+        self.cache = cache if cache is not None else cache_from_env(persist_dir)
+
+        # MMR reranking defaults (fetch_k <= k → plain top-k)
+        self.mmr_fetch_k = mmr_fetch_k if mmr_fetch_k is not None else int(os.getenv("RAG_MMR_FETCH_K", "0"))
+        self.mmr_lambda = mmr_lambda if mmr_lambda is not None else float(os.getenv("RAG_MMR_LAMBDA", "0.5"))
+
+        # NEW Chroma Client
+        self.chroma_client = PersistentClient(path=persist_dir)
+
+        # Load collection (must be built with the same embedding backend)
+        self.collection = self.chroma_client.get_collection(
+            name=collection_name or os.getenv("RAG_COLLECTION", "pdf_documents"),
+            embedding_function=None
+        )
+
+    def embed(self, text):
+        return self.embed_batch([text])[0]
+
+    def embed_batch(self, texts):
+        """
+        Embed many texts with at most ONE embeddings request.
+
+        Cached texts are served from the cache; the remaining (deduplicated)
+        texts go to the embedding backend in a single batched call.
+        """
+        embeddings, pending = self._lookup_cached(texts)
+
+        if pending:
+            miss_texts = [texts[idx[0]] for idx in pending.values()]
+            vectors = self.backend.embed_batch(miss_texts)
+            self._store_misses(embeddings, pending, miss_texts, vectors)
+
+        return embeddings
+
+    async def aembed_batch(self, texts):
+        """Async variant of embed_batch (non-blocking backend call)."""
+        embeddings, pending = self._lookup_cached(texts)
+
+        if pending:
+            miss_texts = [texts[idx[0]] for idx in pending.values()]
+            vectors = await self.backend.aembed_batch(miss_texts)
+            self._store_misses(embeddings, pending, miss_texts, vectors)
+
+        return embeddings
+
+    def _lookup_cached(self, texts):
+        embeddings = [self.cache.get(self.embedding_model, t) for t in texts]
+
+        # Unique misses, preserving first-seen order
+        pending = {}
+        for i, (text, emb) in enumerate(zip(texts, embeddings)):
+            if emb is None:
+                pending.setdefault(normalize_text(text), []).append(i)
+
+        return embeddings, pending
+
+    def _store_misses(self, embeddings, pending, miss_texts, vectors):
+        for text, vector in zip(miss_texts, vectors):
+            self.cache.put(self.embedding_model, text, vector)
+            for i in pending[normalize_text(text)]:
+                embeddings[i] = vector
+
+    def get_top_k(self, query, k=5, fetch_k=None, lambda_mult=None, query_embedding=None):
+        embeddings = [query_embedding] if query_embedding is not None else None
+        return self.get_top_k_batch(
+            [query], k=k, fetch_k=fetch_k, lambda_mult=lambda_mult, query_embeddings=embeddings
+        )[0]
+
+    def get_top_k_batch(self, queries, k=5, fetch_k=None, lambda_mult=None, query_embeddings=None):
+        """
+        Retrieve top-k chunks for several queries in one round trip.
+
+        Args:
+            queries: List of query strings
+            k: Results per query
+            fetch_k: Candidate pool for MMR reranking; MMR runs only when
+                fetch_k > k (default RAG_MMR_FETCH_K, 0 = off)
+            lambda_mult: MMR trade-off, 1 = pure relevance, 0 = pure
+                diversity (default RAG_MMR_LAMBDA)
+            query_embeddings: Optional precomputed embeddings (e.g. from
+                the semantic router); skips the embedding step
+
+        Returns:
+            List (one entry per query) of RetrievedChunk lists
+        """
+        if not queries:
+            return []
+
+        if query_embeddings is None:
+            query_embeddings = self.embed_batch(list(queries))
+
+        fetch_k = self._fetch_k(k, fetch_k)
+        results = self._query(query_embeddings, k, fetch_k)
+
+        return self._select(results, query_embeddings, k, fetch_k, lambda_mult)
+
+    async def aget_top_k(self, query, k=5, fetch_k=None, lambda_mult=None, query_embedding=None):
+        embeddings = [query_embedding] if query_embedding is not None else None
+        return (await self.aget_top_k_batch(
+            [query], k=k, fetch_k=fetch_k, lambda_mult=lambda_mult, query_embeddings=embeddings
+        ))[0]
+
+    async def aget_top_k_batch(self, queries, k=5, fetch_k=None, lambda_mult=None, query_embeddings=None):
+        """
+        Async get_top_k_batch: awaits the embedding call and runs the
+        (sync, local) Chroma query in a worker thread.
+        """
+        if not queries:
+            return []
+
+        if query_embeddings is None:
+            query_embeddings = await self.aembed_batch(list(queries))
+
+        fetch_k = self._fetch_k(k, fetch_k)
+        results = await asyncio.to_thread(self._query, query_embeddings, k, fetch_k)
+
+        return self._select(results, query_embeddings, k, fetch_k, lambda_mult)
+
+    # ==========================================
+    # QUERY + MMR HELPERS
+    # ==========================================
+
+    def _fetch_k(self, k, fetch_k):
+        fetch_k = self.mmr_fetch_k if fetch_k is None else fetch_k
+        return fetch_k if fetch_k and fetch_k > k else None
+
+    def _query(self, query_embeddings, k, fetch_k):
+        if fetch_k is None:
+            return self.collection.query(query_embeddings=query_embeddings, n_results=k)
+
+        # MMR needs the candidates' vectors
+        return self.collection.query(
+            query_embeddings=query_embeddings,
+            n_results=fetch_k,
+            include=["documents", "metadatas", "distances", "embeddings"]
+        )
+
+    def _select(self, results, query_embeddings, k, fetch_k, lambda_mult):
+        if fetch_k is None:
+            return [self._format_results(results, i) for i in range(len(query_embeddings))]
+
+        lambda_mult = self.mmr_lambda if lambda_mult is None else lambda_mult
+        return [
+            self._format_results(
+                results, i,
+                mmr_select(query_embeddings[i], results["embeddings"][i], k, lambda_mult)
+            )
+            for i in range(len(query_embeddings))
+        ]
+
+    @staticmethod
+    def _format_results(results, i, order=None):
+        rows = list(zip(
+            results["ids"][i],
+            results["documents"][i],
+            results["metadatas"][i],
+            results["distances"][i]
+        ))
+        if order is not None:
+            rows = [rows[j] for j in order]
+
+        return [
+            RetrievedChunk(
+                content=doc,
+                file=meta.get("filename"),
+                page=meta.get("page_number"),
+                distance=dist,
+                chunk_id=chunk_id
+            )
+            for chunk_id, doc, meta, dist in rows
+        ]
+
+
+def benchmark_mmr(dim=1536, k=5, pools=(10, 20, 50, 100), repeats=200):
+    """Latency of the MMR stage alone over synthetic candidates."""
+    rng = np.random.default_rng(0)
+    query = rng.standard_normal(dim)
+
+    print(f"\nMMR overhead (dim={dim}, k={k}, {repeats} runs)")
+    for fetch_k in pools:
+        candidates = rng.standard_normal((fetch_k, dim)).astype(np.float32)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            mmr_select(query, candidates, k)
+        elapsed = (time.perf_counter() - start) / repeats * 1000
+        print(f"  fetch_k={fetch_k:>4}: {elapsed:.3f} ms per query")
+
+
+# TEST BLOCK:  python retriver.py [--bench-mmr]
+if __name__ == "__main__":
+    import sys
+
+    if "--bench-mmr" in sys.argv:
+        benchmark_mmr()
+
+    retriever = DocumentRetriever()
+
+    query = "What are the “Principles of the Disaster Management Policy” according to the Orissa Government?"
+    print(f"\n🔍 Query: {query}\n")
+
+    results = retriever.get_top_k(query, k=5)
+
+    print("📌 Top 5 Retrievals:\n")
+
+    for i, r in enumerate(results, 1):
+        print(f"Result {i}:")
+        print(f"File: {r.file}, Page: {r.page}, Distance: {r.distance:.4f}")
+        print(f"Text: {r.content[:300]}...")
+        print("-" * 50)
+
+    if "--bench-mmr" in sys.argv:
+        # End to end, query embedding cached after the first call
+        runs = 50
+        for label, fetch_k in (("plain top-k", 0), ("MMR fetch_k=20", 20)):
+            start = time.perf_counter()
+            for _ in range(runs):
+                top = retriever.get_top_k(query, k=5, fetch_k=fetch_k)
+            elapsed = (time.perf_counter() - start) / runs * 1000
+            pages = {(r.file, r.page) for r in top}
+            print(f"{label:>15}: {elapsed:.2f} ms/query, {len(pages)} distinct pages in top 5")
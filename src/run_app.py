@@ -1,10 +1,13 @@
 from agents.workflow.workflow import app  
+from agents.memory.short_term import ShortTermMemory
 
 def run_chat():
     print("\n🚀 Odisha Disaster Management Assistant")
     print("=" * 50)
     print("Type 'exit' to quit\n")
 
+    memory = ShortTermMemory()
+
     while True:
         query = input("You: ").strip()
 
@@ -23,6 +26,7 @@ def run_chat():
             "agent_response": None,
             "evaluation": None,
             "response": None,
+            "memory": memory,
             "metadata": {}
         }
 
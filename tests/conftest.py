@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Same import roots as backend/main.py: project root and src/
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "src"))
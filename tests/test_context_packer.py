@@ -0,0 +1,74 @@
+import os
+from dataclasses import dataclass
+
+import pytest
+
+import context_packer
+from context_packer import estimate_tokens, get_token_counter, pack_context
+
+
+@dataclass
+class Chunk:
+    content: str
+    file: str = "report.pdf"
+    page: int = 1
+    distance: float = 0.1
+
+
+def test_oversized_top_chunk_without_sentence_boundary_is_hard_truncated():
+    top = Chunk("cyclone damage " * 400, distance=0.05)  # ~1500 tokens, no sentence end
+    other = Chunk("Relief camps were opened in Puri. Food was distributed.", distance=0.4)
+
+    packed = pack_context([other, top], token_budget=100, count_tokens=estimate_tokens)
+
+    assert packed.chunks == [top]
+    assert packed.truncated
+    assert packed.text.startswith("[1] report.pdf (Page: 1)\ncyclone damage")
+    assert packed.text.endswith(" …")
+    assert 0 < packed.tokens <= 100
+    assert packed.over_budget_dropped == 1
+
+
+def test_top_chunk_smaller_than_partial_minimum_is_still_kept():
+    top = Chunk("x" * 400)
+
+    packed = pack_context([top], token_budget=20, count_tokens=estimate_tokens)
+
+    assert packed.chunks == [top]
+    assert packed.text
+    assert packed.tokens <= 20
+
+
+def test_token_counter_loads_local_tokenizer_file(tmp_path):
+    tokenizers = pytest.importorskip("tokenizers")
+    from tokenizers.models import WordLevel
+    from tokenizers.pre_tokenizers import Whitespace
+
+    tokenizer = tokenizers.Tokenizer(WordLevel({"[UNK]": 0, "cyclone": 1}, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = Whitespace()
+    path = tmp_path / "tokenizer.json"
+    tokenizer.save(str(path))
+
+    count = get_token_counter(str(path))
+
+    assert count("cyclone hit the coast") == 4
+
+
+def test_token_counter_falls_back_to_estimate_without_file(tmp_path):
+    assert get_token_counter(str(tmp_path / "missing.json")) is estimate_tokens
+
+
+@pytest.mark.skipif("CONTEXT_TOKENIZER" in os.environ, reason="tokenizer path overridden")
+def test_default_tokenizer_is_the_llama3_models_path():
+    assert context_packer.DEFAULT_TOKENIZER == os.path.join(
+        context_packer.PROJECT_ROOT, "models", "llama3-tokenizer", "tokenizer.json"
+    )
+
+
+def test_missing_default_tokenizer_falls_back_to_estimate(monkeypatch, tmp_path):
+    monkeypatch.setattr(context_packer, "DEFAULT_TOKENIZER", str(tmp_path / "tokenizer.json"))
+    context_packer.get_token_counter.cache_clear()
+    try:
+        assert context_packer.get_token_counter() is estimate_tokens
+    finally:
+        context_packer.get_token_counter.cache_clear()
@@ -0,0 +1,61 @@
+import sqlite3
+
+from embedding_cache import EmbeddingCache
+
+
+def _disk_rows(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+def test_disk_cap_trims_least_recently_used_rows(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = EmbeddingCache(path, max_memory_items=2, max_disk_items=100)
+
+    for i in range(250):
+        cache.put("model", f"text {i}", [float(i)])
+
+    stats = cache.get_stats()
+    assert stats["disk_items"] == _disk_rows(path) <= 100
+    assert stats["disk_evictions"] == 250 - stats["disk_items"]
+    assert stats["memory_evictions"] == 248
+
+    # Oldest rows went first; the newest survive (from disk, memory holds 2)
+    reopened = EmbeddingCache(path, max_memory_items=2, max_disk_items=100)
+    assert reopened.get("model", "text 0") is None
+    assert reopened.get("model", "text 240") == [240.0]
+    assert reopened.get_stats()["disk_items"] == stats["disk_items"]
+
+
+def test_replacing_a_key_does_not_grow_the_row_count(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite3"), max_disk_items=10)
+
+    for _ in range(5):
+        cache.put("model", "same text", [1.0])
+
+    assert cache.get_stats()["disk_items"] == 1
+    assert cache.get("model", "SAME   text") == [1.0]
+
+
+def test_expired_entries_miss_in_both_tiers(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.sqlite3")
+    clock = [1000.0]
+    monkeypatch.setattr("embedding_cache.time.time", lambda: clock[0])
+
+    cache = EmbeddingCache(path, ttl_seconds=60)
+    cache.put("model", "fani", [0.5])
+    assert cache.get("model", "fani") == [0.5]
+
+    clock[0] += 61
+    assert cache.get("model", "fani") is None  # memory tier, then disk row
+    assert _disk_rows(path) == 0
+
+    cold = EmbeddingCache(path, ttl_seconds=60)
+    cache.put("model", "phailin", [0.25])
+    clock[0] += 61
+    assert cold.get("model", "phailin") is None  # disk tier only, row deleted
+    assert _disk_rows(path) == 0
+
+    stats = cold.get_stats()
+    assert stats["expired"] == 1
+    assert stats["misses"] == 1
@@ -0,0 +1,111 @@
+import asyncio
+import threading
+
+from agents.policies.evaluation_policy import EvaluationPolicy
+
+
+class BlockedEvaluator:
+    """Evaluations block until release(); counts how many actually started."""
+
+    def __init__(self):
+        self.started = 0
+        self.gate = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self, state):
+        with self._lock:
+            self.started += 1
+        self.gate.wait(5)
+        return {"evaluation": {"score": 0.9, "approved": True}}
+
+    async def acall(self, state):
+        return self(state)
+
+    def release(self):
+        self.gate.set()
+
+
+def _track(policy):
+    """Record every inline job the policy submits."""
+    futures = []
+    submit = policy._inline_executor.submit
+
+    def tracking_submit(*args, **kwargs):
+        futures.append(submit(*args, **kwargs))
+        return futures[-1]
+
+    policy._inline_executor.submit = tracking_submit
+    return futures
+
+
+def _queued(futures):
+    """Inline jobs still waiting for a worker (cancelled ones never run)."""
+    return sum(1 for f in futures if not (f.running() or f.done()))
+
+
+def _drain(policy):
+    policy._inline_executor.shutdown(wait=True)
+    policy._executor.shutdown(wait=True)
+
+
+def test_budget_overruns_keep_the_inline_queue_bounded():
+    evaluator = BlockedEvaluator()
+    policy = EvaluationPolicy(
+        evaluator, mode="inline", latency_budget=0.05,
+        max_workers=1, max_queue=0, inline_workers=2
+    )
+    futures = _track(policy)
+
+    statuses = [policy.evaluate({"query": f"q{i}"})["evaluation"]["status"] for i in range(10)]
+
+    assert statuses == ["budget_exceeded"] * 10
+    assert sum(f.cancelled() for f in futures) == 8
+    assert _queued(futures) == 0
+    # Only the two jobs that got an inline worker ever ran; the other
+    # eight were cancelled before starting
+    assert evaluator.started == 2
+
+    evaluator.release()
+    _drain(policy)
+
+    stats = policy.get_stats()
+    assert evaluator.started == 2
+    assert stats["budget_exceeded"] == 10
+    # One running overrun got the single background slot, the other was dropped
+    assert stats["dropped"] == 1
+    assert stats["completed"] == 1
+    assert policy._background_slots.acquire(blocking=False)  # slot was released
+
+
+def test_async_budget_overruns_are_cancelled_too():
+    evaluator = BlockedEvaluator()
+    policy = EvaluationPolicy(
+        evaluator, mode="inline", latency_budget=0.05,
+        max_workers=1, max_queue=1, inline_workers=1
+    )
+    futures = _track(policy)
+
+    async def run():
+        return await asyncio.gather(*(policy.aevaluate({"query": f"q{i}"}) for i in range(6)))
+
+    results = asyncio.run(run())
+
+    assert [r["evaluation"]["status"] for r in results] == ["budget_exceeded"] * 6
+    assert _queued(futures) == 0
+    assert evaluator.started == 1
+
+    evaluator.release()
+    _drain(policy)
+    assert policy.get_stats()["completed"] == 1
+
+
+def test_within_budget_applies_the_evaluation():
+    evaluator = BlockedEvaluator()
+    evaluator.release()
+    policy = EvaluationPolicy(evaluator, mode="inline", latency_budget=1.0)
+
+    result = policy.evaluate({"query": "q"})
+
+    assert result["evaluation"]["status"] == "inline"
+    assert result["evaluation"]["score"] == 0.9
+    assert policy.get_stats()["completed"] == 1
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+pytest.importorskip("lxml")
+pytest.importorskip("requests")
+
+from agents.tools.imd_http_scraper import IMD_CITY_URL, ImdParseError, parse_imd_html
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "imd")
+STATION = 42971
+URL = IMD_CITY_URL.format(station_id=STATION)
+
+
+def _load(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_rendered_page_matches_selenium_schema():
+    parsed = parse_imd_html(_load("city_42971_rendered.html"), STATION, URL)
+
+    assert parsed["station_id"] == STATION
+    assert parsed["source"] == "IMD_HTTP"
+    assert parsed["date_info"] == {"day": "Monday", "full_date": "December 01, 2025"}
+
+    past = parsed["past_24_hours"]
+    assert past["maximum"] == {"value": "28.2°C", "departure": "-2.0", "time_ist": "1730 IST"}
+    assert past["minimum"] == {"value": "16.0°C", "departure": "1.2", "time_ist": "0830 IST"}
+    assert past["rainfall"] == {"value": "000.0mm", "time_ist": "0830 IST"}
+    assert past["humidity"] == {"morning": "68%", "evening": "66%"}
+
+    assert parsed["sun_moon"] == {
+        "sunset_today": "17:05",
+        "sunrise_tomorrow": "06:05",
+        "moonrise": "13:16",
+        "moonset": "--:--",
+    }
+
+
+def test_rendered_page_forecast_cards():
+    forecast = parse_imd_html(_load("city_42971_rendered.html"), STATION, URL)["forecast_7_days"]
+
+    assert [day["date"] for day in forecast] == ["1-DEC", "2-DEC", "3-DEC"]
+    assert forecast[0] == {
+        "date": "1-DEC",
+        "temp_max": "29",
+        "temp_min": "16",
+        "humidity_max": "72",
+        "humidity_min": "45",
+        "condition": "Partly cloudy sky",
+    }
+
+
+def test_static_page_without_data_raises():
+    with pytest.raises(ImdParseError):
+        parse_imd_html(_load("city_42971_static.html"), STATION, URL)
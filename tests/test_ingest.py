@@ -0,0 +1,200 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("chromadb")
+
+import ingest
+from embedding_backends import HashingEmbeddingBackend
+
+
+def write_pdf(path, pages):
+    """Minimal PDF with one line of Helvetica text per page (no PDF library needed)."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in below
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for text in pages:
+        escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        stream = f"BT /F1 12 Tf 72 720 Td ({escaped}) Tj ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects),)
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids), len(kids)
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(out))
+
+
+class FailingBackend(HashingEmbeddingBackend):
+    """Hashing embeddings, except for batches containing `fail_on`."""
+
+    def __init__(self, fail_on):
+        super().__init__()
+        self.fail_on = fail_on
+
+    def embed_batch(self, texts):
+        if any(self.fail_on in text for text in texts):
+            raise RuntimeError("embedding service unavailable")
+        return super().embed_batch(texts)
+
+
+@pytest.fixture
+def run(tmp_path):
+    persist_dir = str(tmp_path / "db")
+
+    def run(folder, backend=None, **kwargs):
+        ingestor = ingest.Ingestor(
+            persist_dir=persist_dir,
+            collection_name="test_docs",
+            backend=backend or HashingEmbeddingBackend(),
+            batch_size=2,
+            workers=1,
+            **kwargs,
+        )
+        stats = asyncio.run(ingestor.ingest(ingest.find_pdfs([str(folder)])))
+        with open(ingestor.manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        return stats, manifest, ingestor.collection
+
+    return run
+
+
+def indexed(collection):
+    """filename -> set of chunk ids in the collection."""
+    result = collection.get(include=["metadatas"])
+    files = {}
+    for cid, meta in zip(result["ids"], result["metadatas"]):
+        files.setdefault(meta["filename"], set()).add(cid)
+    return files
+
+
+@pytest.fixture
+def pdfs(tmp_path):
+    folder = tmp_path / "pdfs"
+    folder.mkdir()
+    write_pdf(folder / "cyclone.pdf", ["Fani made landfall near Puri.", "Relief camps opened in Khurda."])
+    write_pdf(folder / "flood.pdf", ["Mahanadi flood warning issued."])
+    return folder
+
+
+def test_unchanged_files_are_skipped_without_parsing(run, pdfs):
+    first, manifest, collection = run(pdfs)
+    assert first["files"] == 2 and first["pages"] == 3 and first["chunks"] == 3
+
+    second, manifest_again, collection = run(pdfs)
+
+    assert second["files_unchanged"] == 2
+    assert second["files"] == 0
+    assert second["pages"] == 0
+    assert second["chunks"] == 0 and second["chunks_deleted"] == 0
+    assert manifest_again["files"] == manifest["files"]
+    assert sum(len(ids) for ids in indexed(collection).values()) == 3
+
+
+def test_edited_file_is_reindexed_and_removed_chunks_deleted(run, pdfs):
+    _, before, _ = run(pdfs)
+    old_ids = set(before["files"]["cyclone.pdf"]["chunks"])
+
+    write_pdf(pdfs / "cyclone.pdf", ["Fani made landfall near Puri.", "Camps closed after two weeks."])
+    stats, after, collection = run(pdfs)
+
+    new_ids = set(after["files"]["cyclone.pdf"]["chunks"])
+    assert stats["files"] == 1 and stats["files_unchanged"] == 1
+    assert stats["chunks_reused"] == 1  # page 1 kept its id
+    assert stats["chunks"] == 1
+    assert stats["chunks_deleted"] == 1
+    assert len(old_ids & new_ids) == 1
+    assert indexed(collection)["cyclone.pdf"] == new_ids
+    assert after["files"]["cyclone.pdf"]["sha256"] == ingest.file_sha256(str(pdfs / "cyclone.pdf"))
+
+
+def test_prune_removes_files_missing_from_the_input(run, pdfs):
+    run(pdfs)
+    (pdfs / "flood.pdf").unlink()
+
+    stats, manifest, collection = run(pdfs)
+    assert stats["files_pruned"] == 0
+    assert "flood.pdf" in manifest["files"]  # kept without --prune
+
+    stats, manifest, collection = run(pdfs, prune=True)
+    assert stats["files_pruned"] == 1
+    assert stats["chunks_deleted"] == 1
+    assert set(manifest["files"]) == {"cyclone.pdf"}
+    assert set(indexed(collection)) == {"cyclone.pdf"}
+
+
+def test_failed_batch_leaves_no_manifest_entry(run, pdfs):
+    stats, manifest, _ = run(pdfs, backend=FailingBackend(fail_on="Mahanadi"))
+
+    assert stats["batches_failed"] == 1
+    assert stats["files_failed"] == 1
+    assert set(manifest["files"]) == {"cyclone.pdf"}
+
+    # Next run retries the failed file from scratch
+    stats, manifest, collection = run(pdfs)
+    assert stats["files"] == 1 and stats["files_unchanged"] == 1
+    assert set(manifest["files"]) == {"cyclone.pdf", "flood.pdf"}
+    assert indexed(collection)["flood.pdf"] == set(manifest["files"]["flood.pdf"]["chunks"])
+
+
+def test_read_error_mid_file_leaves_no_manifest_entry(run, pdfs, monkeypatch):
+    run(pdfs)
+    pages = [f"Bulletin page {n} for Ganjam district." for n in range(1, 11)]
+    write_pdf(pdfs / "cyclone.pdf", pages)  # 2 page ranges at 8 pages per task
+
+    extract = ingest._extract_page_range
+
+    def broken_second_range(pdf_path, start, stop):
+        if start > 0:
+            raise OSError("truncated file")
+        return extract(pdf_path, start, stop)
+
+    monkeypatch.setattr(ingest, "_extract_page_range", broken_second_range)
+    stats, manifest, _ = run(pdfs)
+
+    assert stats["files_failed"] == 1
+    assert stats["files"] == 0
+    assert set(manifest["files"]) == {"flood.pdf"}
+
+    # Once readable, the file is rebuilt: no chunks from either earlier attempt survive
+    monkeypatch.setattr(ingest, "_extract_page_range", extract)
+    stats, manifest, collection = run(pdfs)
+
+    assert stats["files"] == 1
+    assert indexed(collection)["cyclone.pdf"] == set(manifest["files"]["cyclone.pdf"]["chunks"])
+    assert len(manifest["files"]["cyclone.pdf"]["chunks"]) == 10
+
+
+def test_process_pool_yields_pages_in_order(tmp_path):
+    path = tmp_path / "bulletin.pdf"
+    write_pdf(path, [f"Page {n} of the IMD bulletin." for n in range(1, 12)])
+
+    async def collect():
+        extractor = ingest.PageExtractor(workers=2, pages_per_task=3, processes=True)
+        assert extractor._pool._mp_context.get_start_method() == "spawn"
+        try:
+            return [page async for page in extractor.iter_pages(str(path))]
+        finally:
+            extractor.close()
+
+    pages = asyncio.run(collect())
+
+    assert [number for number, _ in pages] == list(range(1, 12))
+    assert [text for _, text in pages] == [f"Page {n} of the IMD bulletin." for n in range(1, 12)]
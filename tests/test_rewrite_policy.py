@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from agents.policies.rewrite_policy import RewritePolicy
+
+
+HISTORY = [{"user": "How much damage did cyclone Fani cause?", "assistant": "Fani caused ..."}]
+
+
+class Reply:
+    def __init__(self, content):
+        self.content = content
+
+
+class CountingLLM:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        return Reply(f"  rewritten #{self.calls}  ")
+
+    async def ainvoke(self, prompt, config=None):
+        return self.invoke(prompt)
+
+
+@pytest.mark.parametrize("query, expected", [
+    # ANAPHORA
+    ("What was its wind speed at landfall?", True),
+    ("How many people were evacuated there?", True),
+    ("Were those shelters enough for everyone?", True),
+    ("Compare that with the 1999 super cyclone", True),
+    # ELLIPSIS_OPENERS
+    ("And the rainfall in Puri district?", True),
+    ("What about Phailin in 2013?", True),
+    ("how about crop losses in Ganjam", True),
+    ("Also the number of houses damaged", True),
+    # Fragments below MIN_SELF_CONTAINED_TOKENS
+    ("tomorrow?", True),
+    ("Cuttack rainfall", True),
+    # Self-contained
+    ("What is the weather in Bhubaneswar today?", False),
+    ("How much damage did cyclone Phailin cause in Odisha?", False),
+    ("Andhra Pradesh cyclone shelters list", False),  # "and" only as a prefix of a word
+    ("Whatever happened to the OSDMA budget report", False),
+])
+def test_needs_rewrite_heuristics(query, expected):
+    assert RewritePolicy(CountingLLM()).needs_rewrite(query, HISTORY) is expected
+
+
+def test_no_history_never_rewrites():
+    policy = RewritePolicy(CountingLLM())
+
+    assert policy.needs_rewrite("what about it?", []) is False
+    assert policy.rewrite("what about it?", []) == "what about it?"
+    assert policy.get_stats()["no_history"] == 1
+
+
+def test_classifier_hook_decides_what_the_heuristics_let_through():
+    query = "Is the forecast reliable for the coming week"
+    seen = []
+
+    def classifier(q, history):
+        seen.append(q)
+        return 0.9
+
+    assert RewritePolicy(CountingLLM(), classifier=classifier).needs_rewrite(query, HISTORY) is True
+    assert RewritePolicy(CountingLLM(), classifier=lambda q, h: 0.1).needs_rewrite(query, HISTORY) is False
+    assert seen == [query]
+
+    def broken(q, h):
+        raise RuntimeError("model not loaded")
+
+    assert RewritePolicy(CountingLLM(), classifier=broken).needs_rewrite(query, HISTORY) is True
+
+
+def test_self_contained_query_skips_the_llm():
+    llm = CountingLLM()
+    policy = RewritePolicy(llm)
+
+    assert policy.rewrite("What is the weather in Puri today?", HISTORY) == "What is the weather in Puri today?"
+    assert llm.calls == 0
+    assert policy.get_stats()["skipped_self_contained"] == 1
+
+
+def test_rewrites_are_cached_per_history_and_normalized_query():
+    llm = CountingLLM()
+    policy = RewritePolicy(llm)
+
+    first = policy.rewrite("What about Puri?", HISTORY)
+    again = policy.rewrite("  what ABOUT   puri? ", HISTORY)
+    assert first == again == "rewritten #1"
+    assert llm.calls == 1
+
+    # Different history → different context → new rewrite
+    other = HISTORY + [{"user": "And Phailin?", "assistant": "Phailin ..."}]
+    assert policy.rewrite("What about Puri?", other) == "rewritten #2"
+
+    stats = policy.get_stats()
+    assert stats["cache_hits"] == 1
+    assert stats["llm_calls"] == 2
+    assert stats["llm_calls_avoided"] == 1
+
+
+def test_cache_is_lru_bounded():
+    llm = CountingLLM()
+    policy = RewritePolicy(llm, cache_size=2)
+
+    for place in ("Puri", "Cuttack", "Balasore"):
+        policy.rewrite(f"What about {place}?", HISTORY)
+    policy.rewrite("What about Puri?", HISTORY)  # evicted → LLM again
+
+    assert llm.calls == 4
+
+
+def test_async_path_shares_the_cache():
+    llm = CountingLLM()
+    policy = RewritePolicy(llm)
+
+    policy.rewrite("What about Puri?", HISTORY)
+    assert asyncio.run(policy.arewrite("What about Puri?", HISTORY)) == "rewritten #1"
+    assert llm.calls == 1
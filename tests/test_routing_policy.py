@@ -0,0 +1,93 @@
+import pytest
+
+from agents.policies.routing_policy import RoutingPolicy
+
+
+POLICY = RoutingPolicy(cache_size=0)
+
+TABLES = {
+    "calculator": POLICY.calculator_keywords,
+    "web_search": POLICY.web_search_keywords,
+    "weather": POLICY.weather_keywords,
+    "rag": POLICY.rag_keywords,
+    "historical": POLICY.historical_intents,
+}
+
+
+def legacy_categories(query: str) -> set:
+    """The pre-compilation matcher: one `kw in q` substring scan per keyword."""
+    q = query.lower().strip()
+    found = {category for category, keywords in TABLES.items() if any(kw in q for kw in keywords)}
+    if any(sym in query for sym in POLICY.calculator_symbols):
+        found.add("calculator")
+    return found
+
+
+def legacy_route(query: str) -> str:
+    categories = legacy_categories(query)
+    for route, needs in (
+        ("calculator", {"calculator"}),
+        ("web_search", {"web_search"}),
+        ("rag", {"rag", "historical"}),
+        ("weather", {"weather"}),
+    ):
+        if categories & needs:
+            return route
+    return "general"
+
+
+# Documented behaviour changes of the compiled matcher:
+# query → (legacy categories, compiled categories)
+EXCEPTIONS = {
+    # Historical intents must be whole words
+    "Is Rowasa a village in Khordha district": ({"historical"}, set()),
+    "the agony of the flood victims": ({"historical"}, set()),
+    # Keywords must start at a word boundary
+    "relief camps in Chicago": ({"historical"}, set()),
+    "wheat procurement in Bargarh": ({"weather"}, set()),
+    "research on cyclone shelters": ({"rag", "web_search", "weather"}, {"rag"}),
+    "tell me about research": ({"rag", "web_search", "weather"}, {"rag"}),
+    "tell me about search": ({"web_search", "weather"}, {"web_search"}),  # "sea" in "search"
+    "the aftermath of Fani": ({"calculator", "rag"}, {"rag"}),
+    # Longest keyword wins at a position: "previous cyclone" hides "previous"
+    "tell me about previous cyclone": ({"rag", "historical"}, {"rag"}),
+    "tell me about previous disaster": ({"rag", "historical"}, {"rag"}),
+}
+
+KEYWORD_QUERIES = [
+    f"tell me about {kw}"
+    for keywords in TABLES.values()
+    for kw in keywords
+    if f"tell me about {kw}" not in EXCEPTIONS
+] + [f"value {sym} 3" for sym in POLICY.calculator_symbols]
+
+SENTENCES = [
+    "What is the weather in Puri today?",
+    "Will it rain in Cuttack tomorrow",
+    "cloudy skies and rainfall in Balasore",
+    "How much damage did cyclone Fani cause in 2019?",
+    "What happened during Phailin",
+    "reports on the 1999 super cyclone",
+    "Calculate 15% of 2400",
+    "latest news on cyclone warning",
+    "look up the OSDMA helpline",
+    "Tell me about OSDMA",
+    "coastal warning for fishermen near Paradip",
+    "How many cyclone shelters does Odisha have",
+    "humidity and wind speed in Balasore",
+    "flood damage assessment for Kendrapara last year",
+]
+
+
+@pytest.mark.parametrize("query", KEYWORD_QUERIES + SENTENCES)
+def test_compiled_matcher_agrees_with_legacy_loops(query):
+    assert POLICY.match_categories(query.lower()) == legacy_categories(query)
+    assert POLICY.route(query) == legacy_route(query)
+
+
+@pytest.mark.parametrize("query, expected", EXCEPTIONS.items())
+def test_documented_differences(query, expected):
+    legacy, compiled = expected
+
+    assert legacy_categories(query) == legacy
+    assert POLICY.match_categories(query.lower()) == compiled
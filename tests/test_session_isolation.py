@@ -0,0 +1,108 @@
+import asyncio
+import random
+
+import pytest
+
+pytest.importorskip("langgraph")
+pytest.importorskip("fastapi")
+chromadb = pytest.importorskip("chromadb")
+
+
+SESSIONS = [f"s{i}" for i in range(6)]
+TURNS = 4
+
+
+class RecordingRewrite:
+    """Stands in for the LLM rewrite; records the history each query saw."""
+
+    def __init__(self):
+        self.seen = []
+
+    async def arewrite(self, query, history, config=None):
+        self.seen.append((query, [turn["user"] for turn in history]))
+        await asyncio.sleep(random.uniform(0, 0.01))
+        return query
+
+
+class EchoAgent:
+    async def acall(self, state, config=None):
+        await asyncio.sleep(random.uniform(0, 0.01))
+        return {"agent_response": f"answer to {state['query']}"}
+
+
+@pytest.fixture(scope="module")
+def backend_main(tmp_path_factory):
+    persist_dir = tmp_path_factory.mktemp("chroma")
+    chromadb.PersistentClient(path=str(persist_dir)).get_or_create_collection("pdf_documents")
+
+    env = pytest.MonkeyPatch()
+    env.chdir(persist_dir)  # LongTermMemory writes memory_store.json to the cwd
+    for key, value in {
+        "GROQ_API_KEY": "test",
+        "CHROMA_PERSIST_DIR": str(persist_dir),
+        "EMBEDDING_BACKEND": "hashing",
+        "EMBEDDING_CACHE_PATH": "",
+        "EVALUATION_MODE": "off",
+        "EVALUATION_LOG_PATH": "",
+        "SESSION_BACKEND": "memory",
+        "SPECULATIVE_REWRITE": "false",
+    }.items():
+        env.setenv(key, value)
+
+    import backend.main as main
+    yield main
+    env.undo()
+
+
+@pytest.fixture
+def graph(backend_main, monkeypatch):
+    from agents.workflow import workflow
+
+    rewrite = RecordingRewrite()
+    monkeypatch.setattr(workflow, "rewrite_policy", rewrite)
+    monkeypatch.setattr(workflow, "user_agent", EchoAgent())
+    monkeypatch.setattr(workflow.routing_policy, "decide", lambda query: {"route": "general", "embedding": None})
+    return rewrite
+
+
+def _owner(query):
+    return query.split()[0]
+
+
+def test_concurrent_sessions_keep_separate_histories(backend_main, graph):
+    async def converse(session_id):
+        for turn in range(TURNS):
+            request = backend_main.QueryRequest(query=f"{session_id} turn {turn}", session_id=session_id)
+            result = await backend_main.ask_question(request)
+            assert result["success"], result
+
+    async def run():
+        await asyncio.gather(*(converse(session_id) for session_id in SESSIONS))
+
+    asyncio.run(run())
+
+    for session_id in SESSIONS:
+        history = backend_main.SESSION_STORE.get(session_id).get()
+        assert [turn["user"] for turn in history] == [f"{session_id} turn {t}" for t in range(TURNS)]
+        assert all(turn["assistant"] == f"answer to {turn['user']}" for turn in history)
+
+    # Each rewrite saw exactly its own session's earlier turns
+    for query, history in graph.seen:
+        session_id, turn = _owner(query), int(query.split()[-1])
+        assert history == [f"{session_id} turn {t}" for t in range(turn)]
+
+
+def test_requests_without_session_share_no_history(backend_main, graph):
+    sessions_before = backend_main.SESSION_STORE.get_stats()["active_sessions"]
+
+    async def run():
+        await asyncio.gather(*(
+            backend_main.ask_question(backend_main.QueryRequest(query=f"anon{i} question"))
+            for i in range(5)
+        ))
+
+    asyncio.run(run())
+    asyncio.run(backend_main.ask_question(backend_main.QueryRequest(query="anon-late question")))
+
+    assert graph.seen and all(history == [] for _, history in graph.seen)
+    assert backend_main.SESSION_STORE.get_stats()["active_sessions"] == sessions_before